@@ -29,27 +29,319 @@ Make sure to change your path to your actual script.
 """
 
 import json
+import os
 import re
 import sys
+from functools import lru_cache
 
-# Define validation rules as a list of (regex pattern, message) tuples
-_VALIDATION_RULES = [
-    (
-        r"^grep\b(?!.*\|)",
-        "Use 'rg' (ripgrep) instead of 'grep' for better performance and features",
-    ),
-    (
-        r"^find\s+\S+\s+-name\b",
-        "Use 'rg --files | rg pattern' or 'rg --files -g pattern' instead of 'find -name' for better performance",
-    ),
-]
+from rule_engine import RuleEngine
+
+# Rules live next to this script; see rule_engine.py for the format
+_RULES_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "bash_rules.toml"
+)
+_engine: RuleEngine | None = None
+_engine_stamp: tuple[float, int] | None = None
+
+# Control operators, longest first so "&&" isn't read as two "&"
+_OPERATORS = ("&&", "||", ";;", "|&", ";", "|", "&", "\n")
+_PIPES = ("|", "|&")
+# Leading words that run the rest of the command, with their options taking a value
+_WRAPPERS = {"builtin": "", "command": "", "env": "CSu", "exec": "a", "nice": "n",
+             "nohup": "", "sudo": "CDghprRtUu", "time": "f"}
+# Reserved words that can come before a command
+_RESERVED = {
+    "!", "{", "}", "do", "done", "elif", "else", "esac", "fi", "if", "then", "until",
+    "while",
+}
+# Compound command headers, which aren't commands themselves
+_HEADERS = {"case", "for", "select"}
+_ASSIGNMENT = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*=")
+# Characters ending an unquoted word
+_METACHARACTERS = " \t\n;&|()<>"
+_SUBSTITUTION = re.compile(r"\$\((?!\()|`([^`]*)`")
+
+
+def _closing_paren(command: str, start: int) -> int:
+    """Return the index of the ")" closing a "(" just before start."""
+    depth = 1
+    for i in range(start, len(command)):
+        if command[i] == "(":
+            depth += 1
+        elif command[i] == ")":
+            depth -= 1
+            if depth == 0:
+                return i
+    return len(command)
+
+
+def _heredoc_delimiter(command: str, start: int) -> tuple[str, bool, int]:
+    """Read the delimiter word of a heredoc at start.
+
+    Returns the delimiter with quotes removed, whether any part of it was
+    quoted (which stops expansion in the body) and where it ends.
+    """
+    while command.startswith((" ", "\t"), start):
+        start += 1
+    delimiter: list[str] = []
+    quoted = False
+    i = start
+    while i < len(command) and command[i] not in _METACHARACTERS:
+        if command[i] in "'\"":
+            end = command.find(command[i], i + 1)
+            end = len(command) if end == -1 else end
+            delimiter.append(command[i + 1:end])
+            quoted = True
+            i = end + 1
+        elif command[i] == "\\":
+            delimiter.append(command[i + 1:i + 2])
+            quoted = True
+            i += 2
+        else:
+            delimiter.append(command[i])
+            i += 1
+    return "".join(delimiter), quoted, i
+
+
+def _heredoc_body(
+    command: str, start: int, delimiter: str, strip_tabs: bool
+) -> tuple[str, int]:
+    """Return a heredoc's body starting at start and where the text after it begins."""
+    body: list[str] = []
+    i = start
+    while i < len(command):
+        end = command.find("\n", i)
+        end = len(command) if end == -1 else end
+        line = command[i:end]
+        i = end + 1
+        if (line.lstrip("\t") if strip_tabs else line) == delimiter:
+            break
+        body.append(line)
+    return "\n".join(body), min(i, len(command))
+
+
+def _substitutions(text: str) -> list[tuple[str, bool]]:
+    """Tokens for the command substitutions in text that expands but isn't parsed."""
+    tokens: list[tuple[str, bool]] = []
+    position = 0
+    while match := _SUBSTITUTION.search(text, position):
+        if match.group(1) is not None:
+            inner, position = match.group(1), match.end()
+        else:
+            end = _closing_paren(text, match.end())
+            inner, position = text[match.end():end], end + 1
+        tokens += [("$(", True), *_tokenize(inner), (")", True)]
+    return tokens
+
+
+def _tokenize(command: str) -> list[tuple[str, bool]]:
+    """Split a command into (token, is_operator) pairs the way a shell would.
+
+    Quotes and backslashes are resolved, so quoted or escaped operators
+    (`"a && b"`, `\\;`) stay inside words, and so do the `&` and `|` of
+    redirections like `2>&1`. `(`, `)`, `$(` and backticks come back as
+    operators so subshells and substitutions can be split out. Heredoc
+    bodies are skipped, apart from substitutions in unquoted ones.
+    """
+    tokens: list[tuple[str, bool]] = []
+    word: list[str] = []
+    in_word = False
+    # Heredocs whose bodies start after the current line
+    heredocs: list[tuple[str, bool, bool]] = []
+    i = 0
+
+    def end_word() -> None:
+        nonlocal in_word
+        if in_word:
+            tokens.append(("".join(word), False))
+            word.clear()
+            in_word = False
+
+    while i < len(command):
+        char = command[i]
+        if char == "\\":
+            if command.startswith("\n", i + 1):
+                i += 2
+                continue
+            word.append(command[i + 1:i + 2])
+            in_word = True
+            i += 2
+        elif char == "'":
+            end = command.find("'", i + 1)
+            end = len(command) if end == -1 else end
+            word.append(command[i + 1:end])
+            in_word = True
+            i = end + 1
+        elif char == '"':
+            i += 1
+            while i < len(command) and command[i] != '"':
+                escaped = command[i + 1:i + 2]
+                if command[i] == "\\" and escaped in ('"', "\\", "$", "`", "\n"):
+                    if command[i + 1] != "\n":
+                        word.append(command[i + 1])
+                    i += 2
+                elif command.startswith("$(", i) and not command.startswith("$((", i):
+                    # A substitution inside quotes is still a command of its own
+                    end = _closing_paren(command, i + 2)
+                    inner = _tokenize(command[i + 2:end])
+                    tokens += [("$(", True), *inner, (")", True)]
+                    word.append(command[i:end + 1])
+                    i = end + 1
+                else:
+                    word.append(command[i])
+                    i += 1
+            in_word = True
+            i += 1
+        elif char in " \t":
+            end_word()
+            i += 1
+        elif char == "#" and not in_word:
+            # Comment up to the end of the line
+            end = command.find("\n", i)
+            i = len(command) if end == -1 else end
+        elif command.startswith("$((", i):
+            # Arithmetic, not a subshell
+            end = command.find("))", i)
+            end = len(command) if end == -1 else end + 2
+            word.append(command[i:end])
+            in_word = True
+            i = end
+        elif command.startswith("$(", i):
+            end_word()
+            tokens.append(("$(", True))
+            i += 2
+        elif command.startswith("<<", i) and not command.startswith("<<<", i):
+            strip_tabs = command.startswith("<<-", i)
+            delimiter, quoted, end = _heredoc_delimiter(command, i + 2 + strip_tabs)
+            heredocs.append((delimiter, strip_tabs, quoted))
+            word.append(command[i:end])
+            in_word = True
+            end_word()
+            i = end
+        elif char in "<>":
+            # A redirection operator; its "&" or "|" doesn't end the command
+            end = i + 2 if command.startswith(char, i + 1) else i + 1
+            if command.startswith(("&", "|"), end):
+                end += 1
+            word.append(command[i:end])
+            in_word = True
+            i = end
+        elif command.startswith("&>", i):
+            word.append("&>>" if command.startswith("&>>", i) else "&>")
+            in_word = True
+            i += len(word[-1])
+        elif char == "\n" and heredocs:
+            end_word()
+            tokens.append(("\n", True))
+            i += 1
+            for delimiter, strip_tabs, quoted in heredocs:
+                body, i = _heredoc_body(command, i, delimiter, strip_tabs)
+                if not quoted:
+                    tokens += _substitutions(body)
+            heredocs.clear()
+        elif char in "()`":
+            end_word()
+            tokens.append((char, True))
+            i += 1
+        else:
+            operator = next(
+                (op for op in _OPERATORS if command.startswith(op, i)), None
+            )
+            if operator is None:
+                word.append(char)
+                in_word = True
+                i += 1
+            else:
+                end_word()
+                tokens.append((operator, True))
+                i += len(operator)
+    end_word()
+    return tokens
+
+
+@lru_cache(maxsize=1024)
+def _parse(command: str) -> tuple[tuple[str, bool], ...]:
+    """Return the simple commands in a command line with whether each reads a pipe.
+
+    Pipelines, lists, subshells and command substitutions are all taken
+    apart, so `cd x && (grep foo $(ls))` yields "cd x", "grep foo" and
+    "ls". Agents repeat commands a lot, so results are cached (which pays
+    off when the hook runs under `clod hooks serve`).
+    """
+    simple_commands: list[tuple[str, bool]] = []
+    # Outer commands interrupted by a subshell or substitution
+    stack: list[tuple[list[str], bool]] = []
+    words: list[str] = []
+    piped = False
+    in_backticks = False
+
+    def end_command() -> None:
+        i = 0
+        while i < len(words):
+            if _ASSIGNMENT.match(words[i]) or words[i] in _RESERVED:
+                i += 1
+            elif words[i] in _WRAPPERS:
+                wrapper = words[i]
+                i += 1
+                while i < len(words) and words[i].startswith("-") and words[i] != "-":
+                    option = words[i]
+                    i += 1
+                    if option == "--":
+                        break
+                    if wrapper == "command" and option in ("-v", "-V"):
+                        # Only looks the command up
+                        i = len(words)
+                    elif len(option) == 2 and option[1] in _WRAPPERS[wrapper]:
+                        i += 1
+            else:
+                break
+        command_words = words[i:]
+        if command_words and command_words[0] not in _HEADERS:
+            simple_commands.append((" ".join(command_words), piped))
+        words.clear()
+
+    for token, is_operator in _tokenize(command):
+        if not is_operator:
+            words.append(token)
+        elif token == "$(" or token == "(" or (token == "`" and not in_backticks):
+            stack.append((words[:], piped))
+            words.clear()
+            piped = False
+            in_backticks = token == "`"
+        elif token in (")", "`") and stack:
+            end_command()
+            outer_words, piped = stack.pop()
+            words.extend(outer_words)
+            in_backticks = False
+        else:
+            end_command()
+            piped = token in _PIPES
+    end_command()
+    while stack:
+        outer_words, piped = stack.pop()
+        words.extend(outer_words)
+        end_command()
+    return tuple(simple_commands)
+
+
+def _rules() -> RuleEngine:
+    """Return the rule engine, reloading it if the rules file has changed."""
+    global _engine, _engine_stamp
+    stat = os.stat(_RULES_PATH)
+    stamp = (stat.st_mtime, stat.st_size)
+    if _engine is None or stamp != _engine_stamp:
+        _engine = RuleEngine.load(_RULES_PATH)
+        _engine_stamp = stamp
+    return _engine
 
 
 def _validate_command(command: str) -> list[str]:
+    engine = _rules()
     issues = []
-    for pattern, message in _VALIDATION_RULES:
-        if re.search(pattern, command):
-            issues.append(message)
+    for simple_command, piped in _parse(command):
+        for rule in engine.match(simple_command, piped):
+            if rule.message not in issues:
+                issues.append(rule.message)
     return issues
 
 
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Claude Code Hook: daemon client
+===============================
+Forwards a hook call to the `clod hooks serve` daemon, which keeps hook
+scripts from this directory loaded, and passes back their stdout, stderr
+and exit code. If the daemon isn't running or fails mid-request, the script
+is run directly.
+
+Start-up time is the whole cost of this client, so it only imports
+built-in modules (no socket, os or json) and should be run with
+`python3 -S` to skip site setup too.
+
+{
+  "matcher": "Bash",
+  "hooks": [
+    {
+      "type": "command",
+      "command": "python3 -S ~/.claude/hooks/hook_client.py bash_command_validator"
+    }
+  ]
+}
+"""
+
+import _socket
+import posix
+import sys
+
+
+def _socket_path() -> bytes:
+    # Keep in sync with clod.hook_server.default_socket_path
+    environ = posix.environ
+    if environ.get(b"CLOD_HOOKS_SOCKET"):
+        return environ[b"CLOD_HOOKS_SOCKET"]
+    runtime_dir = environ.get(b"XDG_RUNTIME_DIR")
+    if runtime_dir:
+        return runtime_dir + b"/clod-hooks.sock"
+    return f"/tmp/clod-hooks-{posix.getuid()}.sock".encode()
+
+
+def _run_directly(name: str, stdin: bytes | None = None) -> None:
+    import os
+
+    if stdin is not None:
+        # stdin was already read for the daemon; feed it to the script again
+        read_fd, write_fd = os.pipe()
+        if os.fork() == 0:
+            os.close(read_fd)
+            with os.fdopen(write_fd, "wb") as pipe:
+                pipe.write(stdin)
+            os._exit(0)
+        os.close(write_fd)
+        os.dup2(read_fd, 0)
+        os.close(read_fd)
+    directory = os.path.dirname(os.path.abspath(__file__))
+    script = os.path.join(directory, f"{name}.py")
+    os.execv(sys.executable, [sys.executable, script])
+
+
+def main() -> None:
+    if len(sys.argv) != 2:
+        print("Usage: hook_client.py HOOK_NAME", file=sys.stderr)
+        sys.exit(1)
+    name = sys.argv[1]
+
+    sock = _socket.socket(_socket.AF_UNIX, _socket.SOCK_STREAM)
+    try:
+        sock.connect(_socket_path())
+    except OSError:
+        sock.close()
+        # Nothing has read our stdin yet, so the script gets all of it
+        _run_directly(name)
+
+    stdin = sys.stdin.buffer.read()
+    try:
+        sock.sendall(name.encode() + b"\n" + stdin)
+        sock.shutdown(_socket.SHUT_WR)
+        chunks = []
+        while chunk := sock.recv(65536):
+            chunks.append(chunk)
+        # "<exit code> <stdout length>\n<stdout><stderr>"
+        header, _, body = b"".join(chunks).partition(b"\n")
+        code, stdout_length = (int(field) for field in header.split())
+        if len(body) < stdout_length:
+            raise ValueError("Truncated reply")
+    except (OSError, ValueError):
+        # The daemon died mid-request; run the script here instead
+        sock.close()
+        _run_directly(name, stdin)
+    sock.close()
+
+    sys.stdout.buffer.write(body[:stdout_length])
+    sys.stderr.buffer.write(body[stdout_length:])
+    sys.exit(code)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,261 @@
+"""
+Rule engine for hook validators
+===============================
+Loads rules from a TOML or JSON file and checks text against all of them
+in roughly constant time, however many there are:
+
+1. Every rule's regex is parsed for literal text that any match must
+   contain (e.g. "grep" for `^(grep|egrep)\b`). All those literals go into
+   one Aho-Corasick automaton, so a single pass over the (lowercased) text
+   finds the few rules that could possibly match.
+2. Those candidates are checked together by one regex made of a named
+   lookahead group per rule, compiled once per set of candidates.
+
+Parsing and building the automaton is cached on disk, keyed by a hash of
+the rule file, so a fresh hook process only pays for unmarshalling it.
+
+Rules file (TOML; JSON is the same shape):
+
+    [[rules]]
+    name = "prefer-rg"
+    pattern = '^grep\b'
+    message = "Use 'rg' instead of 'grep'"
+    piped = false        # skip commands reading a pipe (default true)
+    ignore_case = false  # (default false)
+
+Only the standard library is used; TOML needs Python 3.11+.
+"""
+
+from __future__ import annotations
+
+import json
+import marshal
+import os
+import re
+import zlib
+from collections import deque, namedtuple
+from functools import lru_cache
+
+try:
+    from re import _parser as sre_parse
+except ImportError:  # Python < 3.11
+    import sre_parse
+
+# Bump when the cached format or literal extraction changes
+_CACHE_VERSION = 1
+# A \1-style backreference, which would point at another rule's group once
+# combined
+_NUMBERED_BACKREF = re.compile(r"(?<!\\)(?:\\\\)*\\[1-9]")
+
+
+# Only cheap modules are imported (no dataclasses, pathlib or hashlib):
+# this runs at the start of every hook process
+_RuleFields = namedtuple(
+    "_RuleFields", "name pattern message piped ignore_case", defaults=(True, False)
+)
+
+
+class Rule(_RuleFields):
+    """A regex to reject, with the message shown when it matches."""
+    __slots__ = ()
+
+    @property
+    def regex(self) -> str:
+        return f"(?i:{self.pattern})" if self.ignore_case else f"(?:{self.pattern})"
+
+
+def _best(candidates: list[set[str] | None]) -> set[str] | None:
+    """Pick the literal set whose shortest alternative is longest."""
+    found = [literals for literals in candidates if literals]
+    if not found:
+        return None
+    return max(found, key=lambda literals: (min(map(len, literals)), -len(literals)))
+
+
+def _required_literals(items: list) -> set[str] | None:
+    """Return strings one of which every match of a parsed regex contains.
+
+    Returns None when no such set can be found, e.g. for `\\w+`.
+    """
+    candidates: list[set[str] | None] = []
+    run: list[str] = []
+    for op, value in items:
+        if op is sre_parse.LITERAL:
+            run.append(chr(value))
+            continue
+        if run:
+            candidates.append({"".join(run)})
+            run = []
+        if op is sre_parse.SUBPATTERN:
+            candidates.append(_required_literals(value[-1]))
+        elif op in (sre_parse.MAX_REPEAT, sre_parse.MIN_REPEAT) and value[0] >= 1:
+            candidates.append(_required_literals(value[2]))
+        elif op is sre_parse.BRANCH:
+            branches = [_required_literals(branch) for branch in value[1]]
+            if all(branches):
+                candidates.append(set().union(*branches))
+    if run:
+        candidates.append({"".join(run)})
+    return _best(candidates)
+
+
+def _literals(rule: Rule) -> list[str]:
+    """Return the lowercased literals prefiltering a rule, or [] for always-check."""
+    try:
+        if _NUMBERED_BACKREF.search(rule.pattern):
+            raise ValueError("numbered backreferences aren't supported; use (?P=name)")
+        re.compile(rule.regex)
+        literals = _required_literals(sre_parse.parse(rule.regex))
+    except (re.error, ValueError) as e:
+        # e.g. global flags like (?i), which must use ignore_case instead
+        raise ValueError(f"Invalid pattern in rule {rule.name!r}: {e}") from None
+    return sorted({literal.lower() for literal in literals}) if literals else []
+
+
+def _build_automaton(
+    rule_literals: list[list[str]],
+) -> tuple[list[dict[str, int]], list[int], list[list[int]]]:
+    """Build Aho-Corasick goto/fail/output tables over each rule's literals."""
+    goto: list[dict[str, int]] = [{}]
+    outputs: list[list[int]] = [[]]
+    for rule_id, literals in enumerate(rule_literals):
+        for literal in literals:
+            state = 0
+            for char in literal:
+                if char not in goto[state]:
+                    goto.append({})
+                    outputs.append([])
+                    goto[state][char] = len(goto) - 1
+                state = goto[state][char]
+            outputs[state].append(rule_id)
+
+    fail = [0] * len(goto)
+    queue = deque(goto[0].values())
+    while queue:
+        state = queue.popleft()
+        for char, child in goto[state].items():
+            queue.append(child)
+            fallback = fail[state]
+            while fallback and char not in goto[fallback]:
+                fallback = fail[fallback]
+            fail[child] = goto[fallback].get(char, 0)
+            outputs[child] = sorted(set(outputs[child]) | set(outputs[fail[child]]))
+    return goto, fail, outputs
+
+
+def default_cache_dir() -> str:
+    """Return where compiled rule files are cached (clod's cache directory)."""
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+    return os.path.join(base, "clod", "rules")
+
+
+def _read_rules(path: str, data: bytes) -> list[Rule]:
+    if path.endswith(".json"):
+        document = json.loads(data)
+    else:
+        import tomllib
+
+        document = tomllib.loads(data.decode())
+    entries = document["rules"] if isinstance(document, dict) else document
+    return [Rule(**entry) for entry in entries]
+
+
+class RuleEngine:
+    """A set of rules checked together against each text."""
+
+    def __init__(self, rules: list[Rule], rule_literals: list[list[str]] | None = None,
+                 automaton: tuple | None = None) -> None:
+        self.rules = list(rules)
+        if rule_literals is None:
+            rule_literals = [_literals(rule) for rule in self.rules]
+        tables = automaton or _build_automaton(rule_literals)
+        self._goto, self._fail, self._outputs = tables
+        # Rules without a literal are candidates for every text
+        self._always = frozenset(
+            i for i, literals in enumerate(rule_literals) if not literals
+        )
+        self._combined = lru_cache(maxsize=256)(self._compile_combined)
+
+    @classmethod
+    def load(cls, path: str, cache_dir: str | None = None) -> RuleEngine:
+        """Load a rules file, reusing its compiled form from the cache if unchanged."""
+        path = os.fspath(path)
+        with open(path, "rb") as f:
+            data = f.read()
+        # The cache key only has to tell versions of one file apart
+        digest = f"{zlib.crc32(data):08x}{len(data):x}v{_CACHE_VERSION}"
+        cache_dir = os.fspath(cache_dir or default_cache_dir())
+        stem = os.path.splitext(os.path.basename(path))[0]
+        cache = os.path.join(cache_dir, f"{stem}-{digest}.marshal")
+
+        try:
+            with open(cache, "rb") as f:
+                rules, rule_literals, automaton = marshal.load(f)
+            return cls([Rule(*rule) for rule in rules], rule_literals, tuple(automaton))
+        except (OSError, ValueError, EOFError, TypeError):
+            pass
+
+        rules = _read_rules(path, data)
+        rule_literals = [_literals(rule) for rule in rules]
+        engine = cls(rules, rule_literals)
+        compiled = ([tuple(rule) for rule in engine.rules], rule_literals,
+                    (engine._goto, engine._fail, engine._outputs))
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            # Only this file's caches, not those of e.g. "{stem}-extra.toml"
+            stale = re.compile(rf"{re.escape(stem)}-[0-9a-f]+v\d+\.marshal")
+            for name in os.listdir(cache_dir):
+                if stale.fullmatch(name):
+                    os.unlink(os.path.join(cache_dir, name))
+            temporary = f"{cache}.{os.getpid()}.tmp"
+            with open(temporary, "wb") as f:
+                marshal.dump(compiled, f)
+            os.replace(temporary, cache)
+        except OSError:
+            pass
+        return engine
+
+    def _candidates(self, text: str) -> set[int]:
+        """Return ids of rules whose literals occur in text, plus always-check rules."""
+        goto, fail, outputs = self._goto, self._fail, self._outputs
+        found = set(self._always)
+        state = 0
+        for char in text.lower():
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if outputs[state]:
+                found.update(outputs[state])
+        return found
+
+    def _compile_combined(self, rule_ids: tuple[int, ...]) -> re.Pattern[str] | None:
+        try:
+            # [\s\S] rather than DOTALL, which would change what the rules'
+            # own "." match
+            return re.compile("".join(
+                f"(?:(?=[\\s\\S]*?(?P<_r{rule_id}>{self.rules[rule_id].regex})))?"
+                for rule_id in rule_ids
+            ))
+        except re.error:
+            # Rules reusing a group name can't share a regex
+            return None
+
+    def match(self, text: str, piped: bool = False) -> list[Rule]:
+        """Return the rules matching text, in file order.
+
+        piped says the text is a command reading a pipe, which rules with
+        piped = false don't apply to.
+        """
+        rule_ids = tuple(sorted(
+            rule_id for rule_id in self._candidates(text)
+            if not piped or self.rules[rule_id].piped
+        ))
+        if not rule_ids:
+            return []
+        combined = self._combined(rule_ids)
+        if combined is None:
+            return [self.rules[rule_id] for rule_id in rule_ids
+                    if re.search(self.rules[rule_id].regex, text)]
+        groups = combined.match(text).groupdict()
+        return [self.rules[rule_id] for rule_id in rule_ids
+                if groups[f"_r{rule_id}"] is not None]
@@ -0,0 +1,449 @@
+"""Synthetic Claude Desktop corpora, desktop parser benchmarks and hook profiling."""
+
+import json
+import os
+import random
+import resource
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from multiprocessing import get_context
+from pathlib import Path
+from typing import Any
+
+from .hooks import TOOL_EVENTS, matcher_matches, run_hook_command, sample_payload
+from .leveldb import (
+    LogWriter,
+    encode_write_batch,
+    internal_key,
+    write_manifest,
+    write_table,
+)
+
+ORIGIN = b"_https://claude.ai"
+
+_WORDS = [
+    "the", "a", "to", "of", "and", "in", "is", "it", "that", "for", "on", "with", "as",
+    "this", "be", "are", "can", "use", "how", "what", "python", "function", "class",
+    "error", "test", "file", "code", "data", "build", "run", "fix", "add", "remove",
+    "update", "config", "server", "client", "request", "response", "query", "index",
+    "cache", "parser", "leveldb", "tmux", "hook", "search", "message", "draft",
+    "conversation", "history", "export", "token", "please", "could", "you", "explain",
+    "why", "does", "should", "would", "refactor", "benchmark", "memory",
+]
+_UNICODE_WORDS = ["café", "naïve", "日本語", "テスト", "émoji", "Größe"]
+
+
+@dataclass
+class CorpusSpec:
+    """Shape of a synthetic Claude Desktop Local Storage database."""
+    conversations: int = 50
+    messages_per_conversation: int = 20
+    # Intermediate drafts saved while each message is typed
+    draft_churn: int = 5
+    words_per_message: int = 40
+    tables: int = 8
+    # Share of writes left in the active .log instead of SSTables
+    log_fraction: float = 0.1
+    compress: bool = True
+    unicode_ratio: float = 0.05
+    seed: int = 0
+
+
+@dataclass
+class CorpusInfo:
+    """Summary of a generated corpus."""
+    path: Path
+    files: int
+    total_bytes: int
+    writes: int
+    unique_drafts: int
+
+
+def _storage_key(name: str) -> bytes:
+    # Chromium stores keys as "_<origin>\x00" + encoding byte + key name
+    return ORIGIN + b"\x00\x01" + name.encode("latin-1")
+
+
+def _storage_value(text: str) -> bytes:
+    # Latin-1 when possible, otherwise UTF-16 (prefixed with \x00)
+    try:
+        return b"\x01" + text.encode("latin-1")
+    except UnicodeEncodeError:
+        return b"\x00" + text.encode("utf-16-le")
+
+
+def _draft_doc(text: str) -> str:
+    paragraphs = [
+        {"type": "paragraph", "content": [{"type": "text", "text": line}]}
+        for line in text.split("\n")
+    ]
+    return json.dumps({"type": "doc", "content": paragraphs}, separators=(",", ":"),
+                      ensure_ascii=False)
+
+
+def _generate_writes(spec: CorpusSpec) -> tuple[list[tuple[bytes, bytes]], int]:
+    """Produce the ordered list of Local Storage writes for a spec."""
+    rng = random.Random(spec.seed)
+    conversation_ids = [
+        f"{rng.getrandbits(32):08x}-{rng.getrandbits(16):04x}-"
+        f"{rng.getrandbits(16):04x}-{rng.getrandbits(16):04x}-"
+        f"{rng.getrandbits(48):012x}"
+        for _ in range(spec.conversations)
+    ]
+
+    # Interleave conversations the way a user hops between chats
+    turns = [
+        conv for conv in conversation_ids for _ in range(spec.messages_per_conversation)
+    ]
+    rng.shuffle(turns)
+
+    writes: list[tuple[bytes, bytes]] = [
+        (b"VERSION", b"1"),
+        (b"META:https://claude.ai", b"\x08\x01\x10\x80\x04"),
+    ]
+    unique_drafts = 0
+    for conv in turns:
+        words = []
+        for _ in range(max(1, spec.words_per_message + rng.randint(-10, 10))):
+            pool = _UNICODE_WORDS if rng.random() < spec.unicode_ratio else _WORDS
+            words.append(rng.choice(pool))
+        text = " ".join(words)
+
+        key = _storage_key(f"LSS-{conv}:textInput")
+        # Each saved draft is a longer prefix of the final message
+        for step in range(1, spec.draft_churn + 1):
+            prefix = text[: max(1, len(text) * step // (spec.draft_churn + 1))]
+            writes.append((key, _storage_value(_draft_doc(prefix))))
+        writes.append((key, _storage_value(_draft_doc(text))))
+        unique_drafts += spec.draft_churn + 1
+
+        if rng.random() < 0.2:
+            # Conversation metadata with embedded "text" fields
+            meta = json.dumps({"uuid": conv, "summary": {"text": text[:120]}},
+                              separators=(",", ":"), ensure_ascii=False)
+            writes.append((_storage_key(f"LSS-{conv}:meta"), _storage_value(meta)))
+
+    return writes, unique_drafts
+
+
+# Written into every generated corpus, so a later run knows it may replace it
+CORPUS_MARKER = ".clod-corpus"
+
+
+def _is_leveldb_file(path: Path) -> bool:
+    """Whether a file is one a LevelDB database (or generate_corpus) creates."""
+    return (path.suffix in (".ldb", ".log") or path.name.startswith("MANIFEST-")
+            or path.name in ("CURRENT", "LOCK"))
+
+
+def generate_corpus(directory: Path, spec: CorpusSpec,
+                    force: bool = False) -> CorpusInfo:
+    """Write a LevelDB database of synthetic Claude Desktop drafts.
+
+    Older writes go to level-0 SSTables and the newest to the active log.
+    A MANIFEST and CURRENT are written too, so real LevelDB can open it.
+    LevelDB files left from an earlier corpus are replaced; anything else
+    in the directory is left alone. A non-empty directory without the
+    CORPUS_MARKER of an earlier corpus may hold a real database, so it is
+    refused with FileExistsError unless force is set.
+    """
+    directory.mkdir(parents=True, exist_ok=True)
+    marker = directory / CORPUS_MARKER
+    if not force and not marker.exists() and any(directory.iterdir()):
+        raise FileExistsError(
+            f"{directory} is not empty and does not hold a generated corpus"
+        )
+    for stale in directory.iterdir():
+        if stale.is_file() and _is_leveldb_file(stale):
+            stale.unlink()
+
+    writes, unique_drafts = _generate_writes(spec)
+    log_count = int(len(writes) * spec.log_fraction)
+    table_writes = writes[: len(writes) - log_count]
+
+    tables = []
+    file_number = 4
+    per_table = max(1, -(-len(table_writes) // max(1, spec.tables)))
+    sequence = 1
+    for start in range(0, len(table_writes), per_table):
+        chunk = table_writes[start:start + per_table]
+        entries = []
+        for key, value in chunk:
+            entries.append((key, sequence, value))
+            sequence += 1
+        # Internal key order: user key ascending, then newest sequence first
+        entries.sort(key=lambda entry: (entry[0], -entry[1]))
+        encoded = [(internal_key(key, seq), value) for key, seq, value in entries]
+
+        file_number += 1
+        path = directory / f"{file_number:06d}.ldb"
+        size = write_table(path, encoded, compress=spec.compress)
+        tables.append((file_number, size, encoded[0][0], encoded[-1][0]))
+
+    file_number += 1
+    log_number = file_number
+    with LogWriter(directory / f"{log_number:06d}.log") as writer:
+        for key, value in writes[len(writes) - log_count:]:
+            writer.add_record(encode_write_batch(sequence, [(key, value)]))
+            sequence += 1
+
+    write_manifest(directory, 1, log_number, sequence - 1, tables)
+    marker.touch()
+
+    files = [path for path in directory.iterdir() if path.suffix in (".ldb", ".log")]
+    return CorpusInfo(
+        path=directory,
+        files=len(files),
+        total_bytes=sum(path.stat().st_size for path in files),
+        writes=len(writes),
+        unique_drafts=unique_drafts,
+    )
+
+
+@dataclass
+class PhaseResult:
+    """Timing and memory for one benchmark phase."""
+    name: str
+    seconds: float
+    messages: int
+    peak_rss: int
+    extra: dict[str, float] = field(default_factory=dict)
+
+
+@dataclass
+class SearchTiming:
+    """Latency distribution for one search query."""
+    query: str
+    hits: int
+    p50: float
+    p95: float
+
+
+@dataclass
+class BenchReport:
+    """Results of a desktop parser benchmark run."""
+    source: Path
+    files: int
+    total_bytes: int
+    phases: list[PhaseResult]
+    searches: list[SearchTiming]
+
+
+def _peak_rss() -> int:
+    """Peak resident set size of this process, in bytes."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return int(peak if sys.platform == "darwin" else peak * 1024)
+
+
+def _run_phase(
+    name: str, leveldb_dir: Path, cache_dir: Path, jobs: int,
+    queries: list[str], repeat: int,
+) -> tuple[PhaseResult, list[SearchTiming]]:
+    """Run one phase in a fresh process so peak RSS is attributable to it."""
+    from .desktop import ClaudeDesktopParser
+
+    parser = ClaudeDesktopParser(
+        use_cache=name != "cold scan",
+        jobs=jobs,
+        leveldb_dir=leveldb_dir,
+        cache_dir=cache_dir,
+    )
+
+    start = time.perf_counter()
+    if name == "search":
+        messages = len(parser.load_search_index())
+    else:
+        messages = len(parser.get_store())
+    elapsed = time.perf_counter() - start
+
+    searches = []
+    for query in queries:
+        latencies = []
+        hits = 0
+        for _ in range(repeat):
+            query_start = time.perf_counter()
+            hits = parser.search(query, limit=20).total
+            latencies.append(time.perf_counter() - query_start)
+        latencies.sort()
+        searches.append(SearchTiming(
+            query=query,
+            hits=hits,
+            p50=statistics.median(latencies),
+            p95=latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))],
+        ))
+
+    return PhaseResult(name, elapsed, messages, _peak_rss()), searches
+
+
+def run_desktop_bench(leveldb_dir: Path, cache_dir: Path, jobs: int = 1,
+                      runs: int = 3, queries: list[str] | None = None,
+                      repeat: int = 20) -> BenchReport:
+    """Benchmark cold scans, warm (cached) scans and search on a corpus."""
+    files = [
+        path for path in leveldb_dir.iterdir() if path.suffix in (".ldb", ".log")
+    ]
+    total_bytes = sum(path.stat().st_size for path in files)
+    if queries is None:
+        queries = ["python", "cache error", '"the code"']
+
+    plan = [("cold scan", runs), ("cache fill", 1), ("warm scan", runs), ("search", 1)]
+    phases: list[PhaseResult] = []
+    searches: list[SearchTiming] = []
+    context = get_context("spawn")
+
+    for name, count in plan:
+        results = []
+        for _ in range(count):
+            with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+                phase, phase_searches = executor.submit(
+                    _run_phase, name, leveldb_dir, cache_dir, jobs,
+                    queries if name == "search" else [], repeat,
+                ).result()
+            results.append(phase)
+            searches.extend(phase_searches)
+
+        median = statistics.median(result.seconds for result in results)
+        phase = PhaseResult(
+            name=name,
+            seconds=median,
+            messages=results[0].messages,
+            peak_rss=max(result.peak_rss for result in results),
+        )
+        if median > 0:
+            phase.extra["mb_per_s"] = total_bytes / 1e6 / median
+            phase.extra["messages_per_s"] = phase.messages / median
+        phases.append(phase)
+
+    return BenchReport(leveldb_dir, len(files), total_bytes, phases, searches)
+
+
+def _percentile(sorted_values: list[float], fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = min(len(sorted_values) - 1, int(len(sorted_values) * fraction))
+    return sorted_values[rank]
+
+
+@dataclass
+class HookTiming:
+    """Latency and resource use of one configured hook."""
+    event: str
+    matcher: str
+    command: str
+    # Tool the sample payload was for (tool events only)
+    tool: str | None
+    cold: list[float]
+    warm: list[float]
+    cpu: list[float]
+    peak_rss: int
+    # Peak RSS reported for a trivial command: a forked child is charged
+    # for its parent's memory until exec, so lower peaks mean nothing
+    spawn_rss: int = 0
+    exit_codes: dict[str, int] = field(default_factory=dict)
+
+    def percentiles(self, warm: bool = True) -> tuple[float, float, float]:
+        """p50, p95 and p99 wall time in seconds."""
+        values = sorted(self.warm if warm else self.cold)
+        return (_percentile(values, 0.5), _percentile(values, 0.95),
+                _percentile(values, 0.99))
+
+
+@dataclass
+class EventLatency:
+    """What the hooks for one event (and tool) add to each call."""
+    event: str
+    tool: str | None
+    hooks: int
+    # Claude Code runs matching hooks in parallel, so the slowest one counts
+    wall_p50: float
+    cpu: float
+
+
+def _payload_tool(matcher: str) -> str | None:
+    """The tool a matcher names, for building its sample payload."""
+    for name in matcher.split("|"):
+        if name.isidentifier():
+            return name
+    return None
+
+
+def bench_hook(hook: dict[str, Any], tool: str | None = None, runs: int = 20,
+               cold_runs: int = 5, timeout: float = 60.0,
+               payload: str | None = None) -> HookTiming:
+    """Time a hook's command on a sample payload.
+
+    Cold runs each get an empty XDG cache directory, so hooks that cache
+    work there (like the validator rule engine) start from nothing. Warm
+    runs follow one untimed run and use the normal environment.
+    """
+    if hook["event"] in TOOL_EVENTS:
+        tool = tool or _payload_tool(hook["matcher"]) or "Bash"
+    else:
+        tool = None
+    if payload is None:
+        payload = json.dumps(sample_payload(hook["event"], tool))
+    timing = HookTiming(hook["event"], hook["matcher"], hook["command"], tool,
+                        [], [], [], 0)
+    timing.spawn_rss = run_hook_command("true", "").peak_rss
+
+    def record(run_env: dict[str, str] | None, samples: list[float] | None) -> None:
+        run = run_hook_command(hook["command"], payload, timeout, run_env)
+        code = "timeout" if run.timed_out else str(run.returncode)
+        timing.exit_codes[code] = timing.exit_codes.get(code, 0) + 1
+        timing.peak_rss = max(timing.peak_rss, run.peak_rss)
+        if samples is not None:
+            samples.append(run.wall)
+            if samples is timing.warm:
+                timing.cpu.append(run.cpu)
+
+    for _ in range(cold_runs):
+        with tempfile.TemporaryDirectory(prefix="clod-hook-bench-") as tmp:
+            record({**os.environ, "XDG_CACHE_HOME": tmp}, timing.cold)
+    record(None, None)
+    for _ in range(runs):
+        record(None, timing.warm)
+    return timing
+
+
+def event_latencies(
+    timings: list[HookTiming], tool: str | None = None
+) -> list[EventLatency]:
+    """Combine hook timings into the latency each event adds per call.
+
+    For tool events without a tool given, every tool named by a matcher
+    is reported separately, since each selects a different set of hooks.
+    """
+    latencies = []
+    for event in dict.fromkeys(timing.event for timing in timings):
+        event_timings = [timing for timing in timings if timing.event == event]
+        if event not in TOOL_EVENTS:
+            tools: list[str | None] = [None]
+        elif tool is not None:
+            tools = [tool]
+        else:
+            names = (_payload_tool(timing.matcher) for timing in event_timings)
+            tools = sorted({name for name in names if name is not None}) or ["Bash"]
+
+        for event_tool in tools:
+            selected = [
+                timing for timing in event_timings
+                if event_tool is None or matcher_matches(timing.matcher, event_tool)
+            ]
+            if not selected:
+                continue
+            latencies.append(EventLatency(
+                event=event,
+                tool=event_tool,
+                hooks=len(selected),
+                wall_p50=max(timing.percentiles()[0] for timing in selected),
+                cpu=sum(
+                    statistics.fmean(timing.cpu) for timing in selected if timing.cpu
+                ),
+            ))
+    return latencies
@@ -1,7 +1,8 @@
 """CLI interface for clod utilities."""
 
+from collections.abc import Callable, Sequence
 from pathlib import Path
-from typing import Optional, Tuple
+from typing import TYPE_CHECKING, Optional, Tuple
 
 import click
 
@@ -10,6 +11,11 @@ from .hooks import HookManager
 from .sfx import SoundEffectsManager, run_tui
 from .tmux import TmuxController
 
+if TYPE_CHECKING:
+    from datetime import datetime
+
+    from .bench import CorpusSpec
+
 
 @click.group()
 @click.version_option()
@@ -80,6 +86,12 @@ def desktop() -> None:
     pass
 
 
+@main.group()
+def bench() -> None:
+    """Benchmarks for clod internals."""
+    pass
+
+
 @main.group()
 def sfx() -> None:
     """Sound effects management commands."""
@@ -100,22 +112,40 @@ def setup(session: str, working_dir: Optional[Path]) -> None:
     controller.setup(working_dir)
 
 
+def _input_text(text: str) -> str:
+    """Return the text argument, or stdin (minus one trailing newline) for '-'."""
+    import sys
+
+    if text != "-":
+        return text
+    data = sys.stdin.read()
+    return data[:-1] if data.endswith("\n") else data
+
+
 @tmux.command()
 @click.argument("command")
+@click.option(
+    "--paste/--no-paste", default=None,
+    help="Deliver via a paste buffer (default: only for long input)",
+)
 @click.option("--session", "-s", default="claude-workspace", help="Session name")
-def send(command: str, session: str) -> None:
-    """Send command to Claude pane."""
+def send(command: str, paste: bool | None, session: str) -> None:
+    """Send command to Claude pane ('-' reads it from stdin)."""
     controller = TmuxController(session)
-    controller.send_keys(command)
+    controller.send_keys(_input_text(command), paste)
 
 
 @tmux.command()
 @click.option("--lines", "-n", default=20, help="Number of lines to read")
+@click.option(
+    "--since-last", is_flag=True,
+    help="Only lines added since the previous --since-last read",
+)
 @click.option("--session", "-s", default="claude-workspace", help="Session name")
-def read(lines: int, session: str) -> None:
+def read(lines: int, since_last: bool, session: str) -> None:
     """Read output from Claude pane."""
     controller = TmuxController(session)
-    output = controller.read_output(lines)
+    output = controller.read_output(lines, since_last)
     if output:
         click.echo(output)
 
@@ -131,6 +161,13 @@ def status(session: str) -> None:
         click.echo(f"✓ Claude session '{status_info['session_name']}' is running")
         click.echo(f"  Panes: {status_info['panes']}")
         click.echo(f"  Windows: {status_info['windows']}")
+        for pane in status_info["pane_details"]:
+            focused = pane["pane_active"] and pane["window_active"]
+            active = " (active)" if focused else ""
+            click.echo(
+                f"    {pane['pane_id']} {pane['window_name']}.{pane['pane_index']}: "
+                f"{pane['pane_current_command']} (pid {pane['pane_pid']}){active}"
+            )
     else:
         click.echo("✗ Claude session not found")
 
@@ -161,16 +198,24 @@ def start_repl(command: str, session: str, working_dir: Optional[Path]) -> None:
 
 @tmux.command()
 @click.argument("text")
+@click.option(
+    "--paste/--no-paste", default=None,
+    help="Deliver via a paste buffer (default: only for long input)",
+)
 @click.option("--session", "-s", default="claude-repl", help="Session name")
-def send_input(text: str, session: str) -> None:
-    """Send text input without pressing Enter."""
+def send_input(text: str, paste: bool | None, session: str) -> None:
+    """Send text input without pressing Enter ('-' reads it from stdin)."""
     controller = TmuxController(session)
-    if controller.send_input(text):
+    text = _input_text(text)
+    if controller.send_input(text, paste):
         click.echo(f"Sent input: {text}")
 
 
 @tmux.command()
-@click.option("--mode", "-m", default="standard", type=click.Choice(["standard", "vim"]), help="Submission mode")
+@click.option(
+    "--mode", "-m", default="standard", type=click.Choice(["standard", "vim"]),
+    help="Submission mode",
+)
 @click.option("--session", "-s", default="claude-repl", help="Session name")
 def submit(mode: str, session: str) -> None:
     """Submit current input with different submission modes."""
@@ -179,14 +224,57 @@ def submit(mode: str, session: str) -> None:
         click.echo(f"Submitted using {mode} mode")
 
 
+@tmux.command()
+@click.argument("pattern", required=False)
+@click.option(
+    "--idle", "-i", "idle_ms", type=int,
+    help="Return once the pane is quiet for this many ms",
+)
+@click.option("--timeout", "-t", default=30.0, help="Give up after this many seconds")
+@click.option(
+    "--send", "-S", help="Command to send (with Enter) once watching has started"
+)
+@click.option(
+    "--output", "-o", "show_output", is_flag=True,
+    help="Print the output seen while waiting",
+)
+@click.option("--session", "-s", default="claude-repl", help="Session name")
+def wait_for(pattern: str | None, idle_ms: int | None, timeout: float,
+             send: str | None, show_output: bool, session: str) -> None:
+    """Wait until pane output matches PATTERN (a regex), goes idle, or times out.
+
+    Exits with status 1 on timeout.
+    """
+    import sys
+
+    controller = TmuxController(session)
+    result = controller.wait_for(pattern, idle_ms, timeout, send)
+    if result is None:
+        sys.exit(1)
+
+    if show_output and result.output:
+        click.echo(result.output, nl=not result.output.endswith("\n"))
+    if result.reason == "match":
+        click.echo(f"✓ Matched {result.match!r} after {result.elapsed:.2f}s", err=True)
+    elif result.reason == "idle":
+        click.echo(f"✓ Pane idle after {result.elapsed:.2f}s", err=True)
+    else:
+        click.echo(f"✗ Timed out after {result.elapsed:.2f}s", err=True)
+        sys.exit(1)
+
+
 @tmux.command()
 @click.option("--lines", "-n", default=20, help="Number of lines to show")
 @click.option("--history", "-H", default=0, help="Number of history lines to include")
+@click.option(
+    "--since-last", is_flag=True,
+    help="Only lines added since the previous --since-last read",
+)
 @click.option("--session", "-s", default="claude-repl", help="Session name")
-def view_output(lines: int, history: int, session: str) -> None:
+def view_output(lines: int, history: int, since_last: bool, session: str) -> None:
     """View current REPL output."""
     controller = TmuxController(session)
-    output = controller.read_output_with_history(lines, history)
+    output = controller.read_output_with_history(lines, history, since_last)
     if output:
         click.echo(output)
 
@@ -209,6 +297,178 @@ def stop_repl(session: str) -> None:
     controller.kill_session()
 
 
+def _fan_out(sessions: tuple[str, ...], prefix: str | None, send: str | None,
+             enter: bool, pattern: str | None, idle_ms: int | None, timeout: float,
+             lines: int) -> None:
+    """Run input/output across sessions concurrently and report each one."""
+    import asyncio
+    import sys
+
+    from .tmux_async import AsyncTmuxController, SessionResult
+
+    async def run() -> Sequence[SessionResult]:
+        async with AsyncTmuxController() as controller:
+            targets = [*sessions]
+            if prefix is not None or not targets:
+                matching = await controller.list_sessions(prefix or "claude-repl")
+                targets += [name for name in matching if name not in targets]
+            return await controller.broadcast(targets, send, enter, pattern, idle_ms,
+                                              timeout, lines)
+
+    results = asyncio.run(run())
+    if not results:
+        click.echo("✗ No matching sessions")
+        sys.exit(1)
+
+    for result in results:
+        status = "✓" if result.ok else "✗"
+        detail = f" {result.match!r}" if result.match else ""
+        elapsed = f"{result.elapsed:.2f}s"
+        click.echo(f"{status} {result.session}: {result.reason}{detail} ({elapsed})")
+        if result.output:
+            click.echo(result.output.rstrip("\n"))
+    if not all(result.ok for result in results):
+        sys.exit(1)
+
+
+@tmux.command()
+@click.argument("text")
+@click.option(
+    "--session", "-s", "sessions", multiple=True,
+    help="Session to send to (repeatable)",
+)
+@click.option(
+    "--prefix", "-p",
+    help="Target every session whose name starts with this (default: claude-repl)",
+)
+@click.option("--no-enter", is_flag=True, help="Don't press Enter after the text")
+@click.option("--wait", "-w", "pattern", help="Wait for output matching this regex")
+@click.option(
+    "--idle", "-i", "idle_ms", type=int,
+    help="Wait until each pane is quiet for this many ms",
+)
+@click.option("--timeout", "-t", default=30.0, help="Per-session timeout in seconds")
+def broadcast(text: str, sessions: tuple[str, ...], prefix: str | None, no_enter: bool,
+              pattern: str | None, idle_ms: int | None, timeout: float) -> None:
+    """Send TEXT to many sessions at once, optionally waiting for their output."""
+    _fan_out(sessions, prefix, text, not no_enter, pattern, idle_ms, timeout, lines=20)
+
+
+@tmux.command()
+@click.option(
+    "--session", "-s", "sessions", multiple=True, help="Session to read (repeatable)"
+)
+@click.option(
+    "--prefix", "-p",
+    help="Read every session whose name starts with this (default: claude-repl)",
+)
+@click.option("--wait", "-w", "pattern", help="Wait for new output matching this regex")
+@click.option(
+    "--idle", "-i", "idle_ms", type=int,
+    help="Wait until each pane is quiet for this many ms",
+)
+@click.option("--timeout", "-t", default=30.0, help="Per-session timeout in seconds")
+@click.option("--lines", "-n", default=20, help="Lines to capture when not waiting")
+def gather(sessions: tuple[str, ...], prefix: str | None, pattern: str | None,
+           idle_ms: int | None, timeout: float, lines: int) -> None:
+    """Collect output from many sessions concurrently."""
+    _fan_out(sessions, prefix, None, True, pattern, idle_ms, timeout, lines)
+
+
+@tmux.command()
+@click.option(
+    "--dir", "-d", "directory", type=click.Path(file_okay=False, path_type=Path),
+    help="Transcript directory (default: ~/.cache/clod/transcripts)",
+)
+@click.option(
+    "--segment-size", "-S", default=16, help="Rotate segments after this many MiB"
+)
+@click.option("--compress", "-c", type=click.Choice(["gzip", "zstd"]), default="gzip",
+              help="Segment compression (zstd needs Python 3.14+)")
+@click.option("--keep", "-k", default=0, help="Segments to keep per pane (0 keeps all)")
+@click.option("--stop", is_flag=True, help="Stop recording instead")
+@click.option("--session", "-s", default="claude-workspace", help="Session name")
+def record(directory: Path | None, segment_size: int, compress: str, keep: int,
+           stop: bool, session: str) -> None:
+    """Record the session's panes into rotating compressed transcripts.
+
+    Recording runs inside tmux and lasts until --stop or the pane closes.
+    Panes created afterwards need another record.
+    """
+    import sys
+
+    from .transcript import default_transcript_dir
+
+    controller = TmuxController(session)
+    if stop:
+        pane_ids = controller.stop_recording()
+        if not pane_ids:
+            click.echo(f"✗ No panes to stop in session '{session}'")
+            sys.exit(1)
+        click.echo(f"✓ Stopped recording {len(pane_ids)} pane(s)")
+        return
+
+    root = directory or default_transcript_dir()
+    segment_bytes = segment_size * 1024 * 1024
+    pane_ids = controller.start_recording(root, segment_bytes, compress, keep)
+    if not pane_ids:
+        click.echo(f"✗ No panes to record in session '{session}'")
+        sys.exit(1)
+    click.echo(f"✓ Recording {len(pane_ids)} pane(s) to {root / session}")
+
+
+@tmux.command("record-pane", hidden=True)
+@click.argument("directory", type=click.Path(file_okay=False, path_type=Path))
+@click.option("--segment-bytes", type=int, required=True)
+@click.option("--compress", type=click.Choice(["gzip", "zstd"]), default="gzip")
+@click.option("--keep", type=int, default=0)
+def record_pane(directory: Path, segment_bytes: int, compress: str, keep: int) -> None:
+    """Write stdin into a transcript directory (run by pipe-pane)."""
+    import signal
+    import sys
+
+    from .transcript import TranscriptWriter, tap_directory
+    from .transcript import record as record_stream
+
+    # Close the segment cleanly when tmux or the user terminates us
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    signal.signal(signal.SIGHUP, lambda signum, frame: sys.exit(0))
+    with TranscriptWriter(directory, segment_bytes, compress, keep) as writer:
+        record_stream(sys.stdin.fileno(), writer, tap_directory(directory))
+
+
+@tmux.command("grep")
+@click.argument("pattern")
+@click.option(
+    "--dir", "-d", "directory", type=click.Path(file_okay=False, path_type=Path),
+    help="Transcript directory (default: ~/.cache/clod/transcripts)",
+)
+@click.option("--session", "-s", help="Only search this session's transcripts")
+@click.option("--pane", "-p", help="Only search this pane (e.g. %3)")
+@click.option("--ignore-case", "-i", is_flag=True, help="Case-insensitive match")
+@click.option(
+    "--since", type=click.DateTime(), help="Skip segments that ended before this time"
+)
+@click.option("--max-count", "-m", type=int, help="Stop after this many matches")
+def grep_transcripts(pattern: str, directory: Path | None, session: str | None,
+                     pane: str | None, ignore_case: bool, since: "datetime | None",
+                     max_count: int | None) -> None:
+    """Search recorded pane transcripts for PATTERN (a regex)."""
+    import sys
+    from itertools import islice
+
+    from .transcript import default_transcript_dir, search_transcripts
+
+    matches = search_transcripts(directory or default_transcript_dir(), pattern,
+                                 ignore_case, session, pane, since)
+    found = False
+    for match in islice(matches, max_count):
+        found = True
+        click.echo(f"{match.pane}:{match.line}: {match.text}")
+    if not found:
+        sys.exit(1)
+
+
 # Hook management commands
 @hooks.command()
 def list() -> None:
@@ -268,13 +528,192 @@ def remove(identifier: str) -> None:
 
 
 @hooks.command()
-@click.argument("identifier")
-@click.option("--input", "-i", help="Test input data (JSON)")
+@click.argument("identifier", required=False)
+@click.option(
+    "--event", "-e",
+    help="Run every hook for this event concurrently (e.g. PreToolUse)",
+)
+@click.option(
+    "--tool", "-t",
+    help="Tool name for --event (default: the input's tool_name, or Bash)",
+)
+@click.option(
+    "--input", "-i", help="Test input data (JSON; default: a sample for --event)"
+)
+@click.option(
+    "--timeout", type=float,
+    help="Per-hook timeout in seconds for --event (default: each hook's own)",
+)
 @click.option("--dry-run", "-d", is_flag=True, help="Show what would happen")
-def run(identifier: str, input: Optional[str], dry_run: bool) -> None:
-    """Run/test a hook."""
+def run(identifier: str | None, event: str | None, tool: str | None,
+        input: str | None, timeout: float | None, dry_run: bool) -> None:
+    """Run/test a hook by IDENTIFIER, or the whole pipeline for an --event.
+
+    With --event, the matching hooks run in parallel with their timeouts,
+    and their verdicts are combined the way Claude Code does: any block
+    (exit 2 or a "block" decision) wins over approvals. Exits with 2 when
+    the event is blocked or stopped.
+    """
+    import sys
+
+    from .hooks import event_tool
+
     manager = HookManager()
-    manager.run_hook(identifier, input, dry_run)
+    if event is None:
+        if identifier is None:
+            click.echo("✗ Give a hook IDENTIFIER or --event", err=True)
+            sys.exit(1)
+        manager.run_hook(identifier, input, dry_run)
+        return
+    if identifier is not None:
+        click.echo("✗ IDENTIFIER and --event can't be combined", err=True)
+        sys.exit(1)
+
+    try:
+        if dry_run:
+            for hook in manager.matching_hooks(event, event_tool(event, tool, input)):
+                click.echo(f"Would run: {hook['command']}")
+            return
+        result = manager.run_event(event, tool, input, timeout)
+    except ValueError as e:
+        click.echo(f"✗ Error: {e}", err=True)
+        sys.exit(1)
+    label = f"{result.event} {result.tool}" if result.tool else result.event
+    if not result.outcomes:
+        click.echo(f"No hooks for {label}")
+        return
+    click.echo(f"{label}: {len(result.outcomes)} hook(s) in parallel")
+    for outcome in result.outcomes:
+        code = "timeout" if outcome.run.timed_out else f"exit {outcome.run.returncode}"
+        mark = "✓" if outcome.verdict in ("success", "approve") else "✗"
+        wall = f"{outcome.run.wall * 1000:8.1f} ms"
+        command = outcome.hook["command"]
+        click.echo(f"  {mark} {outcome.verdict:<7} {wall}  {code:<7}  {command}")
+        if outcome.reason:
+            click.echo(f"      {outcome.reason}")
+    click.echo(f"Decision: {result.verdict}")
+    click.echo(f"Wall clock: {result.wall * 1000:.1f} ms")
+    if result.verdict in ("block", "stop"):
+        sys.exit(2)
+
+
+@hooks.command("bench")
+@click.argument("identifiers", nargs=-1)
+@click.option(
+    "--event", "-e", help="Benchmark every hook for this event (e.g. PreToolUse)"
+)
+@click.option("--tool", "-t", help="Only hooks whose matcher selects this tool")
+@click.option("--runs", "-n", default=20, help="Warm runs per hook")
+@click.option(
+    "--cold", "-c", "cold_runs", default=5, help="Cold runs per hook (empty XDG cache)"
+)
+@click.option(
+    "--input", "-i", "payload", help="Hook input JSON (default: a sample for the event)"
+)
+@click.option("--timeout", default=60.0, help="Kill a run after this many seconds")
+def bench_hooks(identifiers: tuple[str, ...], event: str | None, tool: str | None,
+                runs: int, cold_runs: int, payload: str | None, timeout: float) -> None:
+    """Profile hook latency: IDENTIFIERS (indices from 'hooks list'), or all hooks.
+
+    Reports cold and warm wall time percentiles, CPU time and peak RSS per
+    hook, then the latency the hooks add to each call of an event.
+    """
+    import sys
+
+    from .bench import bench_hook, event_latencies
+
+    manager = HookManager()
+    all_hooks = manager.list_hooks()
+    if identifiers:
+        try:
+            selected = [all_hooks[int(identifier)] for identifier in identifiers]
+        except (ValueError, IndexError):
+            invalid = " ".join(identifiers)
+            click.echo(f"✗ Invalid hook identifier in: {invalid}", err=True)
+            sys.exit(1)
+    elif event:
+        selected = manager.matching_hooks(event, tool)
+    else:
+        selected = [
+            hook for hook in all_hooks
+            if hook["enabled"] and hook["type"] == "command"
+        ]
+    if not selected:
+        click.echo("✗ No matching hooks")
+        sys.exit(1)
+
+    timings = []
+    for hook in selected:
+        click.echo(f"{hook['event']:<18} {hook['matcher']:<15} {hook['command']}")
+        timing = bench_hook(hook, tool, runs, cold_runs, timeout, payload)
+        timings.append(timing)
+        cold = " / ".join(
+            f"{value * 1000:.1f}" for value in timing.percentiles(warm=False)
+        )
+        warm = " / ".join(f"{value * 1000:.1f}" for value in timing.percentiles())
+        cpu = sum(timing.cpu) / len(timing.cpu) * 1000 if timing.cpu else 0.0
+        exits = ", ".join(
+            f"{code} ({count})" for code, count in timing.exit_codes.items()
+        )
+        click.echo(f"  cold p50/p95/p99 {cold} ms   warm {warm} ms")
+        if timing.peak_rss > timing.spawn_rss * 1.05:
+            peak = f"{timing.peak_rss / 1e6:.1f} MB"
+        else:
+            peak = f"≤ {timing.spawn_rss / 1e6:.1f} MB (spawn floor)"
+        click.echo(f"  CPU {cpu:.1f} ms   peak RSS {peak}   exits {exits}")
+
+    click.echo("\nAdded latency per call (hooks for a call run in parallel):")
+    for latency in event_latencies(timings, tool):
+        label = f"{latency.event} {latency.tool}" if latency.tool else latency.event
+        click.echo(
+            f"  {label:<24} {latency.hooks} hook(s)"
+            f"  p50 {latency.wall_p50 * 1000:7.1f} ms"
+            f"  CPU {latency.cpu * 1000:7.1f} ms"
+        )
+
+
+@hooks.command()
+@click.argument("preload", nargs=-1)
+@click.option(
+    "--socket", "-S", "socket_path", type=click.Path(dir_okay=False, path_type=Path),
+    help="Socket path (default: $XDG_RUNTIME_DIR/clod-hooks.sock)",
+)
+@click.option(
+    "--hooks-dir", type=click.Path(exists=True, file_okay=False, path_type=Path),
+    help="Directory of hook scripts (default: ~/.claude/hooks)",
+)
+def serve(preload: tuple[str, ...], socket_path: Path | None,
+          hooks_dir: Path | None) -> None:
+    """Keep hook scripts loaded and serve hook_client.py calls.
+
+    PRELOAD names hook scripts to import up front; others load on first use.
+    """
+    import contextlib
+    import signal
+    import sys
+
+    from .hook_server import HookRunner, HookServer, default_socket_path
+
+    runner = HookRunner(hooks_dir)
+    for name in preload:
+        try:
+            runner.load(name)
+        except (OSError, ImportError, SyntaxError, ValueError) as e:
+            click.echo(f"✗ Cannot load {name}: {e}", err=True)
+            sys.exit(1)
+
+    path = socket_path or default_socket_path()
+    try:
+        server = HookServer(path, runner)
+    except (OSError, RuntimeError) as e:
+        click.echo(f"✗ {e}", err=True)
+        sys.exit(1)
+
+    # Remove the socket on termination as well as on Ctrl-C
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    click.echo(f"✓ Serving hooks from {runner.hooks_dir} on {path}")
+    with server, contextlib.suppress(KeyboardInterrupt):
+        server.serve_forever()
 
 
 @hooks.command()
@@ -309,18 +748,34 @@ def edit(identifier: str) -> None:
 
 
 # Desktop chat history commands
+def _parse_options(func: Callable[..., None]) -> Callable[..., None]:
+    """Options shared by commands that parse the desktop history."""
+    options = [
+        click.option("--jobs", "-j", default=1,
+                     help="Worker processes for parsing (0 = one per CPU)"),
+        click.option(
+            "--collapse",
+            type=click.Choice(["longest", "latest"]),
+            help="Collapse near-duplicate drafts, keeping the longest or latest",
+        ),
+    ]
+    for option in reversed(options):
+        func = option(func)
+    return func
+
+
 @desktop.command("list")
 @click.option("--limit", "-n", default=20, help="Number of messages to show")
 @click.option("--conversation", "-c", help="Filter by conversation ID")
-def list_desktop(limit: int, conversation: Optional[str]) -> None:
+@_parse_options
+def list_desktop(limit: int, conversation: str | None, jobs: int,
+                 collapse: str | None) -> None:
     """List recent chat messages."""
-    parser = ClaudeDesktopParser()
+    parser = ClaudeDesktopParser(jobs=jobs, collapse=collapse)
 
     if conversation:
-        conversations = parser.get_conversations()
-        if conversation in conversations:
-            messages = conversations[conversation].messages
-        else:
+        messages = parser.get_store().messages_for(conversation)
+        if not messages:
             click.echo(f"Conversation '{conversation}' not found.")
             return
     else:
@@ -340,75 +795,307 @@ def list_desktop(limit: int, conversation: Optional[str]) -> None:
 @click.argument("query")
 @click.option("--case-sensitive", "-c", is_flag=True, help="Case sensitive search")
 @click.option("--limit", "-n", default=50, help="Maximum results to show")
-def search(query: str, case_sensitive: bool, limit: int) -> None:
-    """Search chat messages for text."""
-    parser = ClaudeDesktopParser()
-    results = parser.search_messages(query, case_sensitive)
+@click.option("--fuzzy", "-f", is_flag=True,
+              help="Tolerate typos and rank by closeness")
+@_parse_options
+def search(query: str, case_sensitive: bool, limit: int, fuzzy: bool, jobs: int,
+           collapse: str | None) -> None:
+    """Search chat messages for text.
 
-    if not results:
+    Words are AND-ed, OR separates alternatives and "quoted text" is
+    matched as a phrase. With --fuzzy, words match within a few typos.
+    """
+    import re
+
+    from .search import parse_query
+
+    parser = ClaudeDesktopParser(jobs=jobs, collapse=collapse)
+    results = parser.search(query, case_sensitive, limit, fuzzy=fuzzy)
+
+    if not results.messages:
         click.echo(f"No messages found containing '{query}'.")
         return
 
-    # Limit results
-    if len(results) > limit:
-        results = results[:limit]
-        click.echo(f"Showing first {limit} of {len(parser.search_messages(query, case_sensitive))} results:")
+    if results.total > limit:
+        click.echo(f"Showing first {limit} of {results.total} results:")
 
-    for i, msg in enumerate(results, 1):
+    # Highlight every search term, longest first so phrases win over words
+    if fuzzy:
+        words = "|".join(re.escape(token) for token in results.matched_tokens)
+        pattern = re.compile(rf"\b(?:{words})\b", re.IGNORECASE)
+    else:
+        terms = sorted({term for group in parse_query(query) for term in group},
+                       key=len, reverse=True)
+        flags = 0 if case_sensitive else re.IGNORECASE
+        pattern = re.compile("|".join(re.escape(term) for term in terms), flags)
+
+    for i, msg in enumerate(results.messages, 1):
         status = "📝" if msg.is_draft else "💬"
         conv_short = msg.conversation_id[:8] if msg.conversation_id != "unknown" else "unknown"
-
-        # Highlight the search term
-        text = msg.text
-        if not case_sensitive:
-            # Simple highlighting for case-insensitive search
-            import re
-            pattern = re.compile(re.escape(query), re.IGNORECASE)
-            text = pattern.sub(lambda m: f"**{m.group()}**", text)
-        else:
-            text = text.replace(query, f"**{query}**")
-
+        text = pattern.sub(lambda m: f"**{m.group()}**", msg.text)
         click.echo(f"{i:2d}. {status} [{conv_short}] {text}")
 
 
 @desktop.command()
-def conversations() -> None:
+@_parse_options
+def conversations(jobs: int, collapse: str | None) -> None:
     """List all conversation IDs."""
-    parser = ClaudeDesktopParser()
-    convs = parser.get_conversations()
+    parser = ClaudeDesktopParser(jobs=jobs, collapse=collapse)
+    counts = parser.get_store().conversation_counts()
 
-    if not convs:
+    if not counts:
         click.echo("No conversations found.")
         return
 
-    click.echo(f"Found {len(convs)} conversations:")
-    for conv_id, conv in convs.items():
-        msg_count = len(conv.messages)
+    click.echo(f"Found {len(counts)} conversations:")
+    for conv_id, msg_count in counts.items():
         click.echo(f"  {conv_id}: {msg_count} messages")
 
 
 @desktop.command()
-@click.option("--format", "-f", type=click.Choice(["text", "json"]), default="text", help="Output format")
-def export(format: str) -> None:
-    """Export all chat messages."""
+@click.option(
+    "--format",
+    "-f",
+    type=click.Choice(["text", "json", "ndjson"]),
+    default="text",
+    help="Output format",
+)
+@click.option(
+    "--output",
+    "-o",
+    type=click.Path(dir_okay=False, path_type=Path),
+    help="Write to a file instead of stdout",
+)
+@click.option("--gzip", "-z", "compress", is_flag=True, help="Gzip-compress the output")
+@click.option("--stats", is_flag=True, help="Report draft extraction counts on stderr")
+@_parse_options
+def export(format: str, output: Path | None, compress: bool, jobs: int, stats: bool,
+           collapse: str | None) -> None:
+    """Export all chat messages.
+
+    Messages are written as they are parsed, so large histories export in
+    constant memory (except with --collapse, which needs them all at once).
+    The message cache holds every file's messages until it is saved, so it is
+    only used with --collapse.
+    """
+    import gzip
+    import json
+    import sys
+    from contextlib import ExitStack
+    from typing import IO
+
+    parser = ClaudeDesktopParser(use_cache=bool(collapse), jobs=jobs,
+                                 collapse=collapse)
+    messages = iter(parser.get_store()) if collapse else parser.iter_messages()
+
+    with ExitStack() as stack:
+        out: IO[str] = sys.stdout
+        if compress:
+            out = stack.enter_context(
+                gzip.open(output or sys.stdout.buffer, "wt", encoding="utf-8")
+            )
+        elif output:
+            out = stack.enter_context(output.open("w", encoding="utf-8"))
+
+        if format == "text":
+            for msg in messages:
+                status = "📝" if msg.is_draft else "💬"
+                out.write(f"{status} [{msg.conversation_id[:8]}] {msg.text}\n")
+        else:
+            if format == "json":
+                out.write("[")
+
+            count = 0
+            for msg in messages:
+                record = {
+                    "conversation_id": msg.conversation_id,
+                    "text": msg.text,
+                    "is_draft": msg.is_draft,
+                    "message_type": msg.message_type
+                }
+                if format == "ndjson":
+                    out.write(json.dumps(record) + "\n")
+                else:
+                    # Same layout as json.dumps(records, indent=2), one record at a time
+                    body = json.dumps(record, indent=2).replace("\n", "\n  ")
+                    out.write(("," if count else "") + "\n  " + body)
+                count += 1
+
+            if format == "json":
+                out.write("\n]\n" if count else "]\n")
+
+    if stats:
+        counts = parser.drafts.stats
+        click.echo(
+            f"Draft documents: {counts.attempted} attempted, "
+            f"{counts.accepted} accepted, {counts.rejected} rejected"
+            + (" (cached files are not re-parsed)" if collapse else ""),
+            err=True,
+        )
+
+
+@desktop.command()
+@click.option(
+    "--interval",
+    "-i",
+    default=1.0,
+    help="Polling interval in seconds (fallback when inotify is unavailable)",
+)
+@click.option(
+    "--from-start", is_flag=True, help="Replay the whole active log before following it"
+)
+def watch(interval: float, from_start: bool) -> None:
+    """Follow new drafts and messages as Claude Desktop writes them."""
     parser = ClaudeDesktopParser()
-    messages = parser.get_all_messages()
-
-    if format == "json":
-        import json
-        data = []
-        for msg in messages:
-            data.append({
-                "conversation_id": msg.conversation_id,
-                "text": msg.text,
-                "is_draft": msg.is_draft,
-                "message_type": msg.message_type
-            })
-        click.echo(json.dumps(data, indent=2))
-    else:
-        for msg in messages:
+
+    if not parser.leveldb_dir.exists():
+        click.echo(f"✗ Claude Desktop storage not found: {parser.leveldb_dir}",
+                   err=True)
+        return
+
+    click.echo(f"Watching {parser.leveldb_dir} (Ctrl-C to stop)")
+    try:
+        for msg in parser.watch(interval, from_start):
             status = "📝" if msg.is_draft else "💬"
-            click.echo(f"{status} [{msg.conversation_id[:8]}] {msg.text}")
+            conv_id = msg.conversation_id
+            conv_short = conv_id[:8] if conv_id != "unknown" else "unknown"
+            click.echo(f"{status} [{conv_short}] {msg.text}")
+    except KeyboardInterrupt:
+        pass
+
+
+@desktop.command("clear-cache")
+def clear_cache() -> None:
+    """Delete the cached parse results for chat history."""
+    parser = ClaudeDesktopParser()
+    cache = parser.cache
+    if cache is not None:
+        cache.clear()
+    click.echo("✓ Cleared desktop message cache")
+
+
+# Benchmark commands
+def _corpus_options(func: Callable[..., None]) -> Callable[..., None]:
+    """Options shared by commands that generate a synthetic corpus."""
+    options = [
+        click.option("--conversations", default=50, help="Number of conversations"),
+        click.option("--messages", default=20, help="Messages per conversation"),
+        click.option("--churn", default=5, help="Drafts saved before each message"),
+        click.option("--words", default=40, help="Average words per message"),
+        click.option("--tables", default=8, help="Number of SSTables"),
+        click.option("--log-fraction", default=0.1,
+                     help="Share of writes left in the active log"),
+        click.option("--compress/--no-compress", default=True,
+                     help="Snappy-compress table blocks"),
+        click.option("--seed", default=0, help="Random seed"),
+    ]
+    for option in reversed(options):
+        func = option(func)
+    return func
+
+
+def _corpus_spec(conversations: int, messages: int, churn: int, words: int,
+                 tables: int, log_fraction: float, compress: bool,
+                 seed: int) -> "CorpusSpec":
+    from .bench import CorpusSpec
+
+    return CorpusSpec(
+        conversations=conversations,
+        messages_per_conversation=messages,
+        draft_churn=churn,
+        words_per_message=words,
+        tables=tables,
+        log_fraction=log_fraction,
+        compress=compress,
+        seed=seed,
+    )
+
+
+@bench.command()
+@click.argument("directory", type=click.Path(file_okay=False, path_type=Path))
+@_corpus_options
+@click.option("--force", is_flag=True,
+              help="Replace LevelDB files in a directory not written by generate")
+def generate(directory: Path, conversations: int, messages: int, churn: int,
+             words: int, tables: int, log_fraction: float, compress: bool,
+             seed: int, force: bool) -> None:
+    """Write a synthetic Claude Desktop LevelDB corpus to DIRECTORY.
+
+    A non-empty DIRECTORY that was not written by this command is refused
+    unless --force is given, since its LevelDB files would be deleted.
+    """
+    import sys
+
+    from .bench import generate_corpus
+
+    spec = _corpus_spec(conversations, messages, churn, words, tables, log_fraction,
+                        compress, seed)
+    try:
+        info = generate_corpus(directory, spec, force=force)
+    except FileExistsError as e:
+        click.echo(f"✗ {e}; use --force to replace its LevelDB files", err=True)
+        sys.exit(1)
+    click.echo(
+        f"✓ Wrote {info.files} files ({info.total_bytes / 1e6:.1f} MB, "
+        f"{info.writes} writes) to {info.path}"
+    )
+
+
+@bench.command("desktop")
+@click.option(
+    "--source",
+    type=click.Path(exists=True, file_okay=False, path_type=Path),
+    help="Benchmark an existing LevelDB directory instead of a synthetic corpus",
+)
+@_corpus_options
+@click.option("--runs", default=3, help="Runs per scan phase (median is reported)")
+@click.option(
+    "--jobs", "-j", default=1, help="Worker processes for parsing (0 = one per CPU)"
+)
+@click.option(
+    "--query", "-q", "queries", multiple=True, help="Search query to time (repeatable)"
+)
+def bench_desktop(source: Path | None, conversations: int, messages: int, churn: int,
+                  words: int, tables: int, log_fraction: float, compress: bool,
+                  seed: int, runs: int, jobs: int, queries: tuple[str, ...]) -> None:
+    """Benchmark desktop history scanning and search."""
+    import tempfile
+
+    from .bench import generate_corpus, run_desktop_bench
+
+    label = str(source) if source else "synthetic"
+    with tempfile.TemporaryDirectory(prefix="clod-bench-") as tmp:
+        workdir = Path(tmp)
+        if source is None:
+            spec = _corpus_spec(conversations, messages, churn, words, tables,
+                                log_fraction, compress, seed)
+            source = generate_corpus(workdir / "leveldb", spec).path
+
+        report = run_desktop_bench(
+            source,
+            workdir / "cache",
+            jobs=jobs,
+            runs=runs,
+            queries=[*queries] or None,
+        )
+
+    click.echo(
+        f"Corpus: {label} ({report.files} files, {report.total_bytes / 1e6:.1f} MB)"
+    )
+    for phase in report.phases:
+        line = (f"  {phase.name:<12} {phase.seconds * 1000:9.1f} ms"
+                f"  {phase.messages:>8} msgs")
+        if "mb_per_s" in phase.extra:
+            line += (f"  {phase.extra['mb_per_s']:8.1f} MB/s"
+                     f"  {phase.extra['messages_per_s']:10.0f} msgs/s")
+        line += f"  peak RSS {phase.peak_rss / 1e6:.1f} MB"
+        click.echo(line)
+
+    for timing in report.searches:
+        click.echo(
+            f"  search {timing.query!r}: {timing.hits} hits, "
+            f"p50 {timing.p50 * 1000:.2f} ms, p95 {timing.p95 * 1000:.2f} ms"
+        )
 
 
 # Sound effects management commands
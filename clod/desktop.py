@@ -1,15 +1,69 @@
 """Claude Desktop chat history parser."""
 
-import json
+import contextlib
+import heapq
+import os
 import re
-import subprocess
-from dataclasses import dataclass
+import sys
+from array import array
+from collections import deque
+from collections.abc import Iterable, Iterator
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass, field
 from datetime import datetime
+from itertools import islice
 from pathlib import Path
-from typing import Any
 
+from .desktop_cache import MessageCache, snapshot_key
+from .drafts import DraftExtractor, ExtractionStats, extract_doc_text
+from .leveldb import LevelDBError, LogTailer, iter_entries
+from .neardup import collapse_near_duplicates
+from .search import SearchIndex
+from .watch import DirectoryWatcher
 
-@dataclass
+_TEXT_FIELD_RE = re.compile(r'"text":"([^"]+)"')
+_TEXT_FIELD_BYTES_RE = re.compile(rb'"text":"([^"]+)"')
+# Fewer files than this parse faster serially than through a process pool
+_MIN_PARALLEL_FILES = 4
+
+
+def _decode_storage_string(raw: bytes) -> str:
+    """Decode a Chromium Local Storage string (prefixed with its encoding byte)."""
+    if raw[:1] == b"\x00":
+        return raw[1:].decode("utf-16-le", errors="replace")
+    if raw[:1] == b"\x01":
+        return raw[1:].decode("latin-1")
+    return raw.decode("utf-8", errors="replace")
+
+
+def _iter_text_fields(value: bytes) -> Iterator[str]:
+    """Yield "text" JSON field values, decoding only the matched slices."""
+    if value[:1] == b"\x00":
+        # UTF-16 values cannot be matched byte-wise
+        for match in _TEXT_FIELD_RE.finditer(_decode_storage_string(value)):
+            yield match.group(1)
+        return
+
+    encoding = "latin-1" if value[:1] == b"\x01" else "utf-8"
+    for match in _TEXT_FIELD_BYTES_RE.finditer(value):
+        yield match.group(1).decode(encoding, errors="replace")
+
+
+def default_claude_dir() -> Path:
+    """Return the Claude Desktop data directory for this platform."""
+    if sys.platform == "darwin":
+        return Path.home() / "Library/Application Support/Claude"
+    if sys.platform == "win32":
+        return Path(os.environ.get("APPDATA", Path.home())) / "Claude"
+    return Path.home() / ".config/Claude"
+
+
+def fingerprint(conversation_id: str, text: str) -> int:
+    """Return a 64-bit fingerprint used for (conversation_id, text) dedup."""
+    return hash((conversation_id, text)) & 0xFFFFFFFFFFFFFFFF
+
+
+@dataclass(slots=True)
 class ChatMessage:
     """Represents a chat message from Claude Desktop."""
     conversation_id: str
@@ -17,9 +71,20 @@ class ChatMessage:
     timestamp: datetime | None = None
     message_type: str = "user"  # user or assistant
     is_draft: bool = False
+    # LevelDB sequence number of the write; orders messages chronologically
+    sequence: int | None = None
 
 
-@dataclass
+@dataclass(slots=True)
+class SearchResults:
+    """Ranked search hits plus the total number of matches."""
+    messages: list[ChatMessage]
+    total: int
+    # Vocabulary tokens a fuzzy query matched, for highlighting
+    matched_tokens: list[str] = field(default_factory=list)
+
+
+@dataclass(slots=True)
 class Conversation:
     """Represents a conversation thread."""
     id: str
@@ -27,147 +92,359 @@ class Conversation:
     last_activity: datetime | None = None
 
 
-class ClaudeDesktopParser:
-    """Parser for Claude Desktop chat history stored in LevelDB."""
+class MessageStore:
+    """Compact, deduplicating column store for parsed messages.
+
+    Conversation IDs and message types are interned into small tables and
+    referenced by index from arrays. Dedup keeps 64-bit fingerprints rather
+    than (conversation_id, text) tuples. ChatMessage objects are only built
+    when a caller asks for them.
+    """
+
+    __slots__ = (
+        "_conversation_ids", "_conversation_index", "_conversations", "_drafts",
+        "_fingerprints", "_message_types", "_sequences", "_texts", "_timestamps",
+        "_types",
+    )
 
     def __init__(self) -> None:
-        self.claude_dir = Path.home() / "Library/Application Support/Claude"
-        self.leveldb_dir = self.claude_dir / "Local Storage/leveldb"
+        self._conversation_ids: list[str] = []
+        self._conversation_index: dict[str, int] = {}
+        self._message_types: list[str] = []
+        self._conversations = array("I")
+        self._types = array("B")
+        self._drafts = bytearray()
+        self._texts: list[str] = []
+        # -1 marks messages without a known sequence number
+        self._sequences = array("q")
+        self._timestamps: dict[int, datetime] = {}
+        self._fingerprints: set[int] = set()
+
+    def _intern_conversation(self, conversation_id: str) -> int:
+        index = self._conversation_index.get(conversation_id)
+        if index is None:
+            index = len(self._conversation_ids)
+            self._conversation_ids.append(conversation_id)
+            self._conversation_index[conversation_id] = index
+        return index
+
+    def add(self, msg: ChatMessage) -> bool:
+        """Add a message, returning False if it is a duplicate."""
+        key = fingerprint(msg.conversation_id, msg.text)
+        if key in self._fingerprints:
+            return False
+        self._fingerprints.add(key)
+
+        if msg.message_type not in self._message_types:
+            self._message_types.append(msg.message_type)
+
+        row = len(self._texts)
+        self._conversations.append(self._intern_conversation(msg.conversation_id))
+        self._types.append(self._message_types.index(msg.message_type))
+        self._drafts.append(msg.is_draft)
+        self._texts.append(msg.text)
+        self._sequences.append(-1 if msg.sequence is None else msg.sequence)
+        if msg.timestamp is not None:
+            self._timestamps[row] = msg.timestamp
+        return True
+
+    def __len__(self) -> int:
+        return len(self._texts)
+
+    def __getitem__(self, row: int) -> ChatMessage:
+        return ChatMessage(
+            conversation_id=self._conversation_ids[self._conversations[row]],
+            text=self._texts[row],
+            timestamp=self._timestamps.get(row),
+            message_type=self._message_types[self._types[row]],
+            is_draft=bool(self._drafts[row]),
+            sequence=None if self._sequences[row] < 0 else self._sequences[row],
+        )
+
+    def __iter__(self) -> Iterator[ChatMessage]:
+        for row in range(len(self._texts)):
+            yield self[row]
+
+    @property
+    def texts(self) -> list[str]:
+        """Message texts in insertion order (shared, do not modify)."""
+        return self._texts
+
+    def conversation_counts(self) -> dict[str, int]:
+        """Return message counts per conversation, in first-seen order."""
+        counts = [0] * len(self._conversation_ids)
+        for index in self._conversations:
+            counts[index] += 1
+        return dict(zip(self._conversation_ids, counts, strict=True))
+
+    def messages_for(self, conversation_id: str) -> list[ChatMessage]:
+        """Return the messages of a single conversation, oldest first."""
+        index = self._conversation_index.get(conversation_id)
+        if index is None:
+            return []
+        rows = [row for row, conv_index in enumerate(self._conversations)
+                if conv_index == index]
+        rows.sort(key=self._sequences.__getitem__)
+        return [self[row] for row in rows]
+
+
+class ClaudeDesktopParser:
+    """Parser for Claude Desktop chat history stored in LevelDB."""
 
-    def _run_strings(self, file_path: Path) -> list[str]:
-        """Extract strings from a binary file."""
+    def __init__(self, use_cache: bool = True, jobs: int = 1,
+                 leveldb_dir: Path | None = None,
+                 cache_dir: Path | None = None,
+                 collapse: str | None = None) -> None:
+        self.claude_dir = default_claude_dir()
+        # Explicit directory, then $CLOD_DESKTOP_DIR, then the app's own store
+        env_dir = os.environ.get("CLOD_DESKTOP_DIR")
+        self.leveldb_dir = leveldb_dir or (
+            Path(env_dir) if env_dir else self.claude_dir / "Local Storage/leveldb"
+        )
+        self.cache_dir = cache_dir
+        self.use_cache = use_cache
+        # Number of worker processes for cold scans; 0 means one per CPU
+        self.jobs = jobs
+        # Collapse near-duplicate drafts, keeping the "longest" or "latest"
+        self.collapse = collapse
+        self._cache: MessageCache | None = None
+        self.drafts = DraftExtractor()
+        self._search_index: SearchIndex | None = None
+        self._indexed_store = MessageStore()
+
+    @property
+    def cache(self) -> MessageCache | None:
+        """Message cache for the current LevelDB directory, if enabled."""
+        if not self.use_cache:
+            return None
+        if self._cache is None or self._cache.source_dir != self.leveldb_dir:
+            self._cache = MessageCache(self.leveldb_dir, self.cache_dir)
+        return self._cache
+
+    def _parse_files(self, file_paths: list[Path]) -> Iterator[list[ChatMessage]]:
+        """Parse files, fanning out to a process pool when jobs allow it."""
+        # More workers than CPUs only adds process start-up and pickling
+        cpus = os.cpu_count() or 1
+        jobs = min(self.jobs or cpus, cpus)
+        if jobs <= 1 or len(file_paths) < _MIN_PARALLEL_FILES:
+            for file_path in file_paths:
+                yield self._extract_messages_from_file(file_path)
+            return
+
+        workers = min(jobs, len(file_paths))
+        remaining = iter(file_paths)
+        pending: deque[Future[tuple[list[ChatMessage], ExtractionStats]]] = deque()
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            try:
+                # Keep a bounded window in flight, so a consumer that stops early
+                # only waits for those files rather than the whole directory
+                for file_path in islice(remaining, workers * 2):
+                    pending.append(executor.submit(_extract_file_messages, file_path))
+                while pending:
+                    # Taking results in submission order keeps output deterministic
+                    messages, stats = pending.popleft().result()
+                    file_path = next(remaining, None)
+                    if file_path is not None:
+                        pending.append(
+                            executor.submit(_extract_file_messages, file_path)
+                        )
+                    self.drafts.stats.merge(stats)
+                    yield messages
+            finally:
+                for future in pending:
+                    future.cancel()
+
+    def _iter_file_messages(
+        self, file_paths: list[Path]
+    ) -> Iterator[list[ChatMessage]]:
+        """Yield per-file messages, parsing only files missing from the cache."""
+        cache = self.cache
+        if cache is None:
+            yield from self._parse_files(file_paths)
+            return
+
+        # Decide misses up front so they can be parsed in parallel, but only
+        # load cached entries as they are reached so early exits stay cheap
+        stats: list[os.stat_result | None] = []
+        misses = []
+        for file_path in file_paths:
+            try:
+                stat = file_path.stat()
+            except OSError:
+                stats.append(None)
+                continue
+            stats.append(stat)
+            if not cache.contains(file_path, stat):
+                misses.append(file_path)
+
+        parsed = self._parse_files(misses)
+        missing = set(misses)
         try:
-            result = subprocess.run(
-                ["strings", str(file_path)],
-                capture_output=True,
-                text=True,
-                check=True
-            )
-            return result.stdout.split('\n')
-        except subprocess.CalledProcessError:
-            return []
+            for file_path, stat in zip(file_paths, stats, strict=True):
+                if stat is None:
+                    yield []
+                elif file_path in missing:
+                    messages = next(parsed)
+                    cache.put(file_path, stat, messages)
+                    yield messages
+                else:
+                    yield cache.get(file_path, stat) or []
+        finally:
+            parsed.close()
 
     def _extract_messages_from_file(self, file_path: Path) -> list[ChatMessage]:
         """Extract chat messages from a single LevelDB file."""
-        lines = self._run_strings(file_path)
+        messages: list[ChatMessage] = []
+
+        try:
+            for key, value, sequence in iter_entries(file_path):
+                messages.extend(self._extract_messages_from_entry(key, value, sequence))
+        except (OSError, LevelDBError):
+            # Keep whatever was recovered before the file turned unreadable
+            pass
+
+        return messages
+
+    def _extract_messages_from_entry(self, key: bytes, value: bytes,
+                                     sequence: int | None = None) -> list[ChatMessage]:
+        """Extract chat messages from a single Local Storage key/value pair."""
         messages = []
 
-        for i, line in enumerate(lines):
-            line = line.strip()
-
-            # Look for Local Storage keys that contain textInput (user drafts)
-            if line.startswith('LSS-') and 'textInput' in line:
-                conversation_id = line.split(':')[0].replace('LSS-', '')
-
-                # The next few lines should contain the JSON data - collect them
-                json_parts = []
-                j = i + 1
-                while j < len(lines) and j < i + 10:  # Look ahead up to 10 lines
-                    next_line = lines[j].strip()
-                    if next_line and not next_line.startswith('LSS-'):
-                        json_parts.append(next_line)
-                    else:
-                        break
-                    j += 1
-
-                if json_parts:
-                    # Try to reconstruct the JSON
-                    potential_json = ''.join(json_parts)
-
-                    # Find complete JSON by counting braces
-                    if potential_json.startswith('{"type":"doc"'):
-                        brace_count = 0
-                        json_end = 0
-                        for idx, char in enumerate(potential_json):
-                            if char == '{':
-                                brace_count += 1
-                            elif char == '}':
-                                brace_count -= 1
-                                if brace_count == 0:
-                                    json_end = idx + 1
-                                    break
-
-                        if json_end > 0:
-                            json_str = potential_json[:json_end]
-                            try:
-                                data = json.loads(json_str)
-                                text = self._extract_text_from_doc(data)
-                                if text and len(text) > 3:  # Filter out very short messages
-                                    messages.append(ChatMessage(
-                                        conversation_id=conversation_id,
-                                        text=text,
-                                        is_draft=True
-                                    ))
-                            except json.JSONDecodeError:
-                                # For debugging - try a simpler approach
-                                pass
-
-            # Also look for text messages in general JSON format (fallback method)
-            match = re.search(r'"text":"([^"]+)"', line)
-            if match:
-                text = match.group(1)
-                if len(text) > 10:  # Only longer messages
-                    # Try to guess conversation from surrounding context
-                    conv_id = "unknown"
+        # Look for Local Storage keys that contain textInput (user drafts).
+        # Keys look like "_<origin>\x00<encoded key name>"; only decode on a hit.
+        if b'textInput' in key:
+            _, _, raw_name = key.partition(b"\x00")
+            name = _decode_storage_string(raw_name or key)
+
+            if name.startswith('LSS-') and 'textInput' in name:
+                conversation_id = name.split(':')[0].replace('LSS-', '')
+                text_value = _decode_storage_string(value)
+
+                # Filter out very short messages (handled by the extractor)
+                for text in self.drafts.extract(text_value):
                     messages.append(ChatMessage(
-                        conversation_id=conv_id,
-                        text=text
+                        conversation_id=conversation_id,
+                        text=text,
+                        is_draft=True,
+                        sequence=sequence
                     ))
 
+        # Also look for text messages in general JSON format (fallback method)
+        for text in _iter_text_fields(value):
+            if len(text) > 10:  # Only longer messages
+                # Try to guess conversation from surrounding context
+                conv_id = "unknown"
+                messages.append(ChatMessage(
+                    conversation_id=conv_id,
+                    text=text,
+                    sequence=sequence
+                ))
+
         return messages
 
     def _extract_text_from_doc(self, doc_data: dict) -> str:
         """Extract text content from Claude's document format."""
-        text_parts = []
-
-        def extract_recursive(node: Any) -> None:
-            if isinstance(node, dict):
-                if node.get('type') == 'text':
-                    text_parts.append(node.get('text', ''))
-                elif 'content' in node:
-                    content = node['content']
-                    if isinstance(content, list):
-                        for item in content:
-                            extract_recursive(item)
-                    else:
-                        extract_recursive(content)
-            elif isinstance(node, list):
-                for item in node:
-                    extract_recursive(item)
-
-        extract_recursive(doc_data)
-        return ' '.join(text_parts).strip()
+        return extract_doc_text(doc_data)
 
-    def get_all_messages(self) -> list[ChatMessage]:
-        """Extract all messages from all LevelDB files."""
+    def _list_files(self) -> list[Path]:
+        """Return all .ldb and .log files in a stable order."""
         if not self.leveldb_dir.exists():
             return []
+        return [
+            file_path
+            for pattern in ['*.ldb', '*.log']
+            for file_path in sorted(self.leveldb_dir.glob(pattern))
+        ]
+
+    def iter_messages(self) -> Iterator[ChatMessage]:
+        """Yield unique messages from all LevelDB files as they are parsed."""
+        file_paths = self._list_files()
+        if not file_paths:
+            return
+
+        cache = self.cache
+        completed = False
+        try:
+            # Remove duplicates while preserving order
+            seen: set[int] = set()
+            for messages in self._iter_file_messages(file_paths):
+                for msg in messages:
+                    msg_key = fingerprint(msg.conversation_id, msg.text)
+                    if msg_key not in seen:
+                        seen.add(msg_key)
+                        yield msg
+            completed = True
+        finally:
+            if cache is not None:
+                # Only a full pass knows which files were compacted away
+                if completed:
+                    cache.prune({file_path.name for file_path in file_paths})
+                cache.save()
 
-        all_messages = []
+    def get_all_messages(self) -> list[ChatMessage]:
+        """Extract all messages from all LevelDB files."""
+        return list(self.iter_messages())
 
-        # Process all .ldb and .log files
-        for pattern in ['*.ldb', '*.log']:
-            for file_path in self.leveldb_dir.glob(pattern):
-                messages = self._extract_messages_from_file(file_path)
-                all_messages.extend(messages)
+    def get_store(self) -> MessageStore:
+        """Load all unique messages into a compact MessageStore.
 
-        # Remove duplicates while preserving order
-        seen = set()
-        unique_messages = []
-        for msg in all_messages:
-            msg_key = (msg.conversation_id, msg.text)
-            if msg_key not in seen:
-                seen.add(msg_key)
-                unique_messages.append(msg)
+        With collapse set, near-duplicate drafts are dropped first, which
+        needs every message in memory at once.
+        """
+        messages: Iterable[ChatMessage] = self.iter_messages()
+        if self.collapse:
+            messages = collapse_near_duplicates(list(messages), self.collapse)
 
-        return unique_messages
+        store = MessageStore()
+        for msg in messages:
+            store.add(msg)
+        return store
+
+    def _newest_log(self) -> Path | None:
+        """Return the active write-ahead log (the highest-numbered .log)."""
+        logs = sorted(
+            self.leveldb_dir.glob('*.log'),
+            key=lambda path: (len(path.stem), path.stem),
+        )
+        return logs[-1] if logs else None
+
+    def watch(self, poll_interval: float = 1.0,
+              from_start: bool = False) -> Iterator[ChatMessage]:
+        """Yield new messages as they are appended to the active LevelDB log.
+
+        Follows the log by byte offset and switches to the new log when
+        LevelDB compacts and rotates it. Runs until the consumer stops.
+        """
+        seen: set[int] = set()
+        tailer: LogTailer | None = None
+
+        with DirectoryWatcher(self.leveldb_dir, poll_interval) as watcher:
+            while True:
+                newest = self._newest_log()
+                if newest is not None and (tailer is None or tailer.path != newest):
+                    # Start a fresh log from the top; on startup skip existing data
+                    offset = 0
+                    if tailer is None and not from_start:
+                        with contextlib.suppress(OSError):
+                            offset = newest.stat().st_size
+                    tailer = LogTailer(newest, offset)
+
+                entries = tailer.read() if tailer is not None else []
+
+                for key, value, sequence in entries:
+                    for msg in self._extract_messages_from_entry(key, value, sequence):
+                        msg_key = fingerprint(msg.conversation_id, msg.text)
+                        if msg_key not in seen:
+                            seen.add(msg_key)
+                            yield msg
+
+                watcher.wait()
 
     def get_conversations(self) -> dict[str, Conversation]:
         """Group messages by conversation."""
-        messages = self.get_all_messages()
-        conversations = {}
+        conversations: dict[str, Conversation] = {}
 
-        for msg in messages:
+        for msg in self.get_store():
             conv_id = msg.conversation_id
             if conv_id not in conversations:
                 conversations[conv_id] = Conversation(id=conv_id, messages=[])
@@ -175,22 +452,138 @@ class ClaudeDesktopParser:
 
         return conversations
 
-    def search_messages(self, query: str, case_sensitive: bool = False) -> list[ChatMessage]:
-        """Search for messages containing the query."""
-        messages = self.get_all_messages()
-        results = []
-
-        search_query = query if case_sensitive else query.lower()
+    def load_search_index(self) -> SearchIndex:
+        """Load (once per parser) the full-text index over all messages.
+
+        With the cache enabled, the index is saved next to the cached
+        messages and reused while no LevelDB file has changed.
+        """
+        if self._search_index is not None:
+            return self._search_index
+
+        cache = self.cache
+        file_paths = self._list_files()
+        key = snapshot_key(file_paths, self.collapse) if cache is not None else None
+        self._indexed_store = self.get_store()
+        texts = self._indexed_store.texts
+
+        state = cache.load_index(key) if cache is not None and key is not None else None
+        if state is not None:
+            try:
+                self._search_index = SearchIndex(texts, state)
+                return self._search_index
+            except ValueError:
+                pass
+
+        self._search_index = SearchIndex(texts)
+        # Only save if no file changed while the store was being read
+        unchanged = key is not None and key == snapshot_key(file_paths, self.collapse)
+        if cache is not None and unchanged:
+            cache.save_index(key, self._search_index.state())
+        return self._search_index
+
+    def search(self, query: str, case_sensitive: bool = False,
+               limit: int | None = None, fuzzy: bool = False) -> SearchResults:
+        """Search messages, returning the best-ranked hits and the match count.
+
+        Words are AND-ed, OR separates alternatives and "quoted text" is
+        matched as a phrase. Each term matches as a substring. With fuzzy,
+        each word instead matches whole tokens within a few typos of it and
+        messages are ranked by closeness.
+        """
+        index = self.load_search_index()
+        if fuzzy:
+            doc_ids, total = index.fuzzy_search(query, limit)
+            matched = {token for similar in index.fuzzy_terms(query)
+                       for token in similar}
+            return SearchResults(
+                messages=[self._indexed_store[doc_id] for doc_id in doc_ids],
+                total=total,
+                matched_tokens=sorted(matched, key=len, reverse=True),
+            )
 
-        for msg in messages:
-            search_text = msg.text if case_sensitive else msg.text.lower()
-            if search_query in search_text:
-                results.append(msg)
+        doc_ids, total = index.search(query, case_sensitive, limit)
+        return SearchResults(
+            messages=[self._indexed_store[doc_id] for doc_id in doc_ids],
+            total=total,
+        )
 
-        return results
+    def search_messages(self, query: str, case_sensitive: bool = False,
+                        limit: int | None = None) -> list[ChatMessage]:
+        """Search for messages matching the query, best matches first."""
+        return self.search(query, case_sensitive, limit).messages
 
     def get_recent_messages(self, limit: int = 20) -> list[ChatMessage]:
-        """Get the most recent messages (approximate ordering)."""
-        messages = self.get_all_messages()
-        # Since we don't have timestamps, just return the last N messages
-        return messages[-limit:] if len(messages) > limit else messages
+        """Get the most recent unique messages, oldest first.
+
+        Messages are ordered by LevelDB sequence number. Files whose newest
+        sequence is unknown (uncached, including the active log) are read
+        first, then cached files from newest to oldest. The scan stops once
+        no remaining file can hold a message newer than the current top N.
+        Collapsing near-duplicates needs every message, so it reads them all.
+        """
+        file_paths = self._list_files()
+        if not file_paths or limit <= 0:
+            return []
+
+        if self.collapse:
+            sequenced = (msg for msg in self.get_store() if msg.sequence is not None)
+            recent = heapq.nlargest(limit, sequenced, key=lambda msg: msg.sequence or 0)
+            return recent[::-1]
+
+        cache = self.cache
+        bounds: dict[Path, int | None] = {}
+        for file_path in file_paths:
+            bound = None
+            if cache is not None:
+                try:
+                    bound = cache.max_sequence(file_path, file_path.stat())
+                except OSError:
+                    bound = -1
+            bounds[file_path] = bound
+
+        def read_order(file_path: Path) -> tuple[bool, int, int]:
+            bound = bounds[file_path]
+            number = int(file_path.stem) if file_path.stem.isdigit() else -1
+            return (bound is not None, -(bound or 0), -number)
+
+        ordered = sorted(file_paths, key=read_order)
+        newest: dict[int, ChatMessage] = {}
+
+        files = self._iter_file_messages(ordered)
+        try:
+            for position, messages in enumerate(files):
+                for msg in messages:
+                    if msg.sequence is None:
+                        continue
+                    # Keep the newest write of each (conversation_id, text)
+                    msg_key = fingerprint(msg.conversation_id, msg.text)
+                    current = newest.get(msg_key)
+                    if current is None or (current.sequence or 0) < msg.sequence:
+                        newest[msg_key] = msg
+
+                remaining = [bounds[path] for path in ordered[position + 1:]]
+                if len(newest) < limit or None in remaining:
+                    continue
+                sequences = heapq.nlargest(
+                    limit, (msg.sequence or 0 for msg in newest.values())
+                )
+                if max(remaining, default=-1) < sequences[-1]:
+                    break
+        finally:
+            files.close()
+            if cache is not None:
+                cache.save()
+
+        recent = heapq.nlargest(limit, newest.values(),
+                                key=lambda msg: msg.sequence or 0)
+        return recent[::-1]
+
+
+def _extract_file_messages(
+    file_path: Path,
+) -> tuple[list[ChatMessage], ExtractionStats]:
+    """Process-pool entry point for parsing a single file."""
+    parser = ClaudeDesktopParser(use_cache=False)
+    messages = parser._extract_messages_from_file(file_path)
+    return messages, parser.drafts.stats
@@ -0,0 +1,208 @@
+"""On-disk cache of messages parsed from Claude Desktop LevelDB files."""
+
+import hashlib
+import json
+import marshal
+import os
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+    from .desktop import ChatMessage
+    from .search import IndexState
+
+# Bump whenever message extraction changes so stale entries are re-parsed
+CACHE_VERSION = 3
+
+
+def default_cache_dir() -> Path:
+    """Return the clod cache directory, honouring XDG_CACHE_HOME."""
+    base = os.environ.get("XDG_CACHE_HOME")
+    return (Path(base) if base else Path.home() / ".cache") / "clod"
+
+
+def _file_number(file_path: Path) -> int:
+    """Return the LevelDB file number encoded in the file name."""
+    try:
+        return int(file_path.stem)
+    except ValueError:
+        return -1
+
+
+def snapshot_key(file_paths: "Iterable[Path]", *extra: object) -> str | None:
+    """Identify a set of LevelDB files by name, size and mtime.
+
+    Returns None if any file can't be stat'ed. Extra values (e.g. parse
+    options) become part of the key.
+    """
+    identity: list[object] = [CACHE_VERSION, *extra]
+    for file_path in file_paths:
+        try:
+            stat = file_path.stat()
+        except OSError:
+            return None
+        identity.append((file_path.name, stat.st_size, stat.st_mtime_ns))
+    return hashlib.sha1(repr(identity).encode()).hexdigest()
+
+
+class MessageCache:
+    """Per-file message cache keyed by LevelDB file number, size and mtime.
+
+    SSTables are immutable once written, so their entries stay valid until
+    compaction deletes the file. The active .log changes size and mtime as it
+    grows, which invalidates its entry on the next lookup.
+    """
+
+    def __init__(self, source_dir: Path, cache_dir: Path | None = None) -> None:
+        self.source_dir = source_dir
+        digest = hashlib.sha1(str(source_dir).encode()).hexdigest()[:12]
+        self.cache_path = (cache_dir or default_cache_dir()) / f"desktop-{digest}.json"
+        # Search index over the whole message store, keyed by snapshot_key()
+        self.index_path = self.cache_path.with_suffix(".index")
+        self._files: dict[str, dict[str, Any]] = {}
+        self._dirty = False
+        self._load()
+
+    def _load(self) -> None:
+        """Load cached entries, discarding the cache if it is unreadable."""
+        if not self.cache_path.exists():
+            return
+
+        try:
+            with self.cache_path.open() as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return
+
+        if data.get("version") != CACHE_VERSION:
+            return
+        if data.get("source") != str(self.source_dir):
+            return
+        self._files = data.get("files", {})
+
+    def _entry(self, file_path: Path, stat: os.stat_result) -> dict[str, Any] | None:
+        """Return the cache entry for a file if its identity is unchanged."""
+        entry = self._files.get(file_path.name)
+        if entry is None:
+            return None
+        if (
+            entry["number"] != _file_number(file_path)
+            or entry["size"] != stat.st_size
+            or entry["mtime_ns"] != stat.st_mtime_ns
+        ):
+            return None
+        return entry
+
+    def contains(self, file_path: Path, stat: os.stat_result) -> bool:
+        """Whether a valid entry exists for the file."""
+        return self._entry(file_path, stat) is not None
+
+    def max_sequence(self, file_path: Path, stat: os.stat_result) -> int | None:
+        """Return the newest message sequence in a cached file.
+
+        Returns None when the file is not cached (or changed), and -1 when it
+        holds no messages.
+        """
+        entry = self._entry(file_path, stat)
+        if entry is None:
+            return None
+        return int(entry["max_sequence"])
+
+    def get(self, file_path: Path, stat: os.stat_result) -> list["ChatMessage"] | None:
+        """Return cached messages for a file if its identity is unchanged."""
+        from .desktop import ChatMessage
+
+        entry = self._entry(file_path, stat)
+        if entry is None:
+            return None
+
+        return [
+            ChatMessage(
+                conversation_id=conversation_id,
+                text=text,
+                message_type=message_type,
+                is_draft=is_draft,
+                sequence=sequence,
+            )
+            for conversation_id, text, message_type, is_draft, sequence
+            in entry["messages"]
+        ]
+
+    def put(
+        self, file_path: Path, stat: os.stat_result, messages: list["ChatMessage"]
+    ) -> None:
+        """Store the messages parsed from a file."""
+        self._files[file_path.name] = {
+            "number": _file_number(file_path),
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "max_sequence": max(
+                (msg.sequence for msg in messages if msg.sequence is not None),
+                default=-1,
+            ),
+            "messages": [
+                [msg.conversation_id, msg.text, msg.message_type, msg.is_draft,
+                 msg.sequence]
+                for msg in messages
+            ],
+        }
+        self._dirty = True
+
+    def prune(self, live_names: set[str]) -> None:
+        """Drop entries for files that no longer exist (e.g. compacted away)."""
+        stale = [name for name in self._files if name not in live_names]
+        for name in stale:
+            del self._files[name]
+        if stale:
+            self._dirty = True
+
+    def save(self) -> None:
+        """Write the cache to disk if anything changed."""
+        if not self._dirty:
+            return
+
+        data = {
+            "version": CACHE_VERSION,
+            "source": str(self.source_dir),
+            "files": self._files,
+        }
+
+        try:
+            self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+            # Write atomically so a concurrent reader never sees a partial file
+            tmp_path = self.cache_path.with_suffix(".tmp")
+            with tmp_path.open("w") as f:
+                json.dump(data, f, separators=(",", ":"))
+            tmp_path.replace(self.cache_path)
+            self._dirty = False
+        except OSError:
+            pass
+
+    def load_index(self, key: str) -> "IndexState | None":
+        """Return the saved search index if it was built for the same snapshot."""
+        try:
+            with self.index_path.open("rb") as f:
+                saved_key, postings, lengths = marshal.load(f)
+        except (OSError, ValueError, EOFError, TypeError):
+            return None
+        return (postings, lengths) if saved_key == key else None
+
+    def save_index(self, key: str, state: "IndexState") -> None:
+        """Save the search index built for a snapshot, replacing the previous one."""
+        try:
+            self.index_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.index_path.with_suffix(".index-tmp")
+            with tmp_path.open("wb") as f:
+                marshal.dump((key, *state), f)
+            tmp_path.replace(self.index_path)
+        except OSError:
+            pass
+
+    def clear(self) -> None:
+        """Remove all cached entries, the cache file and the saved index."""
+        self._files = {}
+        self._dirty = False
+        self.cache_path.unlink(missing_ok=True)
+        self.index_path.unlink(missing_ok=True)
@@ -0,0 +1,83 @@
+"""Extraction of Lexical/ProseMirror draft documents from Local Storage values."""
+
+import json
+from collections.abc import Iterator
+from dataclasses import dataclass
+
+DOC_MARKER = '{"type":"doc"'
+
+
+@dataclass
+class ExtractionStats:
+    """Counters for draft document candidates seen by an extractor."""
+    attempted: int = 0
+    accepted: int = 0
+    rejected: int = 0
+
+    def merge(self, other: "ExtractionStats") -> None:
+        """Add another extractor's counts to this one."""
+        self.attempted += other.attempted
+        self.accepted += other.accepted
+        self.rejected += other.rejected
+
+
+def extract_doc_text(doc: object) -> str:
+    """Join the text nodes of a document tree, in document order.
+
+    Walks the tree with an explicit stack, so deeply nested documents
+    cannot hit Python's recursion limit.
+    """
+    parts = []
+    stack: list[object] = [doc]
+
+    while stack:
+        node = stack.pop()
+        if isinstance(node, dict):
+            if node.get('type') == 'text':
+                text = node.get('text', '')
+                if isinstance(text, str):
+                    parts.append(text)
+            elif 'content' in node:
+                content = node['content']
+                if isinstance(content, list):
+                    stack.extend(reversed(content))
+                else:
+                    stack.append(content)
+        elif isinstance(node, list):
+            stack.extend(reversed(node))
+
+    return ' '.join(parts).strip()
+
+
+class DraftExtractor:
+    """Find and decode draft documents with a single pass over each value."""
+
+    def __init__(self, min_length: int = 4) -> None:
+        self.min_length = min_length
+        self.stats = ExtractionStats()
+        self._decoder = json.JSONDecoder()
+
+    def extract(self, value: str) -> Iterator[str]:
+        """Yield the text of every draft document found in a value.
+
+        Each '{"type":"doc"' offset is decoded in place with raw_decode, which
+        stops at the end of the document, so no brace matching or copying of
+        the surrounding value is needed.
+        """
+        pos = value.find(DOC_MARKER)
+        while pos != -1:
+            self.stats.attempted += 1
+            try:
+                doc, end = self._decoder.raw_decode(value, pos)
+            except (json.JSONDecodeError, RecursionError):
+                self.stats.rejected += 1
+                pos = value.find(DOC_MARKER, pos + 1)
+                continue
+
+            text = extract_doc_text(doc)
+            if len(text) >= self.min_length:
+                self.stats.accepted += 1
+                yield text
+            else:
+                self.stats.rejected += 1
+            pos = value.find(DOC_MARKER, end)
@@ -0,0 +1,201 @@
+"""Resident daemon that runs Python hook scripts without a process per call.
+
+Claude Code starts a fresh interpreter for every hook invocation. The
+daemon instead imports each hook script from the hooks directory once and
+calls its main() for every request, with stdin, stdout and stderr swapped
+for the request's and SystemExit turned into an exit code.
+
+Requests arrive on a Unix socket from claude/hooks/hook_client.py as the
+hook name on one line followed by the hook's stdin up to EOF. The reply is
+"<exit code> <stdout length>" on one line, then stdout, then stderr. The
+framing needs no JSON so the client stays cheap to start.
+"""
+
+import ast
+import contextlib
+import importlib.util
+import io
+import os
+import socket
+import socketserver
+import sys
+import threading
+import traceback
+from dataclasses import dataclass
+from pathlib import Path
+from types import CodeType, ModuleType
+
+SOCKET_ENV = "CLOD_HOOKS_SOCKET"
+# Seconds a client may take to send its request or read the reply
+REQUEST_TIMEOUT = 10.0
+
+
+def default_socket_path() -> Path:
+    """Return the daemon socket path (hook_client.py computes the same one)."""
+    if os.environ.get(SOCKET_ENV):
+        return Path(os.environ[SOCKET_ENV])
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime_dir:
+        return Path(runtime_dir) / "clod-hooks.sock"
+    return Path(f"/tmp/clod-hooks-{os.getuid()}.sock")
+
+
+@dataclass
+class HookReply:
+    """The outcome of one hook call, as the hook process would have produced it."""
+    code: int
+    stdout: str
+    stderr: str
+
+
+class HookRunner:
+    """Load hook scripts once and run them in-process.
+
+    Scripts defining a main() are imported once and main() is called for
+    each request. Other scripts are only compiled, and their code object is
+    executed as __main__ for each request, so their top-level code runs
+    once per call just as it would in its own process. Either way a script
+    is reloaded when its modification time changes. Hooks run one at a time,
+    since they use the process-wide stdin, stdout and stderr.
+    """
+
+    def __init__(self, hooks_dir: Path | None = None) -> None:
+        self.hooks_dir = hooks_dir or Path.home() / ".claude" / "hooks"
+        self._loaded: dict[str, tuple[float, ModuleType | CodeType]] = {}
+        self._lock = threading.Lock()
+        # Running a script puts its directory on sys.path, so hooks can
+        # import helper modules next to them
+        if str(self.hooks_dir) not in sys.path:
+            sys.path.insert(0, str(self.hooks_dir))
+
+    def load(self, name: str) -> ModuleType | CodeType:
+        """Import a hook script, or compile one without a main(), while unchanged."""
+        if not name.isidentifier():
+            raise ValueError(f"Invalid hook name: {name!r}")
+        path = self.hooks_dir / f"{name}.py"
+        mtime = path.stat().st_mtime
+        cached = self._loaded.get(name)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+
+        tree = ast.parse(path.read_bytes(), str(path))
+        has_main = any(
+            isinstance(node, ast.FunctionDef) and node.name == "main"
+            for node in tree.body
+        )
+        if not has_main:
+            code = compile(tree, str(path), "exec")
+            self._loaded[name] = (mtime, code)
+            return code
+
+        spec = importlib.util.spec_from_file_location(f"clod_hook_{name}", path)
+        if spec is None or spec.loader is None:
+            raise ImportError(f"Cannot load hook script {path}")
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        self._loaded[name] = (mtime, module)
+        return module
+
+    def run(self, name: str, stdin: bytes) -> HookReply:
+        """Run a hook with the given input, the way running its script would."""
+        stdout, stderr = io.StringIO(), io.StringIO()
+        # A real stdin, so hooks reading sys.stdin.buffer get the raw bytes
+        hook_stdin = io.TextIOWrapper(io.BytesIO(stdin), encoding="utf-8",
+                                      errors="replace")
+        with self._lock:
+            saved_stdin = sys.stdin
+            sys.stdin = hook_stdin
+            try:
+                with (contextlib.redirect_stdout(stdout),
+                      contextlib.redirect_stderr(stderr)):
+                    code = self._call(name)
+            finally:
+                sys.stdin = saved_stdin
+        return HookReply(code, stdout.getvalue(), stderr.getvalue())
+
+    def _call(self, name: str) -> int:
+        try:
+            hook = self.load(name)
+            if isinstance(hook, CodeType):
+                exec(hook, {"__name__": "__main__", "__file__": hook.co_filename})
+            else:
+                hook.main()
+        except SystemExit as exit_:
+            if exit_.code is None:
+                return 0
+            if isinstance(exit_.code, int):
+                return exit_.code
+            print(exit_.code, file=sys.stderr)
+            return 1
+        except Exception:
+            traceback.print_exc()
+            return 1
+        return 0
+
+
+class _HookRequestHandler(socketserver.StreamRequestHandler):
+    server: "HookServer"
+
+    def setup(self) -> None:
+        # Applied to the connection, so a stalled client is dropped
+        self.timeout = self.server.request_timeout
+        super().setup()
+
+    def handle(self) -> None:
+        try:
+            line = self.rfile.readline()
+            if not line.endswith(b"\n"):
+                # A bare connect, e.g. a liveness probe
+                return
+            stdin = self.rfile.read()
+        except TimeoutError:
+            return
+        name = line.decode(errors="replace").strip()
+        reply = self.server.runner.run(name, stdin)
+
+        stdout = reply.stdout.encode()
+        with contextlib.suppress(BrokenPipeError, ConnectionResetError, TimeoutError):
+            header = f"{reply.code} {len(stdout)}\n".encode()
+            self.wfile.write(header + stdout + reply.stderr.encode())
+
+
+class HookServer(socketserver.ThreadingUnixStreamServer):
+    """Serve hook calls on a Unix socket.
+
+    Each connection is read and answered on its own thread under a socket
+    timeout, so a client that stops sending or reading cannot hold up the
+    others. The runner still runs the hooks themselves one at a time.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, socket_path: Path, runner: HookRunner,
+                 request_timeout: float = REQUEST_TIMEOUT) -> None:
+        self.runner = runner
+        self.socket_path = socket_path
+        self.request_timeout = request_timeout
+        _remove_stale_socket(socket_path)
+        old_umask = os.umask(0o077)
+        try:
+            super().__init__(str(socket_path), _HookRequestHandler)
+        finally:
+            os.umask(old_umask)
+
+    def server_close(self) -> None:
+        super().server_close()
+        self.socket_path.unlink(missing_ok=True)
+
+
+def _remove_stale_socket(socket_path: Path) -> None:
+    """Delete a socket left behind by a dead daemon, refusing if one is live."""
+    if not socket_path.exists():
+        return
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(str(socket_path))
+    except OSError:
+        socket_path.unlink()
+    else:
+        raise RuntimeError(f"A hook daemon is already listening on {socket_path}")
+    finally:
+        probe.close()
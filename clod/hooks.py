@@ -1,12 +1,283 @@
 """Hook management for Claude Code."""
 
+import contextlib
 import json
+import os
+import re
+import signal
 import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Any
 
 import click
 
+# Events whose matchers select tools; the others run every hook
+TOOL_EVENTS = ("PreToolUse", "PostToolUse")
+# Claude Code's per-hook timeout when the hook doesn't set one, in seconds
+DEFAULT_TIMEOUT = 60.0
+# A hook exiting with this code blocks the action and feeds stderr to Claude
+BLOCKING_EXIT = 2
+# Events where exit 2 only shows stderr to the user, since there's nothing to block
+_UNBLOCKABLE_EVENTS = ("Notification", "PreCompact")
+# Verdicts from weakest to strongest; an event gets its hooks' strongest
+VERDICTS = ("success", "error", "approve", "ask", "block", "stop")
+
+_SAMPLE_TOOL_INPUTS: dict[str, dict[str, Any]] = {
+    "Bash": {"command": "git status --short",
+             "description": "Show working tree status"},
+    "Edit": {"file_path": "/tmp/clod-bench/example.py",
+             "old_string": "x = 1", "new_string": "x = 2"},
+    "MultiEdit": {"file_path": "/tmp/clod-bench/example.py",
+                  "edits": [{"old_string": "x = 1", "new_string": "x = 2"}]},
+    "Write": {"file_path": "/tmp/clod-bench/example.py", "content": "print('hello')\n"},
+    "Read": {"file_path": "/tmp/clod-bench/example.py"},
+    "Grep": {"pattern": "TODO", "path": "."},
+    "Glob": {"pattern": "**/*.py"},
+    "LS": {"path": "."},
+    "Task": {"description": "Explore", "prompt": "Find where hooks are run"},
+}
+
+
+def normalize_event(event: str) -> str:
+    """Accept "pre-tool-use" as well as "PreToolUse"."""
+    if "-" not in event:
+        return event
+    return "".join(word.capitalize() for word in event.split("-"))
+
+
+def matcher_matches(matcher: str, tool: str) -> bool:
+    """Whether a hook matcher selects a tool, as Claude Code reads matchers."""
+    if matcher in ("", "*"):
+        return True
+    try:
+        return re.fullmatch(matcher, tool) is not None
+    except re.error:
+        return matcher == tool
+
+
+def sample_payload(event: str, tool: str | None = None) -> dict[str, Any]:
+    """A representative hook input for an event (and tool)."""
+    payload: dict[str, Any] = {
+        "session_id": "clod-bench",
+        "transcript_path": "/tmp/clod-bench/transcript.jsonl",
+        "cwd": str(Path.cwd()),
+        "hook_event_name": event,
+    }
+    if event in TOOL_EVENTS:
+        payload["tool_name"] = tool or "Bash"
+        payload["tool_input"] = _SAMPLE_TOOL_INPUTS.get(tool or "Bash", {})
+        if event == "PostToolUse":
+            payload["tool_response"] = {"success": True}
+    elif event == "Notification":
+        payload["message"] = "Claude needs your permission to use Bash"
+    elif event == "UserPromptSubmit":
+        payload["prompt"] = "Explain what this repository does"
+    elif event in ("Stop", "SubagentStop"):
+        payload["stop_hook_active"] = False
+    elif event == "PreCompact":
+        payload["trigger"] = "manual"
+        payload["custom_instructions"] = ""
+    return payload
+
+
+@dataclass
+class HookRun:
+    """One execution of a hook command."""
+    command: str
+    # None when the hook was killed at its deadline
+    returncode: int | None
+    stdout: str
+    stderr: str
+    wall: float
+    cpu: float
+    # Peak resident set size of the hook's process tree, in bytes
+    peak_rss: int
+
+    @property
+    def timed_out(self) -> bool:
+        return self.returncode is None
+
+
+def run_hook_command(command: str, payload: str, timeout: float | None = None,
+                     env: dict[str, str] | None = None) -> HookRun:
+    """Run a hook command through the shell the way Claude Code does.
+
+    Output goes to temporary files rather than pipes, so hooks that leave
+    background jobs running (`afplay ... &`) don't hold the call open.
+    The hook runs in its own session, and on timeout the whole group is
+    killed. CPU time and peak RSS come from the child's rusage.
+    """
+    with tempfile.TemporaryFile() as stdin, tempfile.TemporaryFile() as stdout, \
+            tempfile.TemporaryFile() as stderr:
+        stdin.write(payload.encode())
+        stdin.seek(0)
+
+        start = time.perf_counter()
+        proc = subprocess.Popen(
+            command, shell=True, stdin=stdin, stdout=stdout, stderr=stderr,
+            env=env, start_new_session=True,
+        )
+        killed = threading.Event()
+
+        def kill() -> None:
+            killed.set()
+            with contextlib.suppress(ProcessLookupError):
+                os.killpg(proc.pid, signal.SIGKILL)
+
+        timer = threading.Timer(timeout, kill) if timeout is not None else None
+        if timer is not None:
+            timer.start()
+        try:
+            _, status, usage = os.wait4(proc.pid, 0)
+        finally:
+            if timer is not None:
+                timer.cancel()
+        wall = time.perf_counter() - start
+        # The process is reaped; stop Popen from waiting on it again
+        proc.returncode = os.waitstatus_to_exitcode(status)
+
+        stdout.seek(0)
+        stderr.seek(0)
+        peak = usage.ru_maxrss
+        return HookRun(
+            command=command,
+            returncode=None if killed.is_set() else proc.returncode,
+            stdout=stdout.read().decode(errors="replace"),
+            stderr=stderr.read().decode(errors="replace"),
+            wall=wall,
+            cpu=usage.ru_utime + usage.ru_stime,
+            # Linux reports kilobytes, macOS bytes
+            peak_rss=int(peak if sys.platform == "darwin" else peak * 1024),
+        )
+
+
+def event_tool(
+    event: str, tool: str | None = None, payload: str | None = None
+) -> str | None:
+    """Return the tool a call of a tool event is for.
+
+    That is tool, else the payload's tool_name, else Bash (the tool of the
+    sample payload). Other events have no tool. Raises ValueError for a
+    payload without a tool_name.
+    """
+    if normalize_event(event) not in TOOL_EVENTS:
+        return None
+    if tool is not None:
+        return tool
+    if payload is None:
+        return str(sample_payload(normalize_event(event))["tool_name"])
+    try:
+        tool = json.loads(payload).get("tool_name")
+    except (json.JSONDecodeError, AttributeError):
+        tool = None
+    if not isinstance(tool, str):
+        raise ValueError(
+            f"{normalize_event(event)} hooks need a tool: "
+            "pass --tool or a tool_name in the input"
+        )
+    return tool
+
+
+@dataclass
+class HookOutcome:
+    """A hook's run and what Claude Code makes of it."""
+    hook: dict[str, Any]
+    run: HookRun
+    # One of VERDICTS
+    verdict: str
+    # Why, as shown to Claude or the user (stderr or the JSON reason)
+    reason: str = ""
+
+
+def hook_verdict(event: str, run: HookRun) -> tuple[str, str]:
+    """Interpret a hook run the way Claude Code does.
+
+    Exit 0 succeeds, and its stdout may be JSON with "continue": false
+    (stop Claude), a "decision" of "block" or "approve", or for PreToolUse
+    a hookSpecificOutput.permissionDecision of "deny", "ask" or "allow".
+    Exit 2 blocks with stderr as the reason. Anything else, including a
+    timeout, is a non-blocking error.
+    """
+    if run.timed_out:
+        return "error", "timed out"
+    if run.returncode == BLOCKING_EXIT:
+        if event in _UNBLOCKABLE_EVENTS:
+            return "error", run.stderr.strip()
+        return "block", run.stderr.strip()
+    if run.returncode != 0:
+        return "error", run.stderr.strip()
+
+    try:
+        output = json.loads(run.stdout) if run.stdout.lstrip().startswith("{") else {}
+    except json.JSONDecodeError:
+        output = {}
+    if not isinstance(output, dict):
+        return "success", ""
+    if output.get("continue") is False:
+        return "stop", output.get("stopReason", "")
+    specific = output.get("hookSpecificOutput") or {}
+    if not isinstance(specific, dict):
+        specific = {}
+    permission = specific.get("permissionDecision")
+    if permission in ("deny", "ask", "allow"):
+        verdict = {"deny": "block", "ask": "ask", "allow": "approve"}[permission]
+        return verdict, specific.get("permissionDecisionReason", "")
+    if output.get("decision") in ("block", "approve"):
+        return output["decision"], output.get("reason", "")
+    return "success", ""
+
+
+@dataclass
+class EventResult:
+    """The outcome of running every hook for one event."""
+    event: str
+    tool: str | None
+    outcomes: list[HookOutcome] = field(default_factory=list)
+    # Wall-clock time for the whole dispatch, hooks running in parallel
+    wall: float = 0.0
+
+    @property
+    def verdict(self) -> str:
+        """The strongest verdict among the hooks (block beats approve, etc.)."""
+        verdicts = (outcome.verdict for outcome in self.outcomes)
+        return max(verdicts, key=VERDICTS.index, default="success")
+
+
+def dispatch_hooks(
+    event: str, hooks: list[dict[str, Any]], payload: str,
+    tool: str | None = None, timeout: float | None = None,
+) -> EventResult:
+    """Run an event's hooks concurrently, as Claude Code does, and aggregate them.
+
+    Identical commands run once. Each hook is killed at its own deadline:
+    timeout if given, else the hook's configured timeout, else
+    DEFAULT_TIMEOUT.
+    """
+    unique = list({hook["command"]: hook for hook in hooks}.values())
+    result = EventResult(normalize_event(event), tool)
+    if not unique:
+        return result
+
+    def run(hook: dict[str, Any]) -> HookOutcome:
+        if timeout is not None:
+            deadline = timeout
+        else:
+            deadline = float(hook.get("timeout") or DEFAULT_TIMEOUT)
+        hook_run = run_hook_command(hook["command"], payload, deadline)
+        return HookOutcome(hook, hook_run, *hook_verdict(result.event, hook_run))
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=len(unique)) as executor:
+        result.outcomes = [*executor.map(run, unique)]
+    result.wall = time.perf_counter() - start
+    return result
+
 
 class HookManager:
     """Manages Claude Code hooks."""
@@ -59,11 +330,39 @@ class HookManager:
                         "matcher": matcher,
                         "type": hook.get("type", "command"),
                         "command": hook.get("command", ""),
-                        "enabled": hook.get("enabled", True)
+                        "enabled": hook.get("enabled", True),
+                        "timeout": hook.get("timeout"),
                     })
 
         return hooks
 
+    def matching_hooks(
+        self, event: str, tool: str | None = None
+    ) -> list[dict[str, Any]]:
+        """Return the enabled hooks Claude Code would run for an event (and tool)."""
+        event = normalize_event(event)
+        return [
+            hook for hook in self.list_hooks()
+            if hook["event"] == event and hook["enabled"] and hook["type"] == "command"
+            and (event not in TOOL_EVENTS or tool is None
+                 or matcher_matches(hook["matcher"], tool))
+        ]
+
+    def run_event(self, event: str, tool: str | None = None, payload: str | None = None,
+                  timeout: float | None = None) -> EventResult:
+        """Run every hook Claude Code would for an event, concurrently.
+
+        Without a payload, a sample input for the event (and tool) is used.
+        Tool events run only the hooks whose matcher selects the tool (see
+        event_tool), as for a real tool call.
+        """
+        event = normalize_event(event)
+        tool = event_tool(event, tool, payload)
+        if payload is None:
+            payload = json.dumps(sample_payload(event, tool))
+        hooks = self.matching_hooks(event, tool)
+        return dispatch_hooks(event, hooks, payload, tool, timeout)
+
     def add_hook(self, hook_type: str, matcher: str, command: str | None = None,
                  script_path: str | None = None, template: bool = False,
                  name: str | None = None) -> str:
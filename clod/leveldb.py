@@ -0,0 +1,621 @@
+"""Pure-Python reader for LevelDB log files and SSTables."""
+
+import mmap
+import os
+import struct
+from collections.abc import Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from typing import NamedTuple
+
+# Log files are written in fixed-size blocks of framed records
+LOG_BLOCK_SIZE = 32768
+LOG_HEADER_SIZE = 7
+
+# Physical record types in the log format
+_FULL, _FIRST, _MIDDLE, _LAST = 1, 2, 3, 4
+
+# WriteBatch entry tags
+_TYPE_DELETION = 0
+_TYPE_VALUE = 1
+
+TABLE_MAGIC = 0xDB4775248B80FB57
+TABLE_FOOTER_SIZE = 48
+BLOCK_TRAILER_SIZE = 5
+
+# Block compression types
+_NO_COMPRESSION = 0
+_SNAPPY_COMPRESSION = 1
+
+
+class LevelDBError(Exception):
+    """Raised when a LevelDB file cannot be parsed."""
+
+
+class Entry(NamedTuple):
+    """A live key/value pair and the sequence number it was written at."""
+    key: bytes
+    value: bytes
+    sequence: int
+
+
+def _read_varint(data: bytes, pos: int) -> tuple[int, int]:
+    """Decode a little-endian base-128 varint starting at pos."""
+    result = 0
+    shift = 0
+    while True:
+        if pos >= len(data):
+            raise LevelDBError("Truncated varint")
+        byte = data[pos]
+        pos += 1
+        result |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return result, pos
+        shift += 7
+        if shift > 63:
+            raise LevelDBError("Varint too long")
+
+
+def snappy_decompress(data: bytes) -> bytes:
+    """Decompress a raw (unframed) Snappy block."""
+    expected, pos = _read_varint(data, 0)
+    out = bytearray()
+    end = len(data)
+
+    while pos < end:
+        tag = data[pos]
+        pos += 1
+        kind = tag & 0x03
+
+        if kind == 0:
+            # Literal run; lengths >= 60 are stored in the following 1-4 bytes
+            length = tag >> 2
+            if length >= 60:
+                extra = length - 59
+                length = int.from_bytes(data[pos:pos + extra], "little")
+                pos += extra
+            length += 1
+            if pos + length > end:
+                raise LevelDBError("Truncated snappy literal")
+            out += data[pos:pos + length]
+            pos += length
+            continue
+
+        if kind == 1:
+            length = 4 + ((tag >> 2) & 0x07)
+            offset = ((tag >> 5) << 8) | data[pos]
+            pos += 1
+        elif kind == 2:
+            length = (tag >> 2) + 1
+            offset = int.from_bytes(data[pos:pos + 2], "little")
+            pos += 2
+        else:
+            length = (tag >> 2) + 1
+            offset = int.from_bytes(data[pos:pos + 4], "little")
+            pos += 4
+
+        if offset == 0 or offset > len(out):
+            raise LevelDBError("Invalid snappy copy offset")
+
+        start = len(out) - offset
+        if offset >= length:
+            out += out[start:start + length]
+        else:
+            # Overlapping copy repeats the trailing `offset` bytes
+            chunk = out[start:]
+            out += (chunk * (length // offset + 1))[:length]
+
+    if len(out) != expected:
+        raise LevelDBError("Snappy length mismatch")
+    return bytes(out)
+
+
+@contextmanager
+def _map_file(path: Path) -> Iterator[bytes | mmap.mmap]:
+    """Memory-map a file read-only so slices copy only the bytes they touch."""
+    with path.open("rb") as f:
+        if f.seek(0, 2) == 0:
+            # Empty files (e.g. a freshly rotated log) cannot be mapped
+            yield b""
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            yield mapped
+
+
+def _read_block(data: bytes | mmap.mmap, offset: int, size: int) -> bytes:
+    """Read and decompress the table block at the given handle."""
+    if offset + size + BLOCK_TRAILER_SIZE > len(data):
+        raise LevelDBError("Block handle out of range")
+
+    raw = data[offset:offset + size]
+    compression = data[offset + size]
+    if compression == _NO_COMPRESSION:
+        return raw
+    if compression == _SNAPPY_COMPRESSION:
+        return snappy_decompress(raw)
+    raise LevelDBError(f"Unsupported block compression: {compression}")
+
+
+def _iter_block(block: bytes) -> Iterator[tuple[bytes, bytes]]:
+    """Yield the prefix-compressed key/value entries of a table block."""
+    if len(block) < 4:
+        raise LevelDBError("Block too short")
+
+    num_restarts = struct.unpack_from("<I", block, len(block) - 4)[0]
+    limit = len(block) - 4 - 4 * num_restarts
+    if limit < 0:
+        raise LevelDBError("Invalid restart array")
+
+    key = b""
+    pos = 0
+    while pos < limit:
+        shared, pos = _read_varint(block, pos)
+        non_shared, pos = _read_varint(block, pos)
+        value_length, pos = _read_varint(block, pos)
+
+        key_end = pos + non_shared
+        value_end = key_end + value_length
+        if shared > len(key) or value_end > limit:
+            raise LevelDBError("Corrupt block entry")
+
+        key = key[:shared] + block[pos:key_end]
+        yield key, block[key_end:value_end]
+        pos = value_end
+
+
+def _decode_handle(handle: bytes, pos: int = 0) -> tuple[int, int, int]:
+    """Decode a BlockHandle, returning (offset, size, next position)."""
+    offset, pos = _read_varint(handle, pos)
+    size, pos = _read_varint(handle, pos)
+    return offset, size, pos
+
+
+def iter_table(path: Path) -> Iterator[Entry]:
+    """Yield the Put entries stored in an SSTable (.ldb) file.
+
+    Deletion markers are skipped, but a Put is still yielded when a newer
+    write in this or another file has replaced or deleted its key. Callers
+    that need only the current values resolve keys by sequence number.
+    """
+    with _map_file(path) as data:
+        yield from _iter_table_data(data, path)
+
+
+def _iter_table_data(data: bytes | mmap.mmap, path: Path) -> Iterator[Entry]:
+    """Walk the index block and data blocks of a mapped table."""
+    if len(data) < TABLE_FOOTER_SIZE:
+        raise LevelDBError(f"Table too short: {path}")
+
+    footer = data[-TABLE_FOOTER_SIZE:]
+    magic = struct.unpack_from("<Q", footer, TABLE_FOOTER_SIZE - 8)[0]
+    if magic != TABLE_MAGIC:
+        raise LevelDBError(f"Bad table magic: {path}")
+
+    # Footer holds the metaindex handle followed by the index handle
+    _, _, pos = _decode_handle(footer)
+    index_offset, index_size, _ = _decode_handle(footer, pos)
+    index_block = _read_block(data, index_offset, index_size)
+
+    for _, handle in _iter_block(index_block):
+        block_offset, block_size, _ = _decode_handle(handle)
+        block = _read_block(data, block_offset, block_size)
+
+        for internal_key, value in _iter_block(block):
+            if len(internal_key) < 8:
+                continue
+            # Internal keys end with (sequence << 8 | value type)
+            tag = int.from_bytes(internal_key[-8:], "little")
+            if tag & 0xFF != _TYPE_VALUE:
+                continue
+            yield Entry(internal_key[:-8], value, tag >> 8)
+
+
+def _iter_log_records(
+    data: bytes | mmap.mmap, base: int = 0
+) -> Iterator[tuple[bytes, int]]:
+    """Reassemble logical records from the physical log block framing.
+
+    `base` is the file offset of data[0], needed to find block boundaries
+    when reading from the middle of a log. Each record is yielded with the
+    position just past its last fragment, where a later read can resume.
+    """
+    pending: list[bytes] = []
+    pos = 0
+    end = len(data)
+
+    while pos + LOG_HEADER_SIZE <= end:
+        block_left = LOG_BLOCK_SIZE - (base + pos) % LOG_BLOCK_SIZE
+        if block_left < LOG_HEADER_SIZE:
+            # Block trailer is zero padding
+            pos += block_left
+            continue
+
+        length = data[pos + 4] | (data[pos + 5] << 8)
+        record_type = data[pos + 6]
+        start = pos + LOG_HEADER_SIZE
+        pos = start + length
+
+        if record_type == 0 and length == 0:
+            # Preallocated or zeroed space; skip to the next block
+            pos = start + block_left - LOG_HEADER_SIZE
+            continue
+        if pos > end:
+            # Partially written tail of an active log
+            break
+
+        fragment = data[start:pos]
+        if record_type == _FULL:
+            pending = []
+            yield fragment, pos
+        elif record_type == _FIRST:
+            pending = [fragment]
+        elif record_type == _MIDDLE:
+            if pending:
+                pending.append(fragment)
+        elif record_type == _LAST:
+            if pending:
+                pending.append(fragment)
+                yield b"".join(pending), pos
+            pending = []
+
+
+def _iter_write_batch(batch: bytes) -> Iterator[Entry]:
+    """Yield the Put entries of a serialized WriteBatch."""
+    if len(batch) < 12:
+        return
+
+    # Every operation in the batch, deletions included, consumes a sequence
+    sequence, count = struct.unpack_from("<QI", batch, 0)
+    pos = 12
+    for index in range(count):
+        if pos >= len(batch):
+            break
+        tag = batch[pos]
+        pos += 1
+
+        key_length, pos = _read_varint(batch, pos)
+        key = batch[pos:pos + key_length]
+        pos += key_length
+
+        if tag == _TYPE_VALUE:
+            value_length, pos = _read_varint(batch, pos)
+            value = batch[pos:pos + value_length]
+            pos += value_length
+            yield Entry(key, value, sequence + index)
+        elif tag != _TYPE_DELETION:
+            raise LevelDBError(f"Unknown write batch tag: {tag}")
+
+
+def iter_log(path: Path) -> Iterator[Entry]:
+    """Yield key/value entries written to a LevelDB write-ahead log."""
+    with _map_file(path) as data:
+        for record, _ in _iter_log_records(data):
+            yield from _iter_write_batch(record)
+
+
+class LogTailer:
+    """Incrementally read records appended to a LevelDB write-ahead log.
+
+    The tailer remembers the byte offset just past the last complete record,
+    so each read decodes only newly appended data. A partially written record
+    is left for the next read. If the file shrinks or is replaced, reading
+    restarts from the beginning. A record whose write batch cannot be decoded
+    is skipped and counted in `skipped`, so one bad batch neither hides the
+    records around it nor stalls the tailer at its offset.
+    """
+
+    def __init__(self, path: Path, offset: int = 0) -> None:
+        self.path = path
+        self.offset = offset
+        self.skipped = 0
+        self._inode: int | None = None
+
+    def read(self) -> list[Entry]:
+        """Return key/value entries written since the previous read."""
+        try:
+            with self.path.open("rb") as f:
+                stat = os.fstat(f.fileno())
+                if self._inode is not None and stat.st_ino != self._inode:
+                    self.offset = 0
+                self._inode = stat.st_ino
+                if stat.st_size < self.offset:
+                    self.offset = 0
+                if stat.st_size == self.offset:
+                    return []
+                f.seek(self.offset)
+                data = f.read()
+        except OSError:
+            return []
+
+        entries: list[Entry] = []
+        start = self.offset
+        for record, end in _iter_log_records(data, start):
+            try:
+                entries.extend(list(_iter_write_batch(record)))
+            except LevelDBError:
+                self.skipped += 1
+            self.offset = start + end
+        return entries
+
+
+def iter_entries(path: Path) -> Iterator[Entry]:
+    """Yield key/value entries from a LevelDB .ldb or .log file."""
+    if path.suffix == ".log":
+        return iter_log(path)
+    return iter_table(path)
+
+
+# Writing support, used to generate synthetic corpora for benchmarks
+
+def _make_crc32c_table() -> list[int]:
+    table = []
+    for i in range(256):
+        crc = i
+        for _ in range(8):
+            crc = (crc >> 1) ^ (0x82F63B78 if crc & 1 else 0)
+        table.append(crc)
+    return table
+
+
+_CRC32C_TABLE = _make_crc32c_table()
+
+
+def crc32c(data: bytes, crc: int = 0) -> int:
+    """Compute the CRC-32C (Castagnoli) checksum LevelDB uses."""
+    table = _CRC32C_TABLE
+    crc ^= 0xFFFFFFFF
+    for byte in data:
+        crc = table[(crc ^ byte) & 0xFF] ^ (crc >> 8)
+    return crc ^ 0xFFFFFFFF
+
+
+def _mask_crc(crc: int) -> int:
+    """Mask a stored CRC the way LevelDB does (rotate and add a constant)."""
+    return (((crc >> 15) | (crc << 17)) + 0xA282EAD8) & 0xFFFFFFFF
+
+
+def _encode_varint(value: int) -> bytes:
+    out = bytearray()
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+    return bytes(out)
+
+
+def _length_prefixed(data: bytes) -> bytes:
+    return _encode_varint(len(data)) + data
+
+
+def _emit_snappy_literal(out: bytearray, literal: bytes) -> None:
+    length = len(literal) - 1
+    if length < 60:
+        out.append(length << 2)
+    else:
+        size = (length.bit_length() + 7) // 8
+        out.append((59 + size) << 2)
+        out += length.to_bytes(size, "little")
+    out += literal
+
+
+def snappy_compress(data: bytes) -> bytes:
+    """Compress a block with a simple greedy Snappy encoder.
+
+    Output is valid raw Snappy, though not as tight as the reference
+    implementation.
+    """
+    out = bytearray(_encode_varint(len(data)))
+    end = len(data)
+    table: dict[bytes, int] = {}
+    pos = 0
+    literal_start = 0
+
+    while pos + 4 <= end:
+        chunk = data[pos:pos + 4]
+        candidate = table.get(chunk)
+        table[chunk] = pos
+        if candidate is None or pos - candidate > 0xFFFF:
+            pos += 1
+            continue
+
+        length = 4
+        while pos + length < end and data[candidate + length] == data[pos + length]:
+            length += 1
+
+        if literal_start < pos:
+            _emit_snappy_literal(out, data[literal_start:pos])
+
+        offset = pos - candidate
+        remaining = length
+        while remaining > 0:
+            # 2-byte offset copies encode lengths of 1-64
+            step = min(remaining, 64)
+            out.append(((step - 1) << 2) | 2)
+            out += offset.to_bytes(2, "little")
+            remaining -= step
+
+        pos += length
+        literal_start = pos
+
+    if literal_start < end:
+        _emit_snappy_literal(out, data[literal_start:])
+    return bytes(out)
+
+
+def internal_key(user_key: bytes, sequence: int) -> bytes:
+    """Build an internal key for a Put of user_key at the given sequence."""
+    return user_key + struct.pack("<Q", (sequence << 8) | _TYPE_VALUE)
+
+
+class _BlockBuilder:
+    """Build a prefix-compressed table block with a restart array."""
+
+    def __init__(self, restart_interval: int = 16) -> None:
+        self.restart_interval = restart_interval
+        self._buffer = bytearray()
+        self._restarts = [0]
+        self._counter = 0
+        self._last_key = b""
+
+    def __bool__(self) -> bool:
+        return bool(self._buffer)
+
+    def add(self, key: bytes, value: bytes) -> None:
+        shared = 0
+        if self._counter < self.restart_interval:
+            limit = min(len(key), len(self._last_key))
+            while shared < limit and key[shared] == self._last_key[shared]:
+                shared += 1
+        else:
+            self._restarts.append(len(self._buffer))
+            self._counter = 0
+
+        self._buffer += _encode_varint(shared)
+        self._buffer += _encode_varint(len(key) - shared)
+        self._buffer += _encode_varint(len(value))
+        self._buffer += key[shared:]
+        self._buffer += value
+        self._last_key = key
+        self._counter += 1
+
+    def size_estimate(self) -> int:
+        return len(self._buffer) + 4 * len(self._restarts) + 4
+
+    def finish(self) -> bytes:
+        for restart in self._restarts:
+            self._buffer += struct.pack("<I", restart)
+        self._buffer += struct.pack("<I", len(self._restarts))
+        return bytes(self._buffer)
+
+
+def write_table(path: Path, entries: list[tuple[bytes, bytes]],
+                compress: bool = True, block_size: int = 4096) -> int:
+    """Write sorted (internal key, value) pairs as an SSTable.
+
+    Returns the size of the written file.
+    """
+    out = bytearray()
+
+    def write_block(contents: bytes) -> bytes:
+        data = contents
+        compression = _NO_COMPRESSION
+        if compress:
+            compressed = snappy_compress(contents)
+            # LevelDB keeps the raw block unless compression saves >12.5%
+            if len(compressed) < len(contents) - len(contents) // 8:
+                data = compressed
+                compression = _SNAPPY_COMPRESSION
+
+        offset = len(out)
+        trailer = bytes([compression])
+        out.extend(data)
+        out.extend(trailer)
+        out.extend(struct.pack("<I", _mask_crc(crc32c(trailer, crc32c(data)))))
+        return _encode_varint(offset) + _encode_varint(len(data))
+
+    index = _BlockBuilder(restart_interval=1)
+    block = _BlockBuilder()
+    last_key = b""
+    for key, value in entries:
+        block.add(key, value)
+        last_key = key
+        if block.size_estimate() >= block_size:
+            index.add(last_key, write_block(block.finish()))
+            block = _BlockBuilder()
+    if block:
+        index.add(last_key, write_block(block.finish()))
+
+    metaindex_handle = write_block(_BlockBuilder().finish())
+    index_handle = write_block(index.finish())
+
+    footer = metaindex_handle + index_handle
+    footer += b"\0" * (TABLE_FOOTER_SIZE - 8 - len(footer))
+    footer += struct.pack("<Q", TABLE_MAGIC)
+    out.extend(footer)
+
+    path.write_bytes(out)
+    return len(out)
+
+
+def encode_write_batch(sequence: int, puts: list[tuple[bytes, bytes]]) -> bytes:
+    """Serialize Put operations as a WriteBatch starting at sequence."""
+    batch = bytearray(struct.pack("<QI", sequence, len(puts)))
+    for key, value in puts:
+        batch.append(_TYPE_VALUE)
+        batch += _length_prefixed(key)
+        batch += _length_prefixed(value)
+    return bytes(batch)
+
+
+class LogWriter:
+    """Append records to a LevelDB log file using the block framing."""
+
+    def __init__(self, path: Path) -> None:
+        self._file = path.open("wb")
+        self._block_offset = 0
+
+    def __enter__(self) -> "LogWriter":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._file.close()
+
+    def add_record(self, payload: bytes) -> None:
+        pos = 0
+        first = True
+        while True:
+            left = LOG_BLOCK_SIZE - self._block_offset
+            if left < LOG_HEADER_SIZE:
+                # Pad the block trailer and start a new block
+                self._file.write(b"\0" * left)
+                self._block_offset = 0
+                left = LOG_BLOCK_SIZE
+
+            fragment = payload[pos:pos + left - LOG_HEADER_SIZE]
+            pos += len(fragment)
+            last = pos >= len(payload)
+
+            if first and last:
+                record_type = _FULL
+            elif first:
+                record_type = _FIRST
+            elif last:
+                record_type = _LAST
+            else:
+                record_type = _MIDDLE
+
+            crc = _mask_crc(crc32c(fragment, crc32c(bytes([record_type]))))
+            self._file.write(struct.pack("<IHB", crc, len(fragment), record_type))
+            self._file.write(fragment)
+            self._block_offset += LOG_HEADER_SIZE + len(fragment)
+            first = False
+            if last:
+                return
+
+
+def write_manifest(directory: Path, manifest_number: int, log_number: int,
+                   last_sequence: int,
+                   tables: list[tuple[int, int, bytes, bytes]]) -> None:
+    """Write a MANIFEST and CURRENT describing level-0 tables.
+
+    Each table is given as (file number, file size, smallest internal key,
+    largest internal key).
+    """
+    edit = bytearray()
+    edit += _encode_varint(1) + _length_prefixed(b"leveldb.BytewiseComparator")
+    edit += _encode_varint(2) + _encode_varint(log_number)
+    edit += _encode_varint(9) + _encode_varint(0)
+    edit += _encode_varint(3) + _encode_varint(max(log_number, manifest_number) + 1)
+    edit += _encode_varint(4) + _encode_varint(last_sequence)
+    for number, size, smallest, largest in tables:
+        edit += _encode_varint(7) + _encode_varint(0)
+        edit += _encode_varint(number) + _encode_varint(size)
+        edit += _length_prefixed(smallest) + _length_prefixed(largest)
+
+    name = f"MANIFEST-{manifest_number:06d}"
+    with LogWriter(directory / name) as writer:
+        writer.add_record(bytes(edit))
+    (directory / "CURRENT").write_text(name + "\n")
@@ -0,0 +1,124 @@
+"""Collapsing of near-duplicate drafts saved while a message is typed."""
+
+import zlib
+from bisect import bisect
+from collections.abc import Callable, Sequence
+from itertools import pairwise
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .desktop import ChatMessage
+
+KEEP_CHOICES = ("longest", "latest")
+
+# MinHash signature: one-permutation hashing into BINS bins, banded for LSH
+BINS = 32
+ROWS_PER_BAND = 2
+_EMPTY = 1 << 32
+
+
+def shingles(text: str) -> set[int]:
+    """Return hashed word bigrams of a lowercased text.
+
+    The last word is left out, since in a draft saved mid-typing it is
+    usually incomplete and would otherwise never match the finished word.
+    """
+    words = text.lower().split()
+    if len(words) > 2:
+        words.pop()
+    if len(words) < 2:
+        return {zlib.crc32(" ".join(words).encode())}
+    return {
+        zlib.crc32(f"{first} {second}".encode())
+        for first, second in pairwise(words)
+    }
+
+
+def minhash_signature(grams: set[int]) -> list[int]:
+    """Return a one-permutation MinHash signature of a shingle set.
+
+    Each shingle hash is split into a bin number and a value, and every bin
+    keeps its smallest value, so the signature costs one pass over the set.
+    Empty bins borrow the next non-empty bin's value (rotation
+    densification) so small sets still produce comparable signatures.
+    """
+    signature = [_EMPTY] * BINS
+    for gram in grams:
+        bin_index = gram % BINS
+        value = gram // BINS
+        if value < signature[bin_index]:
+            signature[bin_index] = value
+
+    full = [bin_index for bin_index, value in enumerate(signature) if value != _EMPTY]
+    if len(full) < BINS:
+        original = signature[:]
+        for bin_index, value in enumerate(original):
+            if value == _EMPTY:
+                source = full[bisect(full, bin_index) % len(full)]
+                # Offset keeps borrowed values distinct from real ones
+                offset = (source - bin_index) % BINS
+                signature[bin_index] = original[source] + offset * _EMPTY
+    return signature
+
+
+def _rank_key(keep: str) -> Callable[["ChatMessage"], tuple[int, int]]:
+    if keep == "longest":
+        return lambda msg: (len(msg.text), -1 if msg.sequence is None else msg.sequence)
+    if keep == "latest":
+        return lambda msg: (-1 if msg.sequence is None else msg.sequence, len(msg.text))
+    raise ValueError(f"keep must be one of {', '.join(KEEP_CHOICES)}, not {keep!r}")
+
+
+def collapse_near_duplicates(messages: Sequence["ChatMessage"], keep: str = "longest",
+                             threshold: float = 0.8) -> list["ChatMessage"]:
+    """Drop messages that are near-duplicates of a preferred one.
+
+    Two messages of the same conversation are near-duplicates when at least
+    `threshold` of the shingles of the smaller one also occur in the other,
+    which covers the prefixes and small edits Claude Desktop saves as a
+    draft is typed. Of each such pair, the shorter (or older, with
+    keep="latest") message is dropped. The rest keep their order.
+
+    Candidate pairs come from MinHash LSH buckets, so only messages likely
+    to be similar are compared and the cost stays roughly linear.
+    """
+    rank = _rank_key(keep)
+    sets = [shingles(msg.text) for msg in messages]
+
+    buckets: dict[tuple[str, int, tuple[int, ...]], list[int]] = {}
+    for row, grams in enumerate(sets):
+        signature = minhash_signature(grams)
+        conversation_id = messages[row].conversation_id
+        for band in range(0, BINS, ROWS_PER_BAND):
+            key = (conversation_id, band, tuple(signature[band:band + ROWS_PER_BAND]))
+            buckets.setdefault(key, []).append(row)
+
+    # Position in preference order; the row index breaks ties
+    order = sorted(range(len(messages)), key=lambda row: (rank(messages[row]), row))
+    position = [0] * len(messages)
+    for pos, row in enumerate(order):
+        position[row] = pos
+
+    dropped = bytearray(len(messages))
+    checked: set[int] = set()
+    for rows in buckets.values():
+        rows.sort(key=position.__getitem__)
+        for i, row in enumerate(rows):
+            if dropped[row]:
+                continue
+            grams = sets[row]
+            # A message only needs one preferred near-duplicate to be dropped,
+            # so check the closest-ranked candidates first and stop there
+            for other in rows[i + 1:]:
+                pair = row * len(messages) + other
+                if pair in checked:
+                    continue
+                checked.add(pair)
+
+                other_grams = sets[other]
+                smaller = min(len(grams), len(other_grams))
+                if len(grams & other_grams) >= threshold * smaller:
+                    dropped[row] = 1
+                    break
+
+    return [msg for row, msg in enumerate(messages) if not dropped[row]]
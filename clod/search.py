@@ -0,0 +1,279 @@
+"""Inverted full-text index with BM25 ranking for chat history search."""
+
+import heapq
+import math
+import re
+from array import array
+from collections import Counter
+from collections.abc import Sequence
+
+TOKEN_RE = re.compile(r"\w+")
+QUERY_RE = re.compile(r'"([^"]*)"|(\S+)')
+
+# Postings (token -> packed doc ids) and packed document lengths
+IndexState = tuple[dict[str, bytes], bytes]
+
+# BM25 tuning parameters
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+
+def parse_query(query: str) -> list[list[str]]:
+    """Parse a query into OR-separated groups of AND-ed terms.
+
+    Bare words are AND-ed together, the keyword OR starts a new group, and
+    double-quoted text is matched as a single phrase.
+    """
+    groups: list[list[str]] = [[]]
+    for match in QUERY_RE.finditer(query):
+        phrase, word = match.groups()
+        if word == "OR":
+            if groups[-1]:
+                groups.append([])
+            continue
+        term = phrase if phrase is not None else word
+        if term:
+            groups[-1].append(term)
+    return [group for group in groups if group]
+
+
+def _trigrams(token: str) -> set[str]:
+    return {token[i:i + 3] for i in range(len(token) - 2)}
+
+
+def _bigrams(token: str) -> list[str]:
+    padded = f" {token} "
+    return [padded[i:i + 2] for i in range(len(padded) - 1)]
+
+
+def max_edits(word: str) -> int:
+    """Number of typos tolerated in a fuzzy query word of this length."""
+    if len(word) <= 4:
+        return 1
+    return 2 if len(word) <= 8 else 3
+
+
+def edit_distance(a: str, b: str, limit: int) -> int:
+    """Optimal string alignment distance, or limit + 1 once it exceeds limit.
+
+    Counts insertions, deletions, substitutions and adjacent transpositions,
+    and stops early as soon as no alignment can stay within the limit.
+    """
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+
+    previous2: list[int] = []
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i] + [0] * len(b)
+        for j, char_b in enumerate(b, 1):
+            cost = 0 if char_a == char_b else 1
+            value = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and char_a == b[j - 2] and a[i - 2] == char_b:
+                value = min(value, previous2[j - 2] + 1)
+            current[j] = value
+        if min(current) > limit:
+            return limit + 1
+        previous2, previous = previous, current
+    return min(previous[-1], limit + 1)
+
+
+class SearchIndex:
+    """Token inverted index with a trigram index over the vocabulary.
+
+    Terms match as substrings, like the old linear scan: the trigram index
+    finds vocabulary tokens containing each word of a term, their postings
+    give candidate documents, and only the candidates are verified against
+    the original text.
+    """
+
+    def __init__(self, texts: Sequence[str], state: IndexState | None = None) -> None:
+        """Index texts, or adopt the postings saved by state() for the same texts."""
+        self.texts = texts
+        self._postings: dict[str, array] = {}
+        self._lengths = array("I")
+
+        if state is not None:
+            postings, lengths = state
+            self._lengths.frombytes(lengths)
+            if len(self._lengths) != len(texts):
+                raise ValueError("Saved index does not match the texts")
+            for token, doc_ids in postings.items():
+                self._postings[token] = array("I", doc_ids)
+
+        for doc_id, text in enumerate(texts if state is None else ()):
+            tokens = TOKEN_RE.findall(text.lower())
+            self._lengths.append(len(tokens))
+            for token in set(tokens):
+                postings = self._postings.get(token)
+                if postings is None:
+                    postings = self._postings[token] = array("I")
+                postings.append(doc_id)
+
+        self._vocab_trigrams: dict[str, list[str]] = {}
+        for token in self._postings:
+            for gram in _trigrams(token):
+                self._vocab_trigrams.setdefault(gram, []).append(token)
+
+        total_length = sum(self._lengths)
+        self._avg_length = total_length / len(texts) if texts else 0.0
+        # Built on the first fuzzy query
+        self._vocab_bigrams: dict[str, list[str]] | None = None
+
+    def __len__(self) -> int:
+        return len(self.texts)
+
+    def state(self) -> IndexState:
+        """Return the postings and document lengths as plain bytes for saving."""
+        postings = {token: ids.tobytes() for token, ids in self._postings.items()}
+        return postings, self._lengths.tobytes()
+
+    def _tokens_containing(self, piece: str) -> list[str]:
+        """Return vocabulary tokens that contain the given word fragment."""
+        if len(piece) < 3:
+            return [token for token in self._postings if piece in token]
+
+        candidates: set[str] | None = None
+        for gram in _trigrams(piece):
+            tokens = self._vocab_trigrams.get(gram)
+            if not tokens:
+                return []
+            candidates = set(tokens) if candidates is None else candidates & set(tokens)
+        return [token for token in candidates or () if piece in token]
+
+    def _candidates(self, term: str) -> set[int] | None:
+        """Return documents that may contain the term (None means all)."""
+        result: set[int] | None = None
+        for piece in TOKEN_RE.findall(term):
+            docs: set[int] = set()
+            for token in self._tokens_containing(piece):
+                docs.update(self._postings[token])
+            result = docs if result is None else result & docs
+            if not result:
+                return set()
+        return result
+
+    def search(self, query: str, case_sensitive: bool = False,
+               limit: int | None = None) -> tuple[list[int], int]:
+        """Return the top-ranked document ids and the total match count."""
+        scores: dict[int, float] = {}
+        lowered: dict[int, str] = {}
+        num_docs = len(self.texts)
+
+        def text_for(doc_id: int) -> str:
+            if case_sensitive:
+                return self.texts[doc_id]
+            text = lowered.get(doc_id)
+            if text is None:
+                text = lowered[doc_id] = self.texts[doc_id].lower()
+            return text
+
+        for group in parse_query(query):
+            terms = group if case_sensitive else [term.lower() for term in group]
+            matched: set[int] | None = None
+            weights = []
+
+            for term in terms:
+                candidates = self._candidates(term.lower())
+                pool = range(num_docs) if candidates is None else candidates
+                if matched is not None:
+                    pool = matched if candidates is None else matched & candidates
+
+                matched = {doc_id for doc_id in pool if term in text_for(doc_id)}
+                doc_freq = num_docs if candidates is None else len(candidates)
+                weights.append(
+                    math.log(1 + (num_docs - doc_freq + 0.5) / (doc_freq + 0.5))
+                )
+                if not matched:
+                    break
+
+            for doc_id in matched or ():
+                score = self._score(doc_id, terms, weights, text_for(doc_id))
+                if score > scores.get(doc_id, -1.0):
+                    scores[doc_id] = score
+
+        # Ties keep the original message order
+        top = heapq.nlargest(
+            len(scores) if limit is None else limit,
+            scores.items(),
+            key=lambda item: (item[1], -item[0]),
+        )
+        return [doc_id for doc_id, _ in top], len(scores)
+
+    def _score(self, doc_id: int, terms: list[str], weights: list[float],
+               text: str) -> float:
+        """Compute the BM25 score of a matched document."""
+        length_norm = BM25_K1 * (
+            1 - BM25_B + BM25_B * self._lengths[doc_id] / (self._avg_length or 1)
+        )
+        score = 0.0
+        for term, weight in zip(terms, weights, strict=True):
+            freq = text.count(term)
+            score += weight * freq * (BM25_K1 + 1) / (freq + length_norm)
+        return score
+
+    def _idf(self, token: str) -> float:
+        doc_freq = len(self._postings[token])
+        return math.log(1 + (len(self.texts) - doc_freq + 0.5) / (doc_freq + 0.5))
+
+    def similar_tokens(self, word: str) -> dict[str, float]:
+        """Map vocabulary tokens within a few typos of a word to a similarity.
+
+        Padded bigrams shared with the word pick the candidates (an edit can
+        only destroy a handful of them), so the exact edit distance is only
+        computed for tokens that could possibly be close enough.
+        """
+        if self._vocab_bigrams is None:
+            self._vocab_bigrams = {}
+            for token in self._postings:
+                for gram in set(_bigrams(token)):
+                    self._vocab_bigrams.setdefault(gram, []).append(token)
+
+        word = word.lower()
+        limit = max_edits(word)
+        grams = set(_bigrams(word))
+        min_shared = max(1, len(grams) - 3 * limit)
+
+        shared: Counter[str] = Counter()
+        for gram in grams:
+            shared.update(self._vocab_bigrams.get(gram, ()))
+
+        similar = {}
+        for token, count in shared.items():
+            if count < min_shared or abs(len(token) - len(word)) > limit:
+                continue
+            distance = edit_distance(word, token, limit)
+            if distance <= limit:
+                similar[token] = 1 - distance / max(len(word), len(token))
+        return similar
+
+    def fuzzy_terms(self, query: str) -> list[dict[str, float]]:
+        """Return the similar vocabulary tokens for each word of a query."""
+        return [self.similar_tokens(word) for word in TOKEN_RE.findall(query)]
+
+    def fuzzy_search(self, query: str,
+                     limit: int | None = None) -> tuple[list[int], int]:
+        """Rank documents by how closely their tokens match the query words.
+
+        Each query word contributes the best similarity-weighted IDF of any
+        close token in the document, so messages matching more of the words,
+        with fewer typos, rank first.
+        """
+        scores: dict[int, float] = {}
+        for similar in self.fuzzy_terms(query):
+            best: dict[int, float] = {}
+            for token, similarity in similar.items():
+                weight = similarity * self._idf(token)
+                for doc_id in self._postings[token]:
+                    if weight > best.get(doc_id, 0.0):
+                        best[doc_id] = weight
+            for doc_id, weight in best.items():
+                scores[doc_id] = scores.get(doc_id, 0.0) + weight
+
+        # Ties keep the original message order
+        top = heapq.nlargest(
+            len(scores) if limit is None else limit,
+            scores.items(),
+            key=lambda item: (item[1], -item[0]),
+        )
+        return [doc_id for doc_id, _ in top], len(scores)
@@ -1,21 +1,551 @@
 """Tmux control utilities for Claude workspace management."""
 
+import codecs
+import contextlib
+import hashlib
+import itertools
+import json
+import os
+import re
+import select
+import shlex
 import subprocess
+import tempfile
+import threading
 import time
+from collections.abc import Sequence
+from dataclasses import asdict, dataclass, fields
 from datetime import datetime
 from pathlib import Path
+from types import TracebackType
+from typing import Any
+
+from .desktop_cache import default_cache_dir
+
+_SAFE_ARG_RE = re.compile(r"[\w@%+=:,./-]+")
+_ESCAPES = {"\\": "\\\\", '"': '\\"', "$": "\\$", "\n": "\\n", "\r": "\\r",
+            "\t": "\\t", "\x1b": "\\e"}
+
+
+def quote_tmux_arg(arg: str) -> str:
+    """Quote an argument for tmux's command parser.
+
+    Double quotes keep everything on one line, so newlines and other control
+    characters are written as escapes tmux decodes back. A leading ~ is
+    escaped too, as tmux expands it to a home directory even when quoted.
+    """
+    if _SAFE_ARG_RE.fullmatch(arg):
+        return arg
+    escaped = ["\\"] if arg.startswith("~") else []
+    for char in arg:
+        if char in _ESCAPES:
+            escaped.append(_ESCAPES[char])
+        elif char < " " or char == "\x7f":
+            escaped.append(f"\\u{ord(char):04x}")
+        else:
+            escaped.append(char)
+    return '"' + "".join(escaped) + '"'
+
+
+# CSI/OSC sequences and other escapes, plus carriage returns
+_ANSI_RE = re.compile(
+    r"\x1b(?:\[[0-?]*[ -/]*[@-~]|\][^\x07\x1b]*(?:\x07|\x1b\\)|[@-Z\\-_])|\r"
+)
+# How far back each new chunk re-runs the pattern, so matches can span reads
+_MATCH_OVERLAP = 4096
+# Longest unterminated escape held back for the next read before giving up
+_MAX_PARTIAL_ESCAPE = 1024
+
+# Longer input goes through a paste buffer instead of send-keys
+PASTE_THRESHOLD = 4096
+_buffer_ids = itertools.count()
+_fifo_ids = itertools.count()
+
+# Unlikely to appear in pane titles or commands
+_PANE_SEPARATOR = "\x1f"
+
+
+@dataclass
+class PaneInfo:
+    """One pane as reported by list-panes."""
+    pane_id: str
+    window_index: int
+    window_name: str
+    pane_index: int
+    pane_pid: int
+    pane_current_command: str
+    pane_active: bool
+    window_active: bool
+    # Unix time of the last activity in the pane's window
+    window_activity: int
+
+
+class ControlParser:
+    """Assemble reply blocks from the lines a `tmux -C` client prints.
+
+    Each command is answered by a %begin/%end (or %error) block carrying the
+    command's number; lines outside a block are notifications and skipped.
+    """
+
+    def __init__(self) -> None:
+        self.exited = False
+        self._block: str | None = None
+        self._body: list[str] = []
+
+    def feed(self, raw: bytes) -> subprocess.CompletedProcess[str] | None:
+        """Consume one line, returning the reply it completes, if any."""
+        line = raw.decode(errors="replace").rstrip("\n")
+
+        if self._block is None:
+            if line.startswith("%begin "):
+                # "%begin <time> <command number> <flags>"
+                self._block = line.split(" ")[2]
+                self._body = []
+            elif line.startswith("%exit"):
+                self.exited = True
+            return None
+
+        closes = line.startswith(("%end ", "%error "))
+        if closes and line.split(" ")[2:3] == [self._block]:
+            output = "".join(f"{text}\n" for text in self._body)
+            self._block = None
+            if line.startswith("%end "):
+                return subprocess.CompletedProcess([], 0, output, "")
+            return subprocess.CompletedProcess([], 1, "", output)
+        self._body.append(line)
+        return None
+
+
+class ControlClient:
+    """A persistent `tmux -C` control-mode client attached to one session.
+
+    Commands are written one per line and each reply is read from its
+    %begin/%end (or %error) block, so running a command costs a round trip
+    to the tmux server instead of spawning a tmux process. Asynchronous
+    notifications between replies are skipped.
+    """
+
+    def __init__(self, session_name: str) -> None:
+        self.session_name = session_name
+        self._process: subprocess.Popen[bytes] | None = None
+        self._lock = threading.Lock()
+
+    @property
+    def connected(self) -> bool:
+        """Whether the control client is running."""
+        return self._process is not None and self._process.poll() is None
+
+    def connect(self) -> bool:
+        """Attach a control client to the session, returning False on failure."""
+        self.close()
+        try:
+            self._process = subprocess.Popen(
+                ["tmux", "-C", "attach-session", "-t", self.session_name],
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+            )
+        except OSError:
+            self._process = None
+            return False
+
+        # The attach itself is answered like any other command
+        reply = self._read_reply()
+        if reply is None or reply.returncode != 0:
+            self.close()
+            return False
+
+        # Pane output and our (absent) terminal size are of no interest
+        self.run("refresh-client", "-f", "no-output,ignore-size")
+        return True
+
+    def run(self, *args: str) -> subprocess.CompletedProcess[str] | None:
+        """Run a tmux command, or return None if the client has gone away.
+
+        A bare ";" argument separates chained commands, as on the tmux
+        command line. Each command gets its own reply block, and tmux stops
+        at the first one that fails.
+        """
+        with self._lock:
+            process = self._process
+            if process is None or process.stdin is None or process.poll() is not None:
+                return None
+
+            line = " ".join(";" if arg == ";" else quote_tmux_arg(arg) for arg in args)
+            try:
+                process.stdin.write(line.encode() + b"\n")
+                process.stdin.flush()
+            except OSError:
+                self.close()
+                return None
+
+            stdout, stderr = [], []
+            for _ in range(args.count(";") + 1):
+                reply = self._read_reply()
+                if reply is None:
+                    self.close()
+                    return None
+                stdout.append(reply.stdout)
+                stderr.append(reply.stderr)
+                if reply.returncode != 0:
+                    break
+            return subprocess.CompletedProcess(["tmux", *args], reply.returncode,
+                                               "".join(stdout), "".join(stderr))
+
+    def _read_reply(self) -> subprocess.CompletedProcess[str] | None:
+        """Read lines up to the end of the next reply block."""
+        assert self._process is not None and self._process.stdout is not None
+        stdout = self._process.stdout
+
+        parser = ControlParser()
+        while not parser.exited:
+            raw = stdout.readline()
+            if not raw:
+                return None
+            reply = parser.feed(raw)
+            if reply is not None:
+                return reply
+        return None
+
+    def close(self) -> None:
+        """Detach the control client."""
+        process, self._process = self._process, None
+        if process is None:
+            return
+        if process.stdin is not None:
+            with contextlib.suppress(OSError):
+                process.stdin.close()
+        try:
+            process.wait(timeout=1)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+        if process.stdout is not None:
+            process.stdout.close()
+
+
+# Lines fingerprinted to find the end of the previous delta read by content
+ANCHOR_LINES = 3
+
+
+def line_anchor(lines: Sequence[str]) -> str | None:
+    """Fingerprint the last few of some lines, or None if there are none."""
+    if not lines:
+        return None
+    return hashlib.sha1("\n".join(lines[-ANCHOR_LINES:]).encode()).hexdigest()[:16]
+
+
+def lines_after_anchor(
+    lines: Sequence[str], anchor: str, size: int
+) -> list[str] | None:
+    """Return the lines after the last run of `size` lines matching anchor.
+
+    Returns None if the anchored lines aren't there (e.g. scrolled off).
+    """
+    for end in range(len(lines), size - 1, -1):
+        if line_anchor(lines[end - size:end]) == anchor:
+            return [*lines[end:]]
+    return None
+
+
+class PaneCursors:
+    """Per-pane read positions for delta reads, kept between invocations."""
+
+    def __init__(self, path: Path | None = None) -> None:
+        self.path = path or default_cache_dir() / "tmux-cursors.json"
+        self._cursors: dict[str, dict[str, Any]] = {}
+        try:
+            with self.path.open() as f:
+                self._cursors = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            pass
+
+    def get(self, key: str) -> dict[str, Any] | None:
+        """Return the stored cursor for a pane target."""
+        return self._cursors.get(key)
+
+    def set(self, key: str, cursor: dict[str, Any]) -> None:
+        """Store a pane's cursor and write the file."""
+        self._cursors[key] = cursor
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            # Write atomically so concurrent readers never see a partial file
+            tmp_path = self.path.with_suffix(".tmp")
+            with tmp_path.open("w") as f:
+                json.dump(self._cursors, f)
+            tmp_path.replace(self.path)
+        except OSError:
+            pass
+
+
+@dataclass
+class WaitResult:
+    """Outcome of waiting on a pane's output."""
+    # "match", "idle" or "timeout"
+    reason: str
+    # Output seen while waiting, with terminal escapes removed
+    output: str
+    elapsed: float
+    match: str | None = None
+
+
+class OutputMatcher:
+    """Collect streamed pane output and match a regex against it.
+
+    Terminal escapes are stripped and bytes are decoded incrementally, so
+    multi-byte characters and escapes split across reads survive. Each chunk
+    is only searched together with the tail of what came before.
+    """
+
+    def __init__(self, pattern: str | None = None) -> None:
+        # The text is the whole stream so far, so ^ and $ match at every line
+        self.regex = re.compile(pattern, re.MULTILINE) if pattern else None
+        self.text = ""
+        self._decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        self._searched = 0
+        # An escape sequence cut off at the end of the last read
+        self._partial = ""
+
+    def feed(self, data: bytes) -> str | None:
+        """Add output, returning the matched text once the pattern matches."""
+        chunk = self._partial + self._decoder.decode(data)
+        start = chunk.rfind("\x1b")
+        if (start != -1 and len(chunk) - start < _MAX_PARTIAL_ESCAPE
+                and not _ANSI_RE.match(chunk, start)):
+            chunk, self._partial = chunk[:start], chunk[start:]
+        else:
+            self._partial = ""
+        self.text += strip_ansi(chunk)
+        if self.regex is None:
+            return None
+        found = self.regex.search(self.text, max(0, self._searched - _MATCH_OVERLAP))
+        self._searched = len(self.text)
+        return found.group() if found else None
+
+
+def create_output_fifo(directory: Path | None = None) -> tuple[str, int]:
+    """Create a FIFO for pane output, returning its path and read fd.
+
+    By default the FIFO gets a private directory for pipe-pane to write
+    to; given the tap directory of a transcript recorder, it is added there
+    for the recorder to copy the pane's output into.
+
+    The FIFO is opened read-write, which keeps a writer around so select()
+    never reports EOF before (or after) its writer connects.
+    """
+    if directory is None:
+        fifo = Path(tempfile.mkdtemp(prefix="clod-pane-")) / "output"
+    else:
+        directory.mkdir(parents=True, exist_ok=True)
+        fifo = directory / f"{os.getpid()}-{next(_fifo_ids)}"
+    os.mkfifo(fifo, 0o600)
+    return str(fifo), os.open(fifo, os.O_RDWR | os.O_NONBLOCK)
+
+
+def remove_output_fifo(fifo: str, fd: int) -> None:
+    """Close and delete a FIFO made by create_output_fifo."""
+    os.close(fd)
+    path = Path(fifo)
+    path.unlink(missing_ok=True)
+    # Only goes once empty, so a tap directory in use by others stays
+    with contextlib.suppress(OSError):
+        path.parent.rmdir()
+
+
+def strip_ansi(text: str) -> str:
+    """Remove terminal escape sequences and carriage returns from pane output."""
+    return _ANSI_RE.sub("", text)
+
+
+# Pane option holding the tap directory of a running transcript recorder
+RECORD_OPTION = "@clod-record-taps"
+
+
+def pipe_pane_args(target: str, fifo: str) -> list[str]:
+    """Arguments for pipe-pane to copy a pane's output into a FIFO."""
+    return ["pipe-pane", "-O", "-t", target, f"exec cat > {shlex.quote(fifo)}"]
+
+
+def close_pipe_args(target: str) -> list[str]:
+    """Arguments for pipe-pane to close a pane's pipe."""
+    # pipe-pane without a command closes the pane's pipe
+    return ["pipe-pane", "-t", target]
+
+
+def recorder_args(target: str) -> list[str]:
+    """Arguments for display-message to print a pane's pipe and recorder state."""
+    return ["display-message", "-p", "-t", target,
+            f"#{{pane_pipe}} #{{{RECORD_OPTION}}}"]
+
+
+def recorder_taps(output: str) -> Path | None:
+    """Return the tap directory of a pane's live recorder, from recorder_args output.
+
+    A pane has only one pipe, so streaming the output of a recorded pane
+    goes through its recorder rather than replacing it.
+    """
+    piped, _, taps = output.strip().partition(" ")
+    return Path(taps) if piped == "1" and taps else None
+
+
+class PaneStream:
+    """A pane's output, streamed into a FIFO by pipe-pane or its recorder.
+
+    Waiting blocks in select() on the FIFO, so it wakes up as soon as the
+    pane prints something instead of polling capture-pane.
+    """
+
+    def __init__(self, controller: "TmuxController", target: str) -> None:
+        self.controller = controller
+        self.target = target
+        self._fifo: str | None = None
+        self._fd: int | None = None
+        self._piped = False
+
+    def __enter__(self) -> "PaneStream":
+        state = self.controller._run_tmux(*recorder_args(self.target))
+        taps = recorder_taps(state.stdout) if state.returncode == 0 else None
+        self._fifo, self._fd = create_output_fifo(taps)
+        if taps is not None:
+            return self
+
+        result = self.controller._run_tmux(*pipe_pane_args(self.target, self._fifo))
+        if result.returncode != 0:
+            self._cleanup()
+            raise RuntimeError(f"pipe-pane failed: {result.stderr.strip()}")
+        self._piped = True
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        tb: TracebackType | None,
+    ) -> None:
+        if self._piped:
+            self.controller._run_tmux(*close_pipe_args(self.target))
+            self._piped = False
+        self._cleanup()
+
+    def _cleanup(self) -> None:
+        if self._fifo is not None and self._fd is not None:
+            remove_output_fifo(self._fifo, self._fd)
+        self._fifo = self._fd = None
+
+    def wait(self, pattern: str | None = None, idle_ms: int | None = None,
+             timeout: float = 30.0) -> WaitResult:
+        """Wait until new output matches pattern, the pane is idle, or timeout.
+
+        Each call only sees output that arrives after it starts. Idle means
+        no output for idle_ms, counted from the call or the last output.
+        """
+        assert self._fd is not None, "PaneStream must be used as a context manager"
+        matcher = OutputMatcher(pattern)
+        start = time.monotonic()
+        last_output = start
+
+        while True:
+            now = time.monotonic()
+            wait = start + timeout - now
+            if idle_ms is not None:
+                wait = min(wait, last_output + idle_ms / 1000 - now)
+            if wait <= 0:
+                reason = "timeout" if now - start >= timeout else "idle"
+                return WaitResult(reason, matcher.text, now - start)
+
+            readable, _, _ = select.select([self._fd], [], [], wait)
+            if not readable:
+                continue
+            try:
+                data = os.read(self._fd, 64 * 1024)
+            except BlockingIOError:
+                continue
+            last_output = time.monotonic()
+            found = matcher.feed(data)
+            if found is not None:
+                return WaitResult("match", matcher.text, last_output - start, found)
 
 
 class TmuxController:
-    """Control tmux sessions for Claude workspace management."""
+    """Control tmux sessions for Claude workspace management.
+
+    By default commands go over a persistent control-mode client once the
+    session exists, falling back to running the tmux binary per command
+    when it does not (e.g. before setup) or when control_mode is False.
+    """
 
-    def __init__(self, session_name: str = "claude-workspace"):
+    def __init__(self, session_name: str = "claude-workspace",
+                 control_mode: bool = True) -> None:
         self.session_name = session_name
         self.target_pane = f"{session_name}:cc.1"
+        self.control_mode = control_mode
+        self._control: ControlClient | None = None
+        # Avoid retrying the attach on every command while the session is missing
+        self._attach_failed = False
+        self._cursors: PaneCursors | None = None
+
+    def __enter__(self) -> "TmuxController":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        tb: TracebackType | None,
+    ) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Detach the control-mode client, if one is connected."""
+        if self._control is not None:
+            self._control.close()
+            self._control = None
+
+    def _control_client(self) -> ControlClient | None:
+        """Return a connected control client, attaching one if possible."""
+        if not self.control_mode:
+            return None
+        if self._control is not None:
+            if self._control.connected:
+                return self._control
+            self.close()
+        if self._attach_failed:
+            return None
+
+        self._control = ControlClient(self.session_name)
+        if not self._control.connect():
+            self._control = None
+            self._attach_failed = True
+        return self._control
 
     def _run_tmux(self, *args: str) -> subprocess.CompletedProcess:
         """Run a tmux command and return the result."""
-        return subprocess.run(["tmux"] + list(args), capture_output=True, text=True)
+        control = self._control_client()
+        if control is not None:
+            result = control.run(*args)
+            if result is not None:
+                return result
+            # The session went away under the client; retry once it is back
+            self.close()
+            self._attach_failed = True
+
+        result = subprocess.run(["tmux", *args], capture_output=True, text=True)
+        if args and args[0] == "new-session" and result.returncode == 0:
+            self._attach_failed = False
+        return result
+
+    def run_batch(self, *commands: Sequence[str]) -> subprocess.CompletedProcess:
+        """Run several tmux commands as one invocation, chained with ';'.
+
+        tmux stops at the first command that fails, and the result reports
+        the output of every command that ran.
+        """
+        args: list[str] = []
+        for command in commands:
+            if args:
+                args.append(";")
+            args.extend(command)
+        return self._run_tmux(*args)
 
     def has_session(self) -> bool:
         """Check if the Claude session exists."""
@@ -29,21 +559,32 @@ class TmuxController:
             return False
 
         cwd = str(working_dir or Path.cwd())
-
-        # Create session with first window named "cc" and split vertically (85% top user, 15% bottom Claude)
-        self._run_tmux("new-session", "-d", "-s", self.session_name, "-c", cwd, "-n", "cc")
-        self._run_tmux("split-window", "-v", "-p", "15", "-t", f"{self.session_name}:cc", "-c", cwd)
-
-        # Create second window named "pm2" running pm2 monitor
-        self._run_tmux("new-window", "-t", self.session_name, "-c", cwd, "-n", "pm2", "pm2 monit")
-
-        # Switch back to the cc window
-        self._run_tmux("select-window", "-t", f"{self.session_name}:cc")
-
-        # Send initial messages to Claude pane in cc window
         timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        self.send_keys(f"echo 'Claude control pane ready ({timestamp})'")
-        self.send_keys(f"echo 'Working directory: {cwd}'")
+        greetings = [
+            f"echo 'Claude control pane ready ({timestamp})'",
+            f"echo 'Working directory: {cwd}'",
+        ]
+
+        # One tmux invocation builds the whole workspace
+        cc_window = f"{self.session_name}:cc"
+        result = self.run_batch(
+            # First window "cc" split vertically (85% top user, 15% bottom Claude)
+            ("new-session", "-d", "-s", self.session_name, "-c", cwd, "-n", "cc"),
+            ("split-window", "-v", "-p", "15", "-t", cc_window, "-c", cwd),
+            # Second window "pm2" running pm2 monitor
+            ("new-window", "-t", self.session_name, "-c", cwd, "-n", "pm2",
+             "pm2 monit"),
+            # Switch back to the cc window
+            ("select-window", "-t", cc_window),
+            # Initial messages for the Claude pane in the cc window
+            *(("send-keys", "-t", self.target_pane, greeting, "Enter")
+              for greeting in greetings),
+        )
+        if result.returncode != 0:
+            print(f"Failed to create workspace: {result.stderr.strip()}")
+            return False
+        for greeting in greetings:
+            print(f"Sending command to Claude pane: {greeting}")
 
         print(
             f"Claude workspace created! Use 'tmux attach -t {self.session_name}' to view"
@@ -52,21 +593,56 @@ class TmuxController:
         print("Or press prefix+c to switch to it from existing sessions")
         return True
 
-    def send_keys(self, command: str) -> bool:
-        """Send a command to the Claude pane."""
+    def send_keys(self, command: str, paste: bool | None = None) -> bool:
+        """Send a command to the Claude pane.
+
+        paste delivers it through a paste buffer (see paste_text); by default
+        that happens for commands longer than PASTE_THRESHOLD.
+        """
         if not self.has_session():
             print("Claude session doesn't exist. Run setup first.")
             return False
 
         print(f"Sending command to Claude pane: {command}")
+        if paste or (paste is None and len(command) > PASTE_THRESHOLD):
+            return self.paste_text(self.target_pane, command, enter=True)
         result = self._run_tmux("send-keys", "-t", self.target_pane, command, "Enter")
         return result.returncode == 0
 
-    def read_output(self, lines: int = 20) -> str:
-        """Read output from the Claude pane."""
+    def paste_text(self, target: str, text: str, enter: bool = False) -> bool:
+        """Deliver text to a pane in one shot through a paste buffer.
+
+        The text is streamed to load-buffer over stdin, so its size is not
+        bound by argument limits and tmux does not interpret it key by key.
+        paste-buffer -p wraps it in bracketed paste when the application
+        has asked for that, and -d deletes the buffer afterwards.
+        """
+        buffer_name = f"clod-{os.getpid()}-{next(_buffer_ids)}"
+        loaded = subprocess.run(
+            ["tmux", "load-buffer", "-b", buffer_name, "-"],
+            input=text,
+            capture_output=True,
+            text=True,
+        )
+        if loaded.returncode != 0:
+            return False
+
+        commands = [("paste-buffer", "-p", "-d", "-b", buffer_name, "-t", target)]
+        if enter:
+            commands.append(("send-keys", "-t", target, "Enter"))
+        return self.run_batch(*commands).returncode == 0
+
+    def read_output(self, lines: int = 20, since_last: bool = False) -> str:
+        """Read output from the Claude pane.
+
+        With since_last, only the lines completed since the previous such
+        read are returned (see read_delta).
+        """
         if not self.has_session():
             print("Claude session doesn't exist. Run setup first.")
             return ""
+        if since_last:
+            return self.read_delta(self.target_pane, lines)
 
         result = self._run_tmux("capture-pane", "-t", self.target_pane, "-p")
         if result.returncode != 0:
@@ -75,27 +651,42 @@ class TmuxController:
         output_lines = result.stdout.strip().split("\n")
         return "\n".join(output_lines[-lines:]) if output_lines else ""
 
+    def list_panes(self) -> list[PaneInfo]:
+        """List the session's panes with a single format query."""
+        pane_fields = fields(PaneInfo)
+        names = ["session_name", *(field.name for field in pane_fields)]
+        template = _PANE_SEPARATOR.join(f"#{{{name}}}" for name in names)
+        result = self._run_tmux("list-panes", "-a", "-F", template)
+        if result.returncode != 0:
+            return []
+
+        panes = []
+        for line in result.stdout.splitlines():
+            session_name, *values = line.split(_PANE_SEPARATOR)
+            if session_name != self.session_name or len(values) != len(pane_fields):
+                continue
+            panes.append(PaneInfo(*(
+                value == "1" if field.type is bool else field.type(value)
+                for field, value in zip(pane_fields, values, strict=True)
+            )))
+        return panes
+
     def status(self) -> dict:
-        """Get status information about the Claude session."""
-        if not self.has_session():
-            return {"exists": False}
+        """Get status information about the Claude session.
 
-        panes_result = self._run_tmux("list-panes", "-t", self.session_name)
-        windows_result = self._run_tmux("list-windows", "-t", self.session_name)
+        Everything comes from one list-panes query; a session without panes
+        does not exist.
+        """
+        panes = self.list_panes()
+        if not panes:
+            return {"exists": False}
 
         return {
             "exists": True,
             "session_name": self.session_name,
-            "panes": (
-                len(panes_result.stdout.strip().split("\n"))
-                if panes_result.stdout.strip()
-                else 0
-            ),
-            "windows": (
-                len(windows_result.stdout.strip().split("\n"))
-                if windows_result.stdout.strip()
-                else 0
-            ),
+            "panes": len(panes),
+            "windows": len({pane.window_index for pane in panes}),
+            "pane_details": [asdict(pane) for pane in panes],
         }
 
     def kill_session(self) -> bool:
@@ -110,6 +701,46 @@ class TmuxController:
             return True
         return False
 
+    def start_recording(self, root: Path, segment_bytes: int, compress: str = "gzip",
+                        keep: int = 0) -> list[str]:
+        """Record every pane of the session into transcripts under root.
+
+        Each pane's pipe-pane feeds a recorder process. Its tap directory
+        is stored as a pane option, so output streaming is copied from the
+        recorder instead of taking over the pipe. Panes created later are
+        not recorded. Returns the recorded pane ids.
+        """
+        from .transcript import pane_directory, record_command, tap_directory
+
+        commands = []
+        pane_ids = []
+        for pane in self.list_panes():
+            directory = pane_directory(root, self.session_name, pane.pane_id)
+            recorder = record_command(directory, segment_bytes, compress, keep)
+            commands += [
+                ("pipe-pane", "-O", "-t", pane.pane_id, recorder),
+                ("set-option", "-p", "-t", pane.pane_id, RECORD_OPTION,
+                 str(tap_directory(directory))),
+            ]
+            pane_ids.append(pane.pane_id)
+        if not commands or self.run_batch(*commands).returncode != 0:
+            return []
+        return pane_ids
+
+    def stop_recording(self) -> list[str]:
+        """Stop recording the session's panes, returning the pane ids."""
+        commands = []
+        pane_ids = []
+        for pane in self.list_panes():
+            commands += [
+                ("pipe-pane", "-t", pane.pane_id),
+                ("set-option", "-p", "-u", "-t", pane.pane_id, RECORD_OPTION),
+            ]
+            pane_ids.append(pane.pane_id)
+        if not commands or self.run_batch(*commands).returncode != 0:
+            return []
+        return pane_ids
+
     # REPL-specific methods
     def start_repl(self, command: str, working_dir: Path | None = None) -> bool:
         """Start a REPL session with the specified command."""
@@ -126,12 +757,18 @@ class TmuxController:
             return True
         return False
 
-    def send_input(self, text: str) -> bool:
-        """Send text input without pressing Enter."""
+    def send_input(self, text: str, paste: bool | None = None) -> bool:
+        """Send text input without pressing Enter.
+
+        paste delivers it through a paste buffer (see paste_text); by default
+        that happens for text longer than PASTE_THRESHOLD.
+        """
         if not self.has_session():
             print(f"Session '{self.session_name}' doesn't exist")
             return False
 
+        if paste or (paste is None and len(text) > PASTE_THRESHOLD):
+            return self.paste_text(self.session_name, text)
         result = self._run_tmux("send-keys", "-t", self.session_name, text)
         return result.returncode == 0
 
@@ -151,11 +788,15 @@ class TmuxController:
             return False
 
         if mode == "vim":
-            # Escape + Enter for vim-style interfaces (sent separately with delay)
-            escape_result = self._run_tmux("send-keys", "-t", self.session_name, "Escape")
-            if escape_result.returncode != 0:
-                return False
-            time.sleep(0.1)  # Small delay for vim interface to process Escape
+            # Escape + Enter for vim-style interfaces; Enter is sent once the
+            # interface has finished redrawing after Escape
+            with PaneStream(self, self.session_name) as stream:
+                escape_result = self._run_tmux(
+                    "send-keys", "-t", self.session_name, "Escape"
+                )
+                if escape_result.returncode != 0:
+                    return False
+                stream.wait(idle_ms=50, timeout=1.0)
             result = self._run_tmux("send-keys", "-t", self.session_name, "Enter")
         elif mode == "standard":
             # Just Enter for most REPLs
@@ -166,11 +807,34 @@ class TmuxController:
 
         return result.returncode == 0
 
-    def read_output_with_history(self, lines: int = 20, history_lines: int = 0) -> str:
-        """Read output with optional scroll history."""
+    def wait_for(self, pattern: str | None = None, idle_ms: int | None = None,
+                 timeout: float = 30.0, send: str | None = None) -> WaitResult | None:
+        """Wait for pane output to match a regex, go idle, or time out.
+
+        If send is given it is typed (with Enter) once streaming has started,
+        so none of the command's output can be missed.
+        """
+        if not self.has_session():
+            print(f"Session '{self.session_name}' doesn't exist")
+            return None
+
+        with PaneStream(self, self.session_name) as stream:
+            if send is not None:
+                self._run_tmux("send-keys", "-t", self.session_name, send, "Enter")
+            return stream.wait(pattern, idle_ms, timeout)
+
+    def read_output_with_history(self, lines: int = 20, history_lines: int = 0,
+                                 since_last: bool = False) -> str:
+        """Read output with optional scroll history.
+
+        With since_last, only the lines completed since the previous such
+        read are returned (see read_delta).
+        """
         if not self.has_session():
             print(f"Session '{self.session_name}' doesn't exist")
             return ""
+        if since_last:
+            return self.read_delta(self.session_name, lines)
 
         if history_lines > 0:
             result = self._run_tmux("capture-pane", "-t", self.session_name, "-S", f"-{history_lines}", "-p")
@@ -181,4 +845,87 @@ class TmuxController:
             return ""
 
         output_lines = result.stdout.strip().split("\n")
-        return "\n".join(output_lines[-lines:]) if lines > 0 and output_lines else result.stdout.strip()
+        if lines > 0 and output_lines:
+            return "\n".join(output_lines[-lines:])
+        return result.stdout.strip()
+
+    def read_delta(self, target: str, lines: int = 20) -> str:
+        """Return the lines a pane has completed since the last delta read.
+
+        The position of the cursor line, counted from the top of the
+        scrollback (history_size + cursor_y), is remembered per pane, and
+        only the lines between the old and new position are captured. The
+        cursor line itself is left for the next read, since it may still be
+        changing. The first read of a pane returns the last `lines` lines.
+
+        Once the scrollback reaches history-limit, lines scrolling off the
+        top no longer move that position. The whole scrollback is captured
+        instead and the new lines start after the last lines returned
+        before, found by a fingerprint of their content. If those have
+        scrolled off too, everything still in the scrollback is returned.
+        """
+        if self._cursors is None:
+            self._cursors = PaneCursors()
+        position_format = (
+            "#{pid} #{pane_id} #{history_size} #{cursor_y} #{history_limit}"
+        )
+
+        result = self._run_tmux("display-message", "-p", "-t", target, position_format)
+        if result.returncode != 0:
+            return ""
+        position = result.stdout.strip()
+        previous = self._cursors.get(target)
+
+        # Output may scroll between the two commands; retry until it has not
+        output: list[str] = []
+        for _ in range(3):
+            server, pane_id, history, cursor, history_limit = position.split()
+            history_size, cursor_y = int(history), int(cursor)
+            line = history_size + cursor_y
+            same_pane = previous is not None and (
+                (previous["server"], previous["pane"]) == (server, pane_id)
+            )
+            # A full scrollback drops its oldest tenth, so from there on the
+            # position can stand still (or go back) while output scrolls
+            limit = int(history_limit)
+            by_anchor = same_pane and history_size >= limit - max(1, limit // 10)
+
+            if previous is None or not same_pane:
+                start = cursor_y - lines
+            elif by_anchor:
+                start = -history_size
+            elif previous["line"] > line:
+                # The pane was cleared or reset
+                start = 0
+            else:
+                start = previous["line"] - history_size
+            start = max(start, -history_size)
+            end = cursor_y - 1
+            if end < start:
+                output = []
+                break
+
+            result = self.run_batch(
+                ("capture-pane", "-p", "-t", target, "-S", str(start), "-E", str(end)),
+                ("display-message", "-p", "-t", target, position_format),
+            )
+            if result.returncode != 0:
+                return ""
+            *output, position = result.stdout.splitlines()
+            # A full scrollback doesn't grow, but then content locates the delta
+            if by_anchor or position.split()[2] == history:
+                break
+
+        anchor = previous.get("anchor") if previous is not None and same_pane else None
+        anchor_lines = previous.get("anchor_lines", 0) if previous is not None else 0
+        if by_anchor and anchor is not None:
+            after = lines_after_anchor(output, anchor, anchor_lines)
+            output = output if after is None else after
+        if output:
+            anchor, anchor_lines = line_anchor(output), min(len(output), ANCHOR_LINES)
+
+        self._cursors.set(target, {
+            "server": server, "pane": pane_id, "line": line,
+            "anchor": anchor, "anchor_lines": anchor_lines,
+        })
+        return "\n".join(output)
@@ -0,0 +1,327 @@
+"""Asyncio tmux control for driving many sessions concurrently."""
+
+import asyncio
+import contextlib
+import os
+import subprocess
+import time
+from collections import deque
+from dataclasses import dataclass
+from types import TracebackType
+
+from .tmux import (
+    ControlParser,
+    OutputMatcher,
+    close_pipe_args,
+    create_output_fifo,
+    pipe_pane_args,
+    quote_tmux_arg,
+    recorder_args,
+    recorder_taps,
+    remove_output_fifo,
+)
+
+
+@dataclass
+class SessionResult:
+    """What happened in one session during a broadcast or gather."""
+    session: str
+    ok: bool
+    # "sent", "captured", "match", "idle", "timeout" or "error"
+    reason: str
+    output: str
+    elapsed: float
+    match: str | None = None
+
+
+class AsyncControlClient:
+    """An asyncio `tmux -C` control-mode client.
+
+    Commands may be issued concurrently: they are written in order and a
+    reader task hands each %begin/%end reply block to the oldest waiting
+    command, which is how tmux answers them.
+    """
+
+    def __init__(self) -> None:
+        self._process: asyncio.subprocess.Process | None = None
+        self._pending: deque[
+            asyncio.Future[subprocess.CompletedProcess[str] | None]
+        ] = deque()
+        self._reader: asyncio.Task[None] | None = None
+
+    @property
+    def connected(self) -> bool:
+        """Whether the control client is running."""
+        return self._process is not None and self._process.returncode is None
+
+    async def connect(self, session: str | None = None) -> bool:
+        """Attach to a session (any session if None), returning False on failure."""
+        args = ["tmux", "-C", "attach-session"] + (["-t", session] if session else [])
+        try:
+            self._process = await asyncio.create_subprocess_exec(
+                *args,
+                stdin=asyncio.subprocess.PIPE,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.DEVNULL,
+                limit=1024 * 1024,
+            )
+        except OSError:
+            self._process = None
+            return False
+
+        # The attach itself is answered like any other command
+        attached = asyncio.get_running_loop().create_future()
+        self._pending.append(attached)
+        self._reader = asyncio.create_task(self._read_replies())
+        reply = await attached
+        if reply is None or reply.returncode != 0:
+            await self.close()
+            return False
+
+        # Pane output and our (absent) terminal size are of no interest
+        await self.run("refresh-client", "-f", "no-output,ignore-size")
+        return True
+
+    async def run(self, *args: str) -> subprocess.CompletedProcess[str] | None:
+        """Run one tmux command, or return None if the client has gone away."""
+        process = self._process
+        if process is None or process.stdin is None or not self.connected:
+            return None
+
+        reply = asyncio.get_running_loop().create_future()
+        # Queue and write without awaiting in between, so replies stay in order
+        self._pending.append(reply)
+        line = " ".join(quote_tmux_arg(arg) for arg in args)
+        process.stdin.write(line.encode() + b"\n")
+        with contextlib.suppress(ConnectionError, OSError):
+            await process.stdin.drain()
+        result = await reply
+        if result is None:
+            return None
+        return subprocess.CompletedProcess(["tmux", *args], result.returncode,
+                                           result.stdout, result.stderr)
+
+    async def _read_replies(self) -> None:
+        """Resolve pending commands from reply blocks until the client exits."""
+        assert self._process is not None and self._process.stdout is not None
+        stdout = self._process.stdout
+
+        parser = ControlParser()
+        try:
+            while not parser.exited:
+                raw = await stdout.readline()
+                if not raw:
+                    break
+                reply = parser.feed(raw)
+                if reply is not None and self._pending:
+                    self._pending.popleft().set_result(reply)
+        finally:
+            while self._pending:
+                self._pending.popleft().set_result(None)
+
+    async def close(self) -> None:
+        """Detach the control client."""
+        process, self._process = self._process, None
+        if process is None:
+            return
+        if process.stdin is not None:
+            process.stdin.close()
+        try:
+            await asyncio.wait_for(process.wait(), timeout=1)
+        except TimeoutError:
+            process.kill()
+            await process.wait()
+        if self._reader is not None:
+            await self._reader
+            self._reader = None
+
+
+class AsyncTmuxController:
+    """Drive any number of tmux sessions concurrently from asyncio.
+
+    Commands share one control-mode client (attached to whichever session
+    exists) and fall back to running the tmux binary per command when no
+    session exists or control_mode is False. Waits on pane output use
+    pipe-pane FIFOs read by the event loop, so N sessions take about as
+    long as the slowest one.
+    """
+
+    def __init__(self, control_mode: bool = True) -> None:
+        self.control_mode = control_mode
+        self._control: AsyncControlClient | None = None
+        self._connect_lock = asyncio.Lock()
+        # Avoid retrying the attach on every command when no session exists
+        self._attach_failed = False
+
+    async def __aenter__(self) -> "AsyncTmuxController":
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        tb: TracebackType | None,
+    ) -> None:
+        await self.close()
+
+    async def close(self) -> None:
+        """Detach the control-mode client, if one is connected."""
+        if self._control is not None:
+            await self._control.close()
+            self._control = None
+
+    async def _control_client(self) -> AsyncControlClient | None:
+        """Return a connected control client, attaching one if possible."""
+        if not self.control_mode:
+            return None
+        async with self._connect_lock:
+            if self._control is not None and self._control.connected:
+                return self._control
+            await self.close()
+            if self._attach_failed:
+                return None
+            control = AsyncControlClient()
+            if await control.connect():
+                self._control = control
+            else:
+                self._attach_failed = True
+            return self._control
+
+    async def _run_tmux(self, *args: str) -> subprocess.CompletedProcess[str]:
+        """Run a tmux command and return the result."""
+        control = await self._control_client()
+        if control is not None:
+            result = await control.run(*args)
+            if result is not None:
+                return result
+
+        process = await asyncio.create_subprocess_exec(
+            "tmux", *args,
+            stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE,
+        )
+        stdout, stderr = await process.communicate()
+        return subprocess.CompletedProcess(
+            ["tmux", *args],
+            process.returncode or 0,
+            stdout.decode(errors="replace"),
+            stderr.decode(errors="replace"),
+        )
+
+    async def list_sessions(self, prefix: str = "") -> list[str]:
+        """Return the names of sessions starting with prefix."""
+        result = await self._run_tmux("list-sessions", "-F", "#{session_name}")
+        if result.returncode != 0:
+            return []
+        return [name for name in result.stdout.splitlines() if name.startswith(prefix)]
+
+    async def has_session(self, session: str) -> bool:
+        """Check if a session exists."""
+        result = await self._run_tmux("has-session", "-t", session)
+        return result.returncode == 0
+
+    async def send_keys(self, session: str, *keys: str) -> bool:
+        """Send keys to a session's active pane."""
+        result = await self._run_tmux("send-keys", "-t", session, *keys)
+        return result.returncode == 0
+
+    async def capture(self, session: str, lines: int = 20) -> str:
+        """Return the last lines of a session's active pane."""
+        result = await self._run_tmux("capture-pane", "-p", "-t", session)
+        if result.returncode != 0:
+            return ""
+        output_lines = result.stdout.strip().split("\n")
+        return "\n".join(output_lines[-lines:])
+
+    async def run_session(self, session: str, send: str | None = None,
+                          enter: bool = True, pattern: str | None = None,
+                          idle_ms: int | None = None, timeout: float = 30.0,
+                          lines: int = 20) -> SessionResult:
+        """Optionally send input to a session, then collect its output.
+
+        With a pattern or idle_ms, output is streamed from the moment before
+        the input is sent until the pattern matches, the pane goes quiet, or
+        timeout passes. Otherwise the last lines of the pane are captured.
+        """
+        start = time.monotonic()
+
+        def result(ok: bool, reason: str, output: str = "",
+                   match: str | None = None) -> SessionResult:
+            elapsed = time.monotonic() - start
+            return SessionResult(session, ok, reason, output, elapsed, match)
+
+        if not await self.has_session(session):
+            return result(False, "error", f"Session '{session}' doesn't exist")
+        keys = [send, "Enter"] if enter and send is not None else [send] if send else []
+
+        if pattern is None and idle_ms is None:
+            if keys and not await self.send_keys(session, *keys):
+                return result(False, "error", "send-keys failed")
+            if keys:
+                return result(True, "sent")
+            return result(True, "captured", await self.capture(session, lines))
+
+        state = await self._run_tmux(*recorder_args(session))
+        taps = recorder_taps(state.stdout) if state.returncode == 0 else None
+        fifo, fd = create_output_fifo(taps)
+        try:
+            if taps is None:
+                piped = await self._run_tmux(*pipe_pane_args(session, fifo))
+                if piped.returncode != 0:
+                    return result(False, "error", piped.stderr.strip())
+            try:
+                if keys and not await self.send_keys(session, *keys):
+                    return result(False, "error", "send-keys failed")
+                reason, output, match = await self._wait_fd(
+                    fd, pattern, idle_ms, timeout
+                )
+                return result(reason != "timeout", reason, output, match)
+            finally:
+                if taps is None:
+                    await self._run_tmux(*close_pipe_args(session))
+        finally:
+            remove_output_fifo(fifo, fd)
+
+    async def _wait_fd(self, fd: int, pattern: str | None, idle_ms: int | None,
+                       timeout: float) -> tuple[str, str, str | None]:
+        """Read a FIFO from the event loop until match, idle or timeout."""
+        loop = asyncio.get_running_loop()
+        matcher = OutputMatcher(pattern)
+        ready = asyncio.Event()
+        loop.add_reader(fd, ready.set)
+        try:
+            start = loop.time()
+            last_output = start
+            while True:
+                now = loop.time()
+                wait = start + timeout - now
+                if idle_ms is not None:
+                    wait = min(wait, last_output + idle_ms / 1000 - now)
+                if wait <= 0:
+                    reason = "timeout" if now - start >= timeout else "idle"
+                    return reason, matcher.text, None
+
+                try:
+                    await asyncio.wait_for(ready.wait(), wait)
+                except TimeoutError:
+                    continue
+                ready.clear()
+                try:
+                    data = os.read(fd, 64 * 1024)
+                except BlockingIOError:
+                    continue
+                last_output = loop.time()
+                found = matcher.feed(data)
+                if found is not None:
+                    return "match", matcher.text, found
+        finally:
+            loop.remove_reader(fd)
+
+    async def broadcast(self, sessions: list[str], send: str | None = None,
+                        enter: bool = True, pattern: str | None = None,
+                        idle_ms: int | None = None, timeout: float = 30.0,
+                        lines: int = 20) -> list[SessionResult]:
+        """Run run_session on every session concurrently, in the given order."""
+        return list(await asyncio.gather(*(
+            self.run_session(session, send, enter, pattern, idle_ms, timeout, lines)
+            for session in sessions
+        )))
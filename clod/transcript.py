@@ -0,0 +1,385 @@
+"""Compressed, size-rotated transcripts of tmux pane output.
+
+A recorder fed by pipe-pane writes each pane's raw output into numbered
+segment files under a per-pane directory, next to an index.json that maps
+every segment to its byte offset and first line number in the whole
+stream. Segments only ever split at line boundaries, so they can be
+searched one at a time without holding the transcript in memory.
+"""
+
+import fcntl
+import gzip
+import json
+import os
+import re
+import select
+import shlex
+import sys
+import time
+from collections.abc import Iterator
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from pathlib import Path
+from types import ModuleType, TracebackType
+from typing import IO
+
+from .desktop_cache import default_cache_dir
+from .tmux import strip_ansi
+
+COMPRESSIONS = ("gzip", "zstd")
+SEGMENT_BYTES = 16 * 1024 * 1024
+INDEX_NAME = "index.json"
+# Directory of FIFOs the recorder copies output into (see clod.tmux.PaneStream)
+TAPS_NAME = "taps"
+# Pending output is flushed to disk (and becomes searchable) this often
+FLUSH_INTERVAL = 1.0
+
+_SUFFIXES = {"gzip": ".gz", "zstd": ".zst"}
+
+
+def default_transcript_dir() -> Path:
+    """Return the directory transcripts are recorded to by default."""
+    return default_cache_dir() / "transcripts"
+
+
+def _zstd() -> ModuleType:
+    try:
+        from compression import zstd  # type: ignore[import-not-found]
+    except ImportError:
+        raise RuntimeError("zstd compression needs Python 3.14 or newer") from None
+    return zstd
+
+
+def _open_segment(path: Path, mode: str) -> IO[bytes]:
+    """Open a segment for binary reading or appending, by its suffix."""
+    if path.suffix == _SUFFIXES["zstd"]:
+        return _zstd().open(path, mode)  # type: ignore[no-any-return]
+    return gzip.open(path, mode)  # type: ignore[return-value]
+
+
+def _now() -> str:
+    return datetime.now().isoformat(timespec="seconds")
+
+
+@dataclass
+class Segment:
+    """One segment file of a pane transcript."""
+    name: str
+    # Position of the segment's first byte and line in the whole transcript
+    offset: int
+    line: int
+    # Uncompressed bytes and newlines written so far
+    size: int
+    lines: int
+    started: str
+    ended: str | None = None
+
+
+def load_index(directory: Path) -> list[Segment]:
+    """Return the segments recorded in a pane directory, oldest first."""
+    try:
+        entries = json.loads((directory / INDEX_NAME).read_text())
+    except (OSError, ValueError):
+        return []
+    return [Segment(**entry) for entry in entries]
+
+
+def _save_index(directory: Path, segments: list[Segment]) -> None:
+    index = directory / INDEX_NAME
+    temporary = index.with_suffix(".tmp")
+    temporary.write_text(json.dumps([asdict(segment) for segment in segments]))
+    temporary.replace(index)
+
+
+class TranscriptWriter:
+    """Append pane output to rotating compressed segments.
+
+    A writer holds a lock on its directory while open. Recording a pane
+    again makes pipe-pane close the old recorder's input and start a new
+    one, which waits for the lock until the old one has written the rest
+    of its input, then carries on in the last segment if it has room.
+    """
+
+    def __init__(self, directory: Path, segment_bytes: int = SEGMENT_BYTES,
+                 compress: str = "gzip", keep: int = 0) -> None:
+        if compress not in COMPRESSIONS:
+            choices = ", ".join(COMPRESSIONS)
+            raise ValueError(f"compress must be one of {choices}, not {compress!r}")
+        if compress == "zstd":
+            _zstd()
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.compress = compress
+        # Number of segments to keep on disk; 0 keeps them all
+        self.keep = keep
+        self._segments: list[Segment] = []
+        self._file: IO[bytes] | None = None
+        self._lock: IO[str] | None = None
+        self._line_start = True
+
+    def __enter__(self) -> "TranscriptWriter":
+        self.open()
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        tb: TracebackType | None,
+    ) -> None:
+        self.close()
+
+    def open(self) -> None:
+        """Lock the directory and open the segment to append to."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._lock = (self.directory / ".lock").open("w")
+        fcntl.flock(self._lock, fcntl.LOCK_EX)
+
+        self._segments = [
+            segment for segment in load_index(self.directory)
+            if (self.directory / segment.name).exists()
+        ]
+        last = self._segments[-1] if self._segments else None
+        if (last is not None and last.size < self.segment_bytes
+                and last.name.endswith(_SUFFIXES[self.compress])):
+            # Appending starts a new gzip member or zstd frame in the same file
+            last.ended = None
+            self._file = _open_segment(self.directory / last.name, "ab")
+            _save_index(self.directory, self._segments)
+        else:
+            self._start_segment()
+
+    def _start_segment(self) -> None:
+        last = self._segments[-1] if self._segments else None
+        number = int(last.name.split(".")[0]) + 1 if last else 1
+        segment = Segment(
+            name=f"{number:06d}.log{_SUFFIXES[self.compress]}",
+            offset=last.offset + last.size if last else 0,
+            line=last.line + last.lines if last else 1,
+            size=0,
+            lines=0,
+            started=_now(),
+        )
+        self._segments.append(segment)
+        self._file = _open_segment(self.directory / segment.name, "ab")
+
+        if self.keep and len(self._segments) > self.keep:
+            for old in self._segments[:-self.keep]:
+                (self.directory / old.name).unlink(missing_ok=True)
+            del self._segments[:-self.keep]
+        _save_index(self.directory, self._segments)
+
+    def write(self, data: bytes) -> None:
+        """Append output, rotating to a new segment at a line boundary."""
+        while data:
+            segment = self._segments[-1]
+            if segment.size >= self.segment_bytes:
+                if self._line_start:
+                    self._rotate()
+                    continue
+                # Finish the current line before rotating
+                end = data.find(b"\n") + 1 or len(data)
+            else:
+                end = self.segment_bytes - segment.size
+            chunk, data = data[:end], data[end:]
+
+            assert self._file is not None
+            self._file.write(chunk)
+            segment.size += len(chunk)
+            segment.lines += chunk.count(b"\n")
+            self._line_start = chunk.endswith(b"\n")
+
+    def _rotate(self) -> None:
+        assert self._file is not None
+        self._file.close()
+        self._segments[-1].ended = _now()
+        self._start_segment()
+
+    def flush(self) -> None:
+        """Make everything written so far readable from disk."""
+        if self._file is not None:
+            self._file.flush()
+            self._segments[-1].ended = _now()
+            _save_index(self.directory, self._segments)
+
+    def close(self) -> None:
+        """Close the current segment and release the directory."""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+            self._segments[-1].ended = _now()
+            _save_index(self.directory, self._segments)
+        if self._lock is not None:
+            self._lock.close()
+            self._lock = None
+
+
+def tap_directory(directory: Path) -> Path:
+    """Return where output streams add FIFOs for a pane directory's recorder."""
+    return directory / TAPS_NAME
+
+
+class _Taps:
+    """The FIFOs in a tap directory, each fed a copy of recorded output."""
+
+    def __init__(self, directory: Path) -> None:
+        self.directory = directory
+        self._fds: dict[str, int] = {}
+
+    def write(self, data: bytes) -> None:
+        """Copy data into every FIFO currently in the directory."""
+        try:
+            names = set(os.listdir(self.directory))
+        except OSError:
+            names = set()
+        for name in self._fds.keys() - names:
+            os.close(self._fds.pop(name))
+        for name in names:
+            fd = self._fds.get(name)
+            if fd is None:
+                try:
+                    fd = os.open(self.directory / name, os.O_WRONLY | os.O_NONBLOCK)
+                except OSError:
+                    # Being removed, with no reader left
+                    continue
+                self._fds[name] = fd
+            view = memoryview(data)
+            try:
+                while view:
+                    view = view[os.write(fd, view):]
+            except BlockingIOError:
+                # A reader that stops reading must not hold up recording
+                pass
+            except OSError:
+                os.close(self._fds.pop(name))
+
+    def close(self) -> None:
+        """Close the FIFOs opened so far."""
+        for fd in self._fds.values():
+            os.close(fd)
+        self._fds.clear()
+
+
+def record(fd: int, writer: TranscriptWriter, taps: Path | None = None) -> None:
+    """Copy output from fd into writer until EOF, flushing when it pauses.
+
+    With taps, output is also copied into the FIFOs in that directory as
+    soon as it is read.
+    """
+    tap_fifos = _Taps(taps) if taps is not None else None
+    try:
+        _record(fd, writer, tap_fifos)
+    finally:
+        if tap_fifos is not None:
+            tap_fifos.close()
+
+
+def _record(fd: int, writer: TranscriptWriter, taps: _Taps | None) -> None:
+    dirty = False
+    last_flush = time.monotonic()
+    while True:
+        timeout = FLUSH_INTERVAL if dirty else None
+        readable, _, _ = select.select([fd], [], [], timeout)
+        if readable:
+            data = os.read(fd, 64 * 1024)
+            if not data:
+                break
+            writer.write(data)
+            if taps is not None:
+                taps.write(data)
+            dirty = True
+        if dirty and (not readable or time.monotonic() - last_flush >= FLUSH_INTERVAL):
+            writer.flush()
+            dirty = False
+            last_flush = time.monotonic()
+
+
+def record_command(directory: Path, segment_bytes: int = SEGMENT_BYTES,
+                   compress: str = "gzip", keep: int = 0) -> str:
+    """Shell command for pipe-pane that records a pane into directory."""
+    return "exec " + shlex.join([
+        sys.executable, "-m", "clod.cli", "tmux", "record-pane", str(directory),
+        "--segment-bytes", str(segment_bytes), "--compress", compress,
+        "--keep", str(keep),
+    ])
+
+
+def pane_directory(root: Path, session: str, pane_id: str) -> Path:
+    """Return where a pane's transcript lives under root."""
+    return root / session / f"pane-{pane_id.lstrip('%')}"
+
+
+def read_lines(path: Path) -> Iterator[bytes]:
+    """Yield the lines of a segment without their newlines, decompressing as it goes.
+
+    A segment still being written ends mid-stream; everything flushed
+    before that point is still returned.
+    """
+    pending = b""
+    with _open_segment(path, "rb") as stream:
+        while True:
+            try:
+                # read1 returns what one read produced, so nothing decoded
+                # before a truncated end is lost with the EOFError
+                data = stream.read1(64 * 1024)
+            except EOFError:
+                break
+            if not data:
+                break
+            pending += data
+            *lines, pending = pending.split(b"\n")
+            yield from lines
+    if pending:
+        yield pending
+
+
+@dataclass
+class TranscriptMatch:
+    """A transcript line matching a search."""
+    # Pane directory relative to the transcript root, e.g. "claude-workspace/pane-3"
+    pane: str
+    line: int
+    text: str
+    # When the segment holding the line was started
+    started: str
+
+
+def transcript_dirs(root: Path, session: str | None = None) -> list[Path]:
+    """Return the recorded pane directories under root, optionally for one session."""
+    if session is not None:
+        sessions = [root / session]
+    elif root.is_dir():
+        sessions = sorted(root.iterdir())
+    else:
+        sessions = []
+    return [
+        pane for directory in sessions if directory.is_dir()
+        for pane in sorted(directory.iterdir()) if (pane / INDEX_NAME).exists()
+    ]
+
+
+def search_transcripts(root: Path, pattern: str, ignore_case: bool = False,
+                       session: str | None = None, pane: str | None = None,
+                       since: datetime | None = None) -> Iterator[TranscriptMatch]:
+    """Stream the lines of recorded transcripts that match a regex.
+
+    Terminal escapes are stripped before matching. Segments are read one at
+    a time, and with since, segments that ended earlier are skipped using
+    the index alone.
+    """
+    regex = re.compile(pattern, re.IGNORECASE if ignore_case else 0)
+    for directory in transcript_dirs(root, session):
+        if pane is not None and directory.name != f"pane-{pane.lstrip('%')}":
+            continue
+        name = str(directory.relative_to(root))
+        for segment in load_index(directory):
+            if (since is not None and segment.ended is not None
+                    and datetime.fromisoformat(segment.ended) < since):
+                continue
+            path = directory / segment.name
+            if not path.exists():
+                continue
+            for number, raw in enumerate(read_lines(path), segment.line):
+                text = strip_ansi(raw.decode(errors="replace"))
+                if regex.search(text):
+                    yield TranscriptMatch(name, number, text, segment.started)
@@ -0,0 +1,108 @@
+"""Directory change notification with inotify and a polling fallback."""
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import time
+from pathlib import Path
+from types import TracebackType
+
+# inotify event masks (see inotify(7))
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+
+_WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE | IN_DELETE
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+class DirectoryWatcher:
+    """Block until a directory changes, or until the poll interval passes.
+
+    Uses inotify on Linux. Elsewhere (e.g. macOS, where Claude Desktop
+    usually runs) or if inotify is unavailable, `wait` sleeps for the
+    interval so callers simply re-check on every tick.
+    """
+
+    def __init__(self, directory: Path, poll_interval: float = 1.0) -> None:
+        self.directory = directory
+        self.poll_interval = poll_interval
+        self._fd: int | None = None
+
+    def __enter__(self) -> "DirectoryWatcher":
+        self._fd = self._init_inotify()
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        tb: TracebackType | None,
+    ) -> None:
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+    @property
+    def uses_inotify(self) -> bool:
+        """Whether change events come from inotify rather than polling."""
+        return self._fd is not None
+
+    def _init_inotify(self) -> int | None:
+        """Create an inotify watch on the directory, or None if unsupported."""
+        if not sys.platform.startswith("linux"):
+            return None
+
+        library = ctypes.util.find_library("c")
+        if not library:
+            return None
+
+        try:
+            libc = ctypes.CDLL(library, use_errno=True)
+            fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        except (OSError, AttributeError):
+            return None
+        if fd < 0:
+            return None
+
+        wd = libc.inotify_add_watch(fd, str(self.directory).encode(), _WATCH_MASK)
+        if wd < 0:
+            os.close(fd)
+            return None
+        return int(fd)
+
+    def wait(self, timeout: float | None = None) -> list[str]:
+        """Wait for changes and return the names of files that changed.
+
+        Returns an empty list when the timeout (default: the poll interval)
+        expires without events, or always when polling.
+        """
+        timeout = self.poll_interval if timeout is None else timeout
+        if self._fd is None:
+            time.sleep(timeout)
+            return []
+
+        readable, _, _ = select.select([self._fd], [], [], timeout)
+        if not readable:
+            return []
+
+        names = []
+        try:
+            data = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+
+        pos = 0
+        while pos + _EVENT_HEADER.size <= len(data):
+            _, _, _, name_length = _EVENT_HEADER.unpack_from(data, pos)
+            pos += _EVENT_HEADER.size
+            name = data[pos:pos + name_length].rstrip(b"\0")
+            pos += name_length
+            if name:
+                names.append(name.decode(errors="replace"))
+        return names
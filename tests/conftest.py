@@ -0,0 +1,25 @@
+"""Shared fixtures."""
+
+from pathlib import Path
+
+import pytest
+
+from clod.bench import CorpusSpec, generate_corpus
+
+
+@pytest.fixture(autouse=True)
+def _isolated_cache(
+    tmp_path_factory: pytest.TempPathFactory, monkeypatch: pytest.MonkeyPatch
+) -> Path:
+    """Keep caches written by the code under test out of the real cache directory."""
+    cache = tmp_path_factory.mktemp("cache")
+    monkeypatch.setenv("XDG_CACHE_HOME", str(cache))
+    return cache
+
+
+@pytest.fixture
+def corpus(tmp_path: Path) -> Path:
+    """A small synthetic Claude Desktop LevelDB database."""
+    spec = CorpusSpec(conversations=6, messages_per_conversation=5, draft_churn=3,
+                      words_per_message=12, tables=4, unicode_ratio=0.2)
+    return generate_corpus(tmp_path / "leveldb", spec).path
@@ -0,0 +1,82 @@
+"""Tests for the Bash command validator hook's shell parsing."""
+
+import pytest
+
+from bash_command_validator import _parse, _validate_command
+
+Parsed = list[tuple[str, bool]]
+
+
+@pytest.mark.parametrize(("command", "expected"), [
+    ("grep foo file", [("grep foo file", False)]),
+    ("ls | grep x", [("ls", False), ("grep x", True)]),
+    ("cd x && (grep foo $(ls))",
+     [("cd x", False), ("ls", False), ("grep foo", False)]),
+    ('echo "a && grep b"', [("echo a && grep b", False)]),
+    ("echo `grep x f`", [("grep x f", False), ("echo", False)]),
+    ("FOO=1 nohup grep x f", [("grep x f", False)]),
+    ("echo $((1 + 2))", [("echo $((1 + 2))", False)]),
+    ("echo hi # && grep x", [("echo hi", False)]),
+])
+def test_splits_simple_commands(command: str, expected: Parsed) -> None:
+    assert [*_parse(command)] == expected
+
+
+@pytest.mark.parametrize(("command", "expected"), [
+    ("cat <<EOF\ngrep x\nEOF", [("cat <<EOF", False)]),
+    ("cat <<'EOF'\nit's\ngrep x\nEOF\necho done",
+     [("cat <<'EOF'", False), ("echo done", False)]),
+    ("cat <<-EOF\n\tgrep x\n\tEOF\ngrep y f",
+     [("cat <<-EOF", False), ("grep y f", False)]),
+    ("cat <<EOF | sort\ngrep\nEOF", [("cat <<EOF", False), ("sort", True)]),
+    ("cat <<EOF\n$(grep x f)\nEOF", [("cat <<EOF", False), ("grep x f", False)]),
+    ("cat <<'EOF'\n$(grep x f)\nEOF", [("cat <<'EOF'", False)]),
+])
+def test_heredoc_bodies_are_data(command: str, expected: Parsed) -> None:
+    assert [*_parse(command)] == expected
+
+
+@pytest.mark.parametrize(("command", "expected"), [
+    ("if true; then grep x f; fi", [("true", False), ("grep x f", False)]),
+    ("for f in *.py; do grep x $f; done", [("grep x $f", False)]),
+    ("while read l; do echo $l; done", [("read l", False), ("echo $l", False)]),
+    ("! grep -q x f", [("grep -q x f", False)]),
+    ("{ grep x f; }", [("grep x f", False)]),
+])
+def test_reserved_words_are_stripped(command: str, expected: Parsed) -> None:
+    assert [*_parse(command)] == expected
+
+
+@pytest.mark.parametrize(("command", "expected"), [
+    ("time -p grep x f", [("grep x f", False)]),
+    ("sudo -u root grep x f", [("grep x f", False)]),
+    ("env -u HOME FOO=1 grep x", [("grep x", False)]),
+    ("nice -n 5 grep x", [("grep x", False)]),
+    ("command -v grep", []),
+])
+def test_wrapper_options_are_skipped(command: str, expected: Parsed) -> None:
+    assert [*_parse(command)] == expected
+
+
+@pytest.mark.parametrize(("command", "expected"), [
+    ("make 2>&1 | grep err", [("make 2>&1", False), ("grep err", True)]),
+    ("cmd <&3", [("cmd <&3", False)]),
+    ("ls &> out; grep x f", [("ls &> out", False), ("grep x f", False)]),
+    ("echo a >| f", [("echo a >| f", False)]),
+    ("cmd1 & cmd2", [("cmd1", False), ("cmd2", False)]),
+])
+def test_redirections_keep_their_operators(command: str, expected: Parsed) -> None:
+    assert [*_parse(command)] == expected
+
+
+@pytest.mark.parametrize(("command", "blocked"), [
+    ("grep -r foo .", True),
+    ("cd src && grep foo x", True),
+    ("ls | grep x", False),
+    ("cat <<EOF\ngrep x\nEOF", False),
+    ("time -p grep x f", True),
+    ("if true; then grep x f; fi", True),
+    ("echo 'grep x'", False),
+])
+def test_validate_command(command: str, blocked: bool) -> None:
+    assert bool(_validate_command(command)) == blocked
@@ -0,0 +1,154 @@
+"""Tests for the synthetic corpus generator and the benchmarks."""
+
+import json
+from pathlib import Path
+
+import pytest
+from click.testing import CliRunner
+
+from clod.bench import (
+    CORPUS_MARKER,
+    CorpusSpec,
+    HookTiming,
+    _percentile,
+    bench_hook,
+    event_latencies,
+    generate_corpus,
+    run_desktop_bench,
+)
+from clod.cli import main
+from clod.desktop import ClaudeDesktopParser
+from clod.leveldb import iter_entries
+
+SPEC = CorpusSpec(conversations=4, messages_per_conversation=3, draft_churn=2,
+                  words_per_message=20, tables=3, log_fraction=0.25)
+
+
+def test_generate_corpus_layout(tmp_path: Path) -> None:
+    info = generate_corpus(tmp_path, SPEC)
+    names = sorted(path.name for path in tmp_path.iterdir())
+    assert names == [CORPUS_MARKER, "000005.ldb", "000006.ldb", "000007.ldb",
+                     "000008.log", "CURRENT", "MANIFEST-000001"]
+    assert (tmp_path / "CURRENT").read_text() == "MANIFEST-000001\n"
+    assert info.files == 4
+    assert info.unique_drafts == 4 * 3 * (2 + 1)
+
+    entries = [entry for path in sorted(tmp_path.glob("0*"))
+               for entry in iter_entries(path)]
+    assert len(entries) == info.writes
+    assert sorted(entry.sequence for entry in entries) == [*range(1, info.writes + 1)]
+
+
+def test_generate_corpus_is_parsed_as_drafts(tmp_path: Path) -> None:
+    generate_corpus(tmp_path, SPEC)
+    parser = ClaudeDesktopParser(leveldb_dir=tmp_path, use_cache=False)
+    counts = parser.get_store().conversation_counts()
+    del counts["unknown"]
+    assert len(counts) == 4
+    # Each message is saved as two growing prefixes and then in full
+    assert all(count == 3 * (2 + 1) for count in counts.values())
+
+
+def test_generate_corpus_replaces_only_leveldb_files(tmp_path: Path) -> None:
+    generate_corpus(tmp_path, CorpusSpec(conversations=2, tables=6))
+    (tmp_path / "notes.txt").write_text("keep me")
+    (tmp_path / "LOCK").write_text("")
+
+    generate_corpus(tmp_path, SPEC)
+    names = {path.name for path in tmp_path.iterdir()}
+    assert "notes.txt" in names
+    assert {"LOCK", "000009.ldb", "000011.log"}.isdisjoint(names)
+
+
+def test_generate_corpus_refuses_a_directory_it_did_not_write(tmp_path: Path) -> None:
+    real = tmp_path / "leveldb"
+    real.mkdir()
+    (real / "000003.log").write_bytes(b"real data")
+    with pytest.raises(FileExistsError):
+        generate_corpus(real, SPEC)
+    assert (real / "000003.log").read_bytes() == b"real data"
+
+    runner = CliRunner()
+    refused = runner.invoke(main, ["bench", "generate", str(real)])
+    assert refused.exit_code == 1
+    assert "--force" in refused.output
+    assert (real / "000003.log").exists()
+
+    forced = runner.invoke(main, ["bench", "generate", "--force", str(real)])
+    assert forced.exit_code == 0, forced.output
+    assert not (real / "000003.log").exists()
+    assert (real / CORPUS_MARKER).exists()
+
+
+def test_run_desktop_bench(tmp_path: Path) -> None:
+    generate_corpus(tmp_path / "leveldb", SPEC)
+    report = run_desktop_bench(tmp_path / "leveldb", tmp_path / "cache", runs=1,
+                               queries=["the"], repeat=2)
+    assert [phase.name for phase in report.phases] == [
+        "cold scan", "cache fill", "warm scan", "search",
+    ]
+    assert len({phase.messages for phase in report.phases}) == 1
+    assert [timing.query for timing in report.searches] == ["the"]
+    assert report.searches[0].hits > 0
+
+
+@pytest.mark.parametrize(("fraction", "expected"), [
+    (0.0, 1.0), (0.5, 6.0), (0.95, 10.0), (0.99, 10.0),
+])
+def test_percentile_is_nearest_rank(fraction: float, expected: float) -> None:
+    assert _percentile([float(n) for n in range(1, 11)], fraction) == expected
+    assert _percentile([], fraction) == 0.0
+
+
+def _timing(event: str, matcher: str, p50: float, cpu: float) -> HookTiming:
+    return HookTiming(event, matcher, "cmd", None, cold=[], warm=[p50] * 3,
+                      cpu=[cpu], peak_rss=0)
+
+
+def test_event_latencies_take_the_slowest_parallel_hook() -> None:
+    timings = [
+        _timing("PreToolUse", "Bash", 0.010, 0.002),
+        _timing("PreToolUse", "Edit|Write", 0.030, 0.001),
+        _timing("PreToolUse", "*", 0.020, 0.004),
+        _timing("Stop", "", 0.005, 0.001),
+    ]
+    rows = [
+        (latency.event, latency.tool, latency.hooks, latency.wall_p50)
+        for latency in event_latencies(timings)
+    ]
+    assert rows == [
+        ("PreToolUse", "Bash", 2, 0.020),
+        ("PreToolUse", "Edit", 2, 0.030),
+        ("Stop", None, 1, 0.005),
+    ]
+    [only] = event_latencies(timings[:3], tool="Read")
+    assert (only.tool, only.hooks, only.cpu) == ("Read", 1, 0.004)
+
+
+def test_bench_hook_counts_runs_and_exit_codes(tmp_path: Path) -> None:
+    seen = tmp_path / "payloads"
+    hook = {"event": "PreToolUse", "matcher": "Edit|Write",
+            "command": f"cat >> {seen}; echo >> {seen}; exit 2"}
+    timing = bench_hook(hook, runs=3, cold_runs=2)
+    assert timing.tool == "Edit"
+    assert (len(timing.cold), len(timing.warm), len(timing.cpu)) == (2, 3, 3)
+    # Cold, one untimed warm-up, then warm runs
+    assert timing.exit_codes == {"2": 6}
+    payloads = [json.loads(line) for line in seen.read_text().splitlines()]
+    assert {payload["tool_name"] for payload in payloads} == {"Edit"}
+
+
+def test_bench_cli(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("HOME", str(tmp_path))
+    settings = tmp_path / ".claude" / "settings.json"
+    settings.parent.mkdir()
+    settings.write_text(json.dumps({"hooks": {"Stop": [
+        {"hooks": [{"type": "command", "command": "true"}]},
+    ]}}))
+    result = CliRunner().invoke(main, ["hooks", "bench", "-n", "2", "-c", "1"])
+    assert result.exit_code == 0, result.output
+    assert "exits 0 (4)" in result.output
+    assert "Stop" in result.output.split("Added latency per call")[1]
+
+    missing = CliRunner().invoke(main, ["hooks", "bench", "7"])
+    assert missing.exit_code == 1
@@ -0,0 +1,70 @@
+"""Tests for the clod command line."""
+
+import gzip
+import json
+from pathlib import Path
+
+import pytest
+from click.testing import CliRunner
+
+from clod.cli import main
+from clod.desktop import ClaudeDesktopParser
+
+
+@pytest.fixture
+def desktop_dir(corpus: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    monkeypatch.setenv("CLOD_DESKTOP_DIR", str(corpus))
+    return corpus
+
+
+def _records(corpus: Path) -> list[dict[str, object]]:
+    parser = ClaudeDesktopParser(leveldb_dir=corpus, use_cache=False)
+    return [
+        {"conversation_id": msg.conversation_id, "text": msg.text,
+         "is_draft": msg.is_draft, "message_type": msg.message_type}
+        for msg in parser.iter_messages()
+    ]
+
+
+def test_export_json(desktop_dir: Path) -> None:
+    result = CliRunner().invoke(main, ["desktop", "export", "-f", "json"])
+    assert result.exit_code == 0, result.output
+    assert result.output == json.dumps(_records(desktop_dir), indent=2) + "\n"
+
+
+def test_export_ndjson_to_a_gzip_file(desktop_dir: Path, tmp_path: Path) -> None:
+    output = tmp_path / "history.ndjson.gz"
+    result = CliRunner().invoke(
+        main, ["desktop", "export", "-f", "ndjson", "-z", "-o", str(output)]
+    )
+    assert result.exit_code == 0, result.output
+    with gzip.open(output, "rt", encoding="utf-8") as f:
+        assert [json.loads(line) for line in f] == _records(desktop_dir)
+
+
+def test_export_streams_without_the_message_cache(
+    desktop_dir: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    # The cache would keep every file's messages in memory until it is saved
+    def no_cache(*args: object) -> None:
+        raise AssertionError("export loaded the message cache")
+
+    monkeypatch.setattr("clod.desktop.MessageCache", no_cache)
+    result = CliRunner().invoke(main, ["desktop", "export", "-f", "ndjson"])
+    assert result.exit_code == 0, result.output
+    assert [json.loads(line) for line in result.output.splitlines()] == (
+        _records(desktop_dir)
+    )
+
+
+def test_export_empty_json(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("CLOD_DESKTOP_DIR", str(tmp_path))
+    result = CliRunner().invoke(main, ["desktop", "export", "-f", "json"])
+    assert (result.exit_code, result.output) == (0, "[]\n")
+
+
+def test_export_gzip_to_stdout(desktop_dir: Path) -> None:
+    result = CliRunner().invoke(main, ["desktop", "export", "-f", "ndjson", "-z"])
+    assert result.exit_code == 0, result.output
+    lines = gzip.decompress(result.stdout_bytes).decode().splitlines()
+    assert [json.loads(line) for line in lines] == _records(desktop_dir)
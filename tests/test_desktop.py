@@ -0,0 +1,186 @@
+"""Tests for the Claude Desktop history parser."""
+
+import queue
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+
+from clod.bench import _draft_doc, _storage_key, _storage_value
+from clod.desktop import (
+    ChatMessage,
+    ClaudeDesktopParser,
+    MessageStore,
+    _decode_storage_string,
+    _iter_text_fields,
+)
+from clod.drafts import ExtractionStats
+from clod.leveldb import LogWriter, encode_write_batch, internal_key, write_table
+
+Row = tuple[str, str, bool, int | None]
+
+
+def _rows(messages: list[ChatMessage]) -> list[Row]:
+    return [(msg.conversation_id, msg.text, msg.is_draft, msg.sequence)
+            for msg in messages]
+
+
+def test_parallel_parse_matches_serial(corpus: Path,
+                                      monkeypatch: pytest.MonkeyPatch) -> None:
+    serial = ClaudeDesktopParser(leveldb_dir=corpus, use_cache=False).get_all_messages()
+    # Workers are capped at the CPU count, which may be one here
+    monkeypatch.setattr("os.cpu_count", lambda: 4)
+    parallel = ClaudeDesktopParser(leveldb_dir=corpus, use_cache=False, jobs=2)
+    assert _rows(parallel.get_all_messages()) == _rows(serial)
+    assert serial
+
+
+def test_parallel_parse_stops_submitting_when_closed(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    for number in range(1, 41):
+        with LogWriter(tmp_path / f"{number:06d}.log") as writer:
+            writer.add_record(encode_write_batch(number, [(b"k", b"v")]))
+
+    # Threads stand in for processes, so the parsed files can be counted
+    parsed: list[Path] = []
+
+    def extract(file_path: Path) -> tuple[list[ChatMessage], ExtractionStats]:
+        parsed.append(file_path)
+        return [], ExtractionStats()
+
+    monkeypatch.setattr("os.cpu_count", lambda: 4)
+    monkeypatch.setattr("clod.desktop.ProcessPoolExecutor", ThreadPoolExecutor)
+    monkeypatch.setattr("clod.desktop._extract_file_messages", extract)
+    parser = ClaudeDesktopParser(leveldb_dir=tmp_path, use_cache=False, jobs=2)
+    files = parser._parse_files(sorted(tmp_path.glob("*.log")))
+    next(files)
+    files.close()
+    assert len(parsed) <= 2 * 2 + 1
+
+
+@pytest.mark.parametrize("value", [
+    b'\x01{"text":"caf\xe9 au lait"},{"text":"second"}',
+    b'\x00' + '{"text":"日本語のテスト"}'.encode("utf-16-le"),
+    '{"text":"naïve café"} {"text":"x"}'.encode(),
+    b'\x01{"other":"y"}',
+])
+def test_text_fields_match_a_decoded_search(value: bytes) -> None:
+    decoded = _decode_storage_string(value)
+    assert [*_iter_text_fields(value)] == re.findall(r'"text":"([^"]+)"', decoded)
+
+
+def test_drafts_round_trip_through_the_parser(tmp_path: Path) -> None:
+    texts = ["plain ascii draft text", "café naïve Größe", "日本語 テスト message"]
+    writes = [
+        (_storage_key(f"LSS-conv-{index}:textInput"), _storage_value(_draft_doc(text)))
+        for index, text in enumerate(texts)
+    ]
+    path = tmp_path / "000005.ldb"
+    write_table(path, sorted(
+        (internal_key(key, sequence), value)
+        for sequence, (key, value) in enumerate(writes, 1)
+    ))
+
+    parser = ClaudeDesktopParser(leveldb_dir=tmp_path, use_cache=False)
+    drafts = {msg.conversation_id: msg.text
+              for msg in parser.get_all_messages() if msg.is_draft}
+    assert drafts == {f"conv-{index}": text for index, text in enumerate(texts)}
+
+
+def _log_bytes(path: Path, *drafts: tuple[str, str]) -> bytes:
+    with LogWriter(path) as writer:
+        for sequence, (conversation, text) in enumerate(drafts, 1):
+            put = (_storage_key(f"LSS-{conversation}:textInput"),
+                   _storage_value(_draft_doc(text)))
+            writer.add_record(encode_write_batch(sequence, [put]))
+    return path.read_bytes()
+
+
+def test_watch_follows_appends_and_rotation(tmp_path: Path) -> None:
+    scratch = tmp_path / "scratch.log"
+    head = _log_bytes(scratch, ("a", "first draft"))
+    full = _log_bytes(scratch, ("a", "first draft"), ("a", "second draft"))
+    leveldb_dir = tmp_path / "leveldb"
+    leveldb_dir.mkdir()
+    log = leveldb_dir / "000007.log"
+    log.write_bytes(head)
+
+    parser = ClaudeDesktopParser(leveldb_dir=leveldb_dir, use_cache=False)
+    seen: queue.Queue[str] = queue.Queue()
+
+    def follow() -> None:
+        for msg in parser.watch(poll_interval=0.05, from_start=True):
+            if msg.is_draft:
+                seen.put(msg.text)
+
+    threading.Thread(target=follow, daemon=True).start()
+    assert seen.get(timeout=5) == "first draft"
+
+    with log.open("ab") as f:
+        f.write(full[len(head):])
+    assert seen.get(timeout=5) == "second draft"
+
+    # LevelDB rotated to a new log
+    _log_bytes(leveldb_dir / "000009.log", ("b", "third draft"))
+    assert seen.get(timeout=5) == "third draft"
+
+
+def test_message_store_round_trip() -> None:
+    stamp = datetime(2026, 1, 2, 3, 4, 5)
+    messages = [
+        ChatMessage("conv-b", "late reply", message_type="assistant", sequence=9),
+        ChatMessage("conv-a", "hello", is_draft=True, sequence=3, timestamp=stamp),
+        ChatMessage("conv-b", "early", sequence=2),
+        ChatMessage("unknown", "no sequence"),
+    ]
+    store = MessageStore()
+    assert all(store.add(msg) for msg in messages)
+    # Same text in the same conversation is a duplicate, in another it is not
+    assert not store.add(ChatMessage("conv-a", "hello", sequence=99))
+    assert store.add(ChatMessage("conv-b", "hello"))
+
+    assert len(store) == 5
+    assert [*store][:4] == messages
+    assert store.texts == [msg.text for msg in store]
+    assert store.conversation_counts() == {"conv-b": 3, "conv-a": 1, "unknown": 1}
+    assert [msg.text for msg in store.messages_for("conv-b")] == [
+        "hello", "early", "late reply",
+    ]
+    assert store.messages_for("missing") == []
+
+
+def _latest_writes(messages: list[ChatMessage]) -> list[Row]:
+    """The newest write of each (conversation_id, text), oldest first."""
+    latest: dict[tuple[str, str], ChatMessage] = {}
+    for msg in messages:
+        key = (msg.conversation_id, msg.text)
+        if msg.sequence is not None and (
+            key not in latest or (latest[key].sequence or 0) < msg.sequence
+        ):
+            latest[key] = msg
+    return _rows(sorted(latest.values(), key=lambda msg: msg.sequence or 0))
+
+
+@pytest.mark.parametrize("limit", [1, 7, 40, 10_000])
+def test_recent_messages_follow_sequence_order(corpus: Path, tmp_path: Path,
+                                               limit: int) -> None:
+    # Every write, including ones the store would drop as duplicates
+    parser = ClaudeDesktopParser(leveldb_dir=corpus, use_cache=False)
+    files = parser._iter_file_messages(parser._list_files())
+    latest = _latest_writes([msg for messages in files for msg in messages])
+    expected = [row[3] for row in latest[-limit:]]
+
+    parsers = [ClaudeDesktopParser(leveldb_dir=corpus, use_cache=False)] + [
+        # Cold and then warm cache, where cached files can be skipped
+        ClaudeDesktopParser(leveldb_dir=corpus, cache_dir=tmp_path / "cache")
+        for _ in range(2)
+    ]
+    for parser in parsers:
+        recent = _rows(parser.get_recent_messages(limit))
+        # One write can hold several messages, so compare sequences
+        assert [row[3] for row in recent] == expected
+        assert set(recent) <= set(latest)
@@ -0,0 +1,94 @@
+"""Tests for the on-disk desktop message cache."""
+
+import os
+from pathlib import Path
+
+import pytest
+
+from clod.desktop import ChatMessage, ClaudeDesktopParser
+from clod.desktop_cache import MessageCache, snapshot_key
+from clod.leveldb import LogWriter, encode_write_batch, iter_log
+
+
+def _parse_counter(monkeypatch: pytest.MonkeyPatch) -> list[str]:
+    """Record the names of files the parser actually reads."""
+    parsed: list[str] = []
+    extract = ClaudeDesktopParser._extract_messages_from_file
+
+    def counting(self: ClaudeDesktopParser, file_path: Path) -> list[ChatMessage]:
+        parsed.append(file_path.name)
+        return extract(self, file_path)
+
+    monkeypatch.setattr(ClaudeDesktopParser, "_extract_messages_from_file", counting)
+    return parsed
+
+
+def test_cached_parse_matches_a_fresh_parse(corpus: Path, tmp_path: Path,
+                                            monkeypatch: pytest.MonkeyPatch) -> None:
+    fresh = ClaudeDesktopParser(leveldb_dir=corpus, use_cache=False).get_all_messages()
+    parsed = _parse_counter(monkeypatch)
+
+    cold = ClaudeDesktopParser(leveldb_dir=corpus, cache_dir=tmp_path / "cache")
+    assert cold.get_all_messages() == fresh
+    assert len(parsed) == 5
+
+    warm = ClaudeDesktopParser(leveldb_dir=corpus, cache_dir=tmp_path / "cache")
+    assert warm.get_all_messages() == fresh
+    assert len(parsed) == 5
+
+
+def test_growing_log_is_reparsed_alone(corpus: Path, tmp_path: Path,
+                                       monkeypatch: pytest.MonkeyPatch) -> None:
+    cache_dir = tmp_path / "cache"
+    ClaudeDesktopParser(leveldb_dir=corpus, cache_dir=cache_dir).get_all_messages()
+    parsed = _parse_counter(monkeypatch)
+
+    log = next(corpus.glob("*.log"))
+    key = b"_https://claude.ai\x00\x01LSS-new:textInput"
+    value = b'\x01{"type":"doc","content":[{"type":"text","text":"brand new draft"}]}'
+    entries = [*iter_log(log)]
+    with LogWriter(log) as writer:
+        for entry in entries:
+            put = (entry.key, entry.value)
+            writer.add_record(encode_write_batch(entry.sequence, [put]))
+        writer.add_record(encode_write_batch(10_000, [(key, value)]))
+
+    parser = ClaudeDesktopParser(leveldb_dir=corpus, cache_dir=cache_dir)
+    messages = parser.get_all_messages()
+    assert parsed == [log.name]
+    assert messages[-1].text == "brand new draft"
+
+
+def test_cache_round_trip_and_prune(tmp_path: Path) -> None:
+    source = tmp_path / "leveldb"
+    source.mkdir()
+    table = source / "000005.ldb"
+    table.write_bytes(b"x")
+    messages = [
+        ChatMessage("conv", "hello", message_type="user", is_draft=True, sequence=7),
+        ChatMessage("conv", "world", sequence=None),
+    ]
+
+    cache = MessageCache(source, tmp_path / "cache")
+    cache.put(table, table.stat(), messages)
+    cache.save()
+
+    reloaded = MessageCache(source, tmp_path / "cache")
+    assert reloaded.get(table, table.stat()) == messages
+    assert reloaded.max_sequence(table, table.stat()) == 7
+
+    # A file with the same name but a new identity is a miss
+    os.utime(table, ns=(1, 1))
+    assert reloaded.get(table, table.stat()) is None
+
+    reloaded.prune(set())
+    reloaded.save()
+    pruned = MessageCache(source, tmp_path / "cache")
+    assert pruned.max_sequence(table, table.stat()) is None
+
+
+def test_snapshot_key(corpus: Path) -> None:
+    files = sorted(corpus.iterdir())
+    assert snapshot_key(files) == snapshot_key(files)
+    assert snapshot_key(files, "latest") != snapshot_key(files)
+    assert snapshot_key([*files, corpus / "missing.ldb"]) is None
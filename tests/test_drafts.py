@@ -0,0 +1,52 @@
+"""Tests for draft document extraction."""
+
+import json
+
+import pytest
+
+from clod.drafts import DraftExtractor, extract_doc_text
+
+
+def _doc(*paragraphs: str) -> dict[str, object]:
+    return {"type": "doc", "content": [
+        {"type": "paragraph", "content": [{"type": "text", "text": text}]}
+        for text in paragraphs
+    ]}
+
+
+def test_extract_doc_text_keeps_document_order() -> None:
+    doc = {"type": "doc", "content": [
+        {"type": "paragraph", "content": [
+            {"type": "text", "text": "one"},
+            {"type": "mention", "content": {"type": "text", "text": "two"}},
+        ]},
+        [{"type": "text", "text": "three"}],
+        {"type": "text", "text": 4},
+    ]}
+    assert extract_doc_text(doc) == "one two three"
+
+
+def test_extract_doc_text_handles_deep_nesting() -> None:
+    doc: dict[str, object] = {"type": "text", "text": "deep"}
+    for _ in range(10_000):
+        doc = {"type": "paragraph", "content": [doc]}
+    assert extract_doc_text(doc) == "deep"
+
+
+def test_extractor_finds_every_document_in_a_value() -> None:
+    value = (
+        "prefix " + json.dumps(_doc("first draft"), separators=(",", ":"))
+        + ' {"type":"doc" broken '
+        + json.dumps(_doc("hi"), separators=(",", ":"))
+        + json.dumps(_doc("second", "draft"), separators=(",", ":"))
+    )
+    extractor = DraftExtractor()
+    assert [*extractor.extract(value)] == ["first draft", "second draft"]
+    stats = extractor.stats
+    assert (stats.attempted, stats.accepted, stats.rejected) == (4, 2, 2)
+
+
+@pytest.mark.parametrize(("min_length", "expected"), [(1, ["hi"]), (3, [])])
+def test_extractor_min_length(min_length: int, expected: list[str]) -> None:
+    value = json.dumps(_doc("hi"), separators=(",", ":"))
+    assert [*DraftExtractor(min_length).extract(value)] == expected
@@ -0,0 +1,192 @@
+"""Tests for the resident hook daemon and its client."""
+
+import json
+import os
+import socket
+import subprocess
+import sys
+import threading
+from collections.abc import Callable, Iterator
+from pathlib import Path
+
+import pytest
+
+from clod.hook_server import HookRunner, HookServer
+
+HOOKS_DIR = Path(__file__).parents[1] / "claude" / "hooks"
+CLIENT = HOOKS_DIR / "hook_client.py"
+GREP_CALL = json.dumps(
+    {"tool_name": "Bash", "tool_input": {"command": "grep -r foo ."}}
+)
+
+
+def _run_client(socket_path: Path, payload: str) -> subprocess.CompletedProcess[str]:
+    return subprocess.run(
+        [sys.executable, "-S", str(CLIENT), "bash_command_validator"],
+        input=payload, capture_output=True, text=True, timeout=30,
+        env={"CLOD_HOOKS_SOCKET": str(socket_path), "PATH": os.environ["PATH"],
+             "XDG_CACHE_HOME": os.environ["XDG_CACHE_HOME"]},
+    )
+
+
+@pytest.fixture
+def fake_daemon(tmp_path: Path) -> Iterator[Callable[[bytes], Path]]:
+    """Start a socket that reads a request and answers with fixed bytes."""
+    servers: list[socket.socket] = []
+
+    def start(reply: bytes) -> Path:
+        path = tmp_path / "fake.sock"
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        server.bind(str(path))
+        server.listen()
+        servers.append(server)
+
+        def serve() -> None:
+            connection, _ = server.accept()
+            with connection:
+                while connection.recv(65536):
+                    pass
+                connection.sendall(reply)
+
+        threading.Thread(target=serve, daemon=True).start()
+        return path
+
+    yield start
+    for server in servers:
+        server.close()
+
+
+def test_client_without_daemon_runs_the_script(tmp_path: Path) -> None:
+    result = _run_client(tmp_path / "missing.sock", GREP_CALL)
+    assert result.returncode == 2
+    assert "rg" in result.stderr
+
+
+@pytest.mark.parametrize("reply", [b"", b"garbage\n", b"0 100\nshort"])
+def test_client_falls_back_on_a_broken_reply(
+    fake_daemon: Callable[[bytes], Path], reply: bytes
+) -> None:
+    result = _run_client(fake_daemon(reply), GREP_CALL)
+    assert result.returncode == 2
+    assert "rg" in result.stderr
+
+
+def test_client_relays_the_daemon_reply(tmp_path: Path) -> None:
+    socket_path = tmp_path / "hooks.sock"
+    server = HookServer(socket_path, HookRunner(HOOKS_DIR))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        blocked = _run_client(socket_path, GREP_CALL)
+        allowed = _run_client(socket_path, GREP_CALL.replace("grep -r", "rg"))
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    assert (blocked.returncode, allowed.returncode) == (2, 0)
+    assert "rg" in blocked.stderr
+    assert not socket_path.exists()
+
+
+def test_runner_calls_main_of_an_imported_script(tmp_path: Path) -> None:
+    (tmp_path / "counter.py").write_text(
+        "import sys\n"
+        "calls = []\n"
+        "def main():\n"
+        "    calls.append(1)\n"
+        "    print(len(calls), sys.stdin.read())\n"
+        "    sys.exit(2 if len(calls) > 1 else 0)\n"
+    )
+    runner = HookRunner(tmp_path)
+    first, second = runner.run("counter", b"a"), runner.run("counter", b"b")
+    # The module stays loaded between calls
+    assert (first.code, first.stdout) == (0, "1 a\n")
+    assert (second.code, second.stdout) == (2, "2 b\n")
+
+
+def test_runner_executes_a_script_without_main_once_per_call(tmp_path: Path) -> None:
+    log = tmp_path / "runs.log"
+    (tmp_path / "plain.py").write_text(
+        "import sys\n"
+        f"open({str(log)!r}, 'a').write('run\\n')\n"
+        "print(__name__, sys.stdin.read())\n"
+    )
+    runner = HookRunner(tmp_path)
+    replies = [runner.run("plain", b"x"), runner.run("plain", b"y")]
+    assert [reply.stdout for reply in replies] == ["__main__ x\n", "__main__ y\n"]
+    assert log.read_text() == "run\nrun\n"
+
+
+def test_runner_reloads_changed_scripts_and_reports_errors(tmp_path: Path) -> None:
+    script = tmp_path / "hook.py"
+    script.write_text("def main():\n    print('old')\n")
+    runner = HookRunner(tmp_path)
+    assert runner.run("hook", b"").stdout == "old\n"
+
+    script.write_text("def main():\n    raise RuntimeError('boom')\n")
+    os.utime(script, (1, 1))
+    reply = runner.run("hook", b"")
+    assert reply.code == 1
+    assert "RuntimeError: boom" in reply.stderr
+
+    assert runner.run("../etc", b"").code == 1
+
+
+def test_runner_gives_hooks_a_binary_stdin(tmp_path: Path) -> None:
+    (tmp_path / "raw.py").write_text(
+        "import sys\n"
+        "def main():\n"
+        "    print(sys.stdin.buffer.read())\n"
+    )
+    assert HookRunner(tmp_path).run("raw", "café".encode()).stdout == (
+        "b'caf\\xc3\\xa9'\n"
+    )
+
+
+def test_server_drops_a_stalled_client_without_blocking_others(
+    tmp_path: Path,
+) -> None:
+    (tmp_path / "echo.py").write_text(
+        "import sys\n"
+        "def main():\n"
+        "    print(sys.stdin.read())\n"
+    )
+    socket_path = tmp_path / "hooks.sock"
+    server = HookServer(socket_path, HookRunner(tmp_path), request_timeout=0.5)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        # Sends part of a request and never finishes it
+        stalled = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        stalled.connect(str(socket_path))
+        stalled.sendall(b"echo\npartial")
+
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+            client.settimeout(5)
+            client.connect(str(socket_path))
+            client.sendall(b"echo\nhello")
+            client.shutdown(socket.SHUT_WR)
+            assert client.makefile("rb").read() == b"0 6\nhello\n"
+
+        stalled.settimeout(5)
+        assert stalled.recv(1024) == b""
+        stalled.close()
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_server_replaces_a_stale_socket_but_not_a_live_one(tmp_path: Path) -> None:
+    socket_path = tmp_path / "hooks.sock"
+    stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    stale.bind(str(socket_path))
+    stale.close()
+
+    server = HookServer(socket_path, HookRunner(tmp_path))
+    try:
+        assert socket_path.stat().st_mode & 0o077 == 0
+        with pytest.raises(RuntimeError):
+            HookServer(socket_path, HookRunner(tmp_path))
+    finally:
+        server.server_close()
+    assert not socket_path.exists()
@@ -0,0 +1,152 @@
+"""Tests for hook matching, verdicts and concurrent dispatch."""
+
+import json
+import time
+from pathlib import Path
+
+import pytest
+from click.testing import CliRunner
+
+from clod.cli import main
+from clod.hooks import (
+    HookManager,
+    HookRun,
+    dispatch_hooks,
+    event_tool,
+    hook_verdict,
+    matcher_matches,
+    run_hook_command,
+)
+
+
+def _run(returncode: int | None, stdout: str = "", stderr: str = "") -> HookRun:
+    return HookRun("cmd", returncode, stdout, stderr, wall=0.0, cpu=0.0, peak_rss=0)
+
+
+@pytest.mark.parametrize(("matcher", "tool", "expected"), [
+    ("", "Bash", True),
+    ("*", "Edit", True),
+    ("Bash", "Bash", True),
+    ("Bash", "BashOutput", False),
+    ("Grep|Glob|LS", "Glob", True),
+    ("Edit|Write", "MultiEdit", False),
+    ("mcp__.*", "mcp__memory__read", True),
+])
+def test_matcher_matches(matcher: str, tool: str, expected: bool) -> None:
+    assert matcher_matches(matcher, tool) is expected
+
+
+@pytest.mark.parametrize(("event", "run", "expected"), [
+    ("PreToolUse", _run(0), ("success", "")),
+    ("PreToolUse", _run(2, stderr="use rg\n"), ("block", "use rg")),
+    ("Notification", _run(2, stderr="oops"), ("error", "oops")),
+    ("PreToolUse", _run(1, stderr="crash"), ("error", "crash")),
+    ("PreToolUse", _run(None), ("error", "timed out")),
+    ("PreToolUse", _run(0, '{"decision": "block", "reason": "no"}'), ("block", "no")),
+    ("PreToolUse", _run(0, '{"decision": "approve", "reason": "ok"}'),
+     ("approve", "ok")),
+    ("Stop", _run(0, '{"continue": false, "stopReason": "done"}'), ("stop", "done")),
+    ("PreToolUse", _run(0, json.dumps({"hookSpecificOutput": {
+        "permissionDecision": "ask", "permissionDecisionReason": "check"}})),
+     ("ask", "check")),
+    ("PreToolUse", _run(0, json.dumps({"hookSpecificOutput": {
+        "permissionDecision": "deny"}})), ("block", "")),
+    ("PreToolUse", _run(0, '{"hookSpecificOutput": "deny"}'), ("success", "")),
+    ("PreToolUse", _run(0, "plain output"), ("success", "")),
+    ("PreToolUse", _run(0, "{not json"), ("success", "")),
+    # JSON is only read from successful runs
+    ("PreToolUse", _run(1, '{"decision": "approve"}'), ("error", "")),
+])
+def test_hook_verdict(event: str, run: HookRun, expected: tuple[str, str]) -> None:
+    assert hook_verdict(event, run) == expected
+
+
+def _hook(command: str, matcher: str = "*", timeout: float | None = None) -> dict:
+    return {"event": "PreToolUse", "matcher": matcher, "type": "command",
+            "command": command, "enabled": True, "timeout": timeout}
+
+
+def test_dispatch_runs_hooks_concurrently_and_kills_at_deadline() -> None:
+    hooks = [
+        _hook("sleep 0.3"),
+        _hook("sleep 0.3; echo again"),
+        _hook("sleep 10", timeout=0.5),
+        _hook("echo use rg >&2; exit 2"),
+        _hook('echo \'{"decision": "approve"}\''),
+    ]
+    start = time.perf_counter()
+    result = dispatch_hooks("PreToolUse", hooks, "{}", "Bash")
+    elapsed = time.perf_counter() - start
+
+    assert elapsed < 2.0
+    assert [outcome.verdict for outcome in result.outcomes] == [
+        "success", "success", "error", "block", "approve",
+    ]
+    assert result.outcomes[2].run.timed_out
+    assert result.verdict == "block"
+
+
+def test_dispatch_deduplicates_commands() -> None:
+    result = dispatch_hooks("Stop", [_hook("true"), _hook("true")], "{}")
+    assert len(result.outcomes) == 1
+    assert result.verdict == "success"
+
+
+def test_run_hook_command_passes_payload_on_stdin() -> None:
+    run = run_hook_command("cat", '{"x": 1}', timeout=5)
+    assert run.returncode == 0
+    assert json.loads(run.stdout) == {"x": 1}
+
+
+def test_event_tool() -> None:
+    assert event_tool("PreToolUse", "Edit") == "Edit"
+    assert event_tool("pre-tool-use") == "Bash"
+    assert event_tool("PostToolUse", payload='{"tool_name": "Write"}') == "Write"
+    assert event_tool("Stop", "Bash") is None
+    with pytest.raises(ValueError):
+        event_tool("PreToolUse", payload="{}")
+
+
+@pytest.fixture
+def manager(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> HookManager:
+    monkeypatch.setenv("HOME", str(tmp_path))
+    settings = tmp_path / "settings.json"
+    settings.write_text(json.dumps({"hooks": {"PreToolUse": [
+        {"matcher": "Bash", "hooks": [{"type": "command", "command": "echo bash"}]},
+        {"matcher": "Edit", "hooks": [{"type": "command", "command": "echo edit"}]},
+        {"matcher": "*",
+         "hooks": [{"type": "command", "command": "echo any", "timeout": 5}]},
+    ]}}))
+    return HookManager(settings)
+
+
+def test_run_event_only_runs_hooks_for_one_tool(manager: HookManager) -> None:
+    outcomes = manager.run_event("PreToolUse").outcomes
+    commands = [outcome.hook["command"] for outcome in outcomes]
+    assert commands == ["echo bash", "echo any"]
+
+    result = manager.run_event("PreToolUse", payload='{"tool_name": "Edit"}')
+    assert [outcome.run.stdout for outcome in result.outcomes] == ["edit\n", "any\n"]
+
+
+def test_list_hooks_reports_timeouts(manager: HookManager) -> None:
+    assert [hook["timeout"] for hook in manager.list_hooks()] == [None, None, 5]
+
+
+def test_run_event_cli(manager: HookManager) -> None:
+    # The command reads the settings from $HOME/.claude
+    user_settings = Path.home() / ".claude" / "settings.json"
+    user_settings.write_text(manager.settings_path.read_text())
+    runner = CliRunner()
+    result = runner.invoke(main, ["hooks", "run", "-e", "pre-tool-use", "-t", "Edit"])
+    assert result.exit_code == 0, result.output
+    assert result.output.startswith("PreToolUse Edit: 2 hook(s) in parallel\n")
+    assert "Decision: success" in result.output
+
+    dry = runner.invoke(main, ["hooks", "run", "-e", "PreToolUse", "--dry-run"])
+    assert dry.output == "Would run: echo bash\nWould run: echo any\n"
+
+    for args in (["hooks", "run"], ["hooks", "run", "0", "-e", "Stop"],
+                 ["hooks", "run", "-e", "PreToolUse", "-i", "{}"]):
+        failed = runner.invoke(main, args)
+        assert failed.exit_code == 1, failed.output
@@ -0,0 +1,194 @@
+"""Tests for the native LevelDB table, log and Snappy readers."""
+
+import random
+import struct
+from pathlib import Path
+
+import pytest
+
+from clod.leveldb import (
+    LOG_BLOCK_SIZE,
+    LevelDBError,
+    LogTailer,
+    LogWriter,
+    crc32c,
+    encode_write_batch,
+    internal_key,
+    iter_entries,
+    iter_log,
+    iter_table,
+    snappy_compress,
+    snappy_decompress,
+    write_table,
+)
+
+
+def _random_bytes(size: int, seed: int = 0) -> bytes:
+    rng = random.Random(seed)
+    words = [b"leveldb", b"snappy", b"draft", b"\x00\x01", b"claude", b" "]
+    return b"".join(rng.choice(words) for _ in range(size))[:size]
+
+
+@pytest.mark.parametrize("data", [
+    b"",
+    b"a",
+    b"abcd" * 100,
+    bytes(range(256)) * 3,
+    _random_bytes(70_000),
+])
+def test_snappy_round_trip(data: bytes) -> None:
+    assert snappy_decompress(snappy_compress(data)) == data
+
+
+def test_snappy_decompress_overlapping_copy() -> None:
+    # Length 10, literal "ab", then a 1-byte-offset copy of 8 bytes at offset 2
+    block = bytes([10, (2 - 1) << 2]) + b"ab" + bytes([1 | ((8 - 4) << 2), 2])
+    assert snappy_decompress(block) == b"ababababab"
+
+
+def test_snappy_decompress_rejects_bad_offset() -> None:
+    block = bytes([5, 0]) + b"a" + bytes([1 | ((4 - 4) << 2), 9])
+    with pytest.raises(LevelDBError):
+        snappy_decompress(block)
+
+
+def test_crc32c_known_value() -> None:
+    assert crc32c(b"123456789") == 0xE3069283
+
+
+def _table_entries(count: int) -> list[tuple[bytes, int, bytes]]:
+    return [
+        (f"key-{i:05d}".encode(), i + 1, _random_bytes(50 + i % 200, seed=i))
+        for i in range(count)
+    ]
+
+
+@pytest.mark.parametrize("compress", [True, False])
+def test_table_round_trip(tmp_path: Path, compress: bool) -> None:
+    entries = _table_entries(500)
+    path = tmp_path / "000005.ldb"
+    write_table(path, [(internal_key(key, seq), value) for key, seq, value in entries],
+                compress=compress, block_size=1024)
+
+    assert [tuple(entry) for entry in iter_table(path)] == [
+        (key, value, seq) for key, seq, value in entries
+    ]
+    assert list(iter_entries(path)) == list(iter_table(path))
+
+
+def test_table_skips_deletions(tmp_path: Path) -> None:
+    deletion = b"gone" + struct.pack("<Q", 7 << 8)
+    path = tmp_path / "000005.ldb"
+    write_table(path, [(deletion, b""), (internal_key(b"kept", 8), b"v")])
+    assert [tuple(entry) for entry in iter_table(path)] == [(b"kept", b"v", 8)]
+
+
+def test_table_bad_magic(tmp_path: Path) -> None:
+    path = tmp_path / "000005.ldb"
+    path.write_bytes(b"\0" * 100)
+    with pytest.raises(LevelDBError):
+        list(iter_table(path))
+
+
+def test_log_round_trip_across_blocks(tmp_path: Path) -> None:
+    path = tmp_path / "000007.log"
+    # The large value spans several 32 KiB blocks as FIRST/MIDDLE/LAST fragments
+    puts = [
+        (b"small", b"x"),
+        (b"large", _random_bytes(3 * LOG_BLOCK_SIZE)),
+        (b"after", b"y"),
+    ]
+    with LogWriter(path) as writer:
+        for sequence, put in enumerate(puts, 100):
+            writer.add_record(encode_write_batch(sequence, [put]))
+
+    assert [tuple(entry) for entry in iter_log(path)] == [
+        (key, value, sequence) for sequence, (key, value) in enumerate(puts, 100)
+    ]
+
+
+def test_log_write_batch_sequences(tmp_path: Path) -> None:
+    path = tmp_path / "000007.log"
+    with LogWriter(path) as writer:
+        puts = [(b"a", b"1"), (b"b", b"2"), (b"c", b"3")]
+        writer.add_record(encode_write_batch(10, puts))
+    assert [entry.sequence for entry in iter_log(path)] == [10, 11, 12]
+
+
+def test_log_ignores_partial_tail(tmp_path: Path) -> None:
+    path = tmp_path / "000007.log"
+    with LogWriter(path) as writer:
+        writer.add_record(encode_write_batch(1, [(b"done", b"1")]))
+        writer.add_record(encode_write_batch(2, [(b"torn", b"2" * 100)]))
+    path.write_bytes(path.read_bytes()[:-50])
+    assert [entry.key for entry in iter_log(path)] == [b"done"]
+
+
+def test_empty_log(tmp_path: Path) -> None:
+    path = tmp_path / "000007.log"
+    path.write_bytes(b"")
+    assert list(iter_log(path)) == []
+
+
+def _log_bytes(tmp_path: Path, puts: list[tuple[bytes, bytes]]) -> bytes:
+    path = tmp_path / "scratch.log"
+    with LogWriter(path) as writer:
+        for sequence, put in enumerate(puts, 1):
+            writer.add_record(encode_write_batch(sequence, [put]))
+    return path.read_bytes()
+
+
+def test_log_tailer_reads_only_new_records(tmp_path: Path) -> None:
+    puts = [(b"a", b"1"), (b"b", _random_bytes(LOG_BLOCK_SIZE)), (b"c", b"3")]
+    data = _log_bytes(tmp_path, puts)
+    one = len(_log_bytes(tmp_path, puts[:1]))
+    path = tmp_path / "000007.log"
+    path.write_bytes(data[:one])
+
+    tailer = LogTailer(path)
+    assert [entry.key for entry in tailer.read()] == [b"a"]
+    assert tailer.read() == []
+
+    # A record cut off mid-write waits for the rest
+    with path.open("ab") as f:
+        f.write(data[one:-20])
+    assert [entry.key for entry in tailer.read()] == [b"b"]
+    with path.open("ab") as f:
+        f.write(data[-20:])
+    assert [(entry.key, entry.sequence) for entry in tailer.read()] == [(b"c", 3)]
+
+
+def test_log_tailer_restarts_on_a_new_log(tmp_path: Path) -> None:
+    path = tmp_path / "000007.log"
+    path.write_bytes(_log_bytes(tmp_path, [(b"a", b"1"), (b"b", b"2")]))
+    tailer = LogTailer(path)
+    assert len(tailer.read()) == 2
+
+    # Truncated in place
+    path.write_bytes(_log_bytes(tmp_path, [(b"c", b"3")]))
+    assert [entry.key for entry in tailer.read()] == [b"c"]
+
+    # Replaced by a different file that happens to be larger
+    replacement = tmp_path / "replacement"
+    replacement.write_bytes(_log_bytes(tmp_path, [(b"d", b"4"), (b"e", b"5")]))
+    replacement.replace(path)
+    assert [entry.key for entry in tailer.read()] == [b"d", b"e"]
+
+
+def test_log_tailer_skips_an_undecodable_batch(tmp_path: Path) -> None:
+    path = tmp_path / "000007.log"
+    with LogWriter(path) as writer:
+        writer.add_record(encode_write_batch(1, [(b"a", b"1")]))
+        # A batch with an unknown operation tag
+        writer.add_record(struct.pack("<QI", 2, 1) + b"\x07\x01k")
+        writer.add_record(encode_write_batch(3, [(b"c", b"3")]))
+
+    tailer = LogTailer(path)
+    assert [entry.key for entry in tailer.read()] == [b"a", b"c"]
+    assert tailer.skipped == 1
+    assert tailer.offset == path.stat().st_size
+    assert tailer.read() == []
+
+
+def test_log_tailer_missing_file(tmp_path: Path) -> None:
+    assert LogTailer(tmp_path / "000009.log").read() == []
@@ -0,0 +1,56 @@
+"""Tests for collapsing near-duplicate drafts."""
+
+import pytest
+
+from clod.desktop import ChatMessage
+from clod.neardup import (
+    BINS,
+    collapse_near_duplicates,
+    minhash_signature,
+    shingles,
+)
+
+FINAL = "could you explain why the parser cache misses on every compacted table file"
+OTHER = "please refactor the tmux hook benchmark"
+
+
+def _drafts(conversation_id: str, text: str, first: int) -> list[ChatMessage]:
+    """Drafts saved every few words while typing text, then the final text."""
+    words = text.split()
+    prefixes = [" ".join(words[:count]) for count in range(4, len(words) + 1, 3)]
+    return [
+        ChatMessage(conversation_id, draft, is_draft=True, sequence=first + i)
+        for i, draft in enumerate([*prefixes, text])
+    ]
+
+
+def test_shingles_ignore_the_last_word_being_typed() -> None:
+    assert shingles("fix the pars") == shingles("fix the parser")
+    assert shingles("Fix The") == shingles("fix the")
+
+
+def test_minhash_signature_is_dense() -> None:
+    signature = minhash_signature(shingles("a b"))
+    assert len(signature) == BINS
+    assert len(set(signature)) == BINS
+
+
+@pytest.mark.parametrize("keep", ["longest", "latest"])
+def test_collapse_keeps_one_message_per_typing_session(keep: str) -> None:
+    messages = _drafts("conv-1", FINAL, 10) + _drafts("conv-2", OTHER, 500)
+    collapsed = collapse_near_duplicates(messages, keep)
+    assert [msg.text for msg in collapsed] == [FINAL, OTHER]
+
+
+def test_collapse_keeps_distinct_messages_and_conversations() -> None:
+    messages = [
+        ChatMessage("a", FINAL, sequence=1),
+        ChatMessage("b", FINAL, sequence=2),
+        ChatMessage("a", "a different question about search ranking", sequence=3),
+    ]
+    assert collapse_near_duplicates(messages) == messages
+
+
+def test_collapse_rejects_unknown_keep() -> None:
+    with pytest.raises(ValueError):
+        collapse_near_duplicates([], "oldest")
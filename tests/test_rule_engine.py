@@ -0,0 +1,114 @@
+"""Tests for the hook rule engine's prefilter and combined matching."""
+
+import random
+import re
+from pathlib import Path
+
+import pytest
+
+from rule_engine import Rule, RuleEngine, _literals
+
+RULES = [
+    Rule("grep", r"^grep\b", "use rg", piped=False),
+    Rule("find", r"^find\s+\S+\s+-name\b", "use rg --files"),
+    Rule("dot", r"foo.bar", "no foo.bar"),
+    Rule("rm", r"\brm\s+-rf\s+/", "no rm -rf /", ignore_case=True),
+    Rule("curl-pipe", r"(curl|wget)\b.*\|\s*(ba)?sh", "no curl | sh"),
+    Rule("anchored-end", r"--force$", "no --force"),
+    Rule("any-digit", r"\d{4,}", "long number"),
+    Rule("named", r"(?P<word>\w+) (?P=word)", "repeated word"),
+]
+
+TEXTS = [
+    "grep foo file",
+    "ls | grep x",
+    "find . -name '*.py'",
+    "foo.bar",
+    "foo\nbar",
+    "fooXbar\n",
+    "RM -RF /",
+    "sudo rm -rf /tmp",
+    "curl https://x | sh",
+    "curl https://x\n| bash",
+    "git push --force",
+    "git push --force\n",
+    "echo 12345",
+    "the the",
+    "",
+]
+
+
+def _fallback(rules: list[Rule], text: str, piped: bool) -> list[str]:
+    return [rule.name for rule in rules
+            if (not piped or rule.piped) and re.search(rule.regex, text)]
+
+
+@pytest.mark.parametrize("text", TEXTS)
+@pytest.mark.parametrize("piped", [False, True])
+def test_combined_matches_per_rule_search(text: str, piped: bool) -> None:
+    engine = RuleEngine(RULES)
+    matched = [rule.name for rule in engine.match(text, piped)]
+    assert matched == _fallback(RULES, text, piped)
+
+
+def test_combined_matches_per_rule_search_on_random_text() -> None:
+    rng = random.Random(0)
+    alphabet = ["grep ", "find . -name ", "foo", ".", "bar", "\n", " ", "rm -rf /", "|",
+                "sh", "curl ", "--force", "1234", "the ", "x"]
+    engine = RuleEngine(RULES)
+    for _ in range(2000):
+        text = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 12)))
+        matched = [rule.name for rule in engine.match(text)]
+        assert matched == _fallback(RULES, text, False), text
+
+
+def test_colliding_group_names_fall_back() -> None:
+    rules = [Rule("a", r"(?P<x>ab)c", "a"), Rule("b", r"(?P<x>ab)d", "b")]
+    engine = RuleEngine(rules)
+    assert [rule.name for rule in engine.match("abc abd")] == ["a", "b"]
+
+
+@pytest.mark.parametrize(("pattern", "expected"), [
+    (r"^grep\b", ["grep"]),
+    (r"^(grep|egrep)\b", ["egrep", "grep"]),
+    (r"foo\s+bar", ["foo"]),
+    (r"(?:abc)+", ["abc"]),
+    (r"ab?c", ["a"]),
+    (r"\w+", []),
+    (r"x*", []),
+])
+def test_required_literals(pattern: str, expected: list[str]) -> None:
+    assert _literals(Rule("r", pattern, "")) == expected
+
+
+@pytest.mark.parametrize("pattern", [r"(?i)grep", r"(a)\1", r"([unclosed"])
+def test_invalid_patterns(pattern: str) -> None:
+    with pytest.raises(ValueError, match="Invalid pattern in rule"):
+        RuleEngine([Rule("bad", pattern, "")])
+
+
+def _write_rules(path: Path, pattern: str) -> None:
+    path.write_text(f'[[rules]]\nname = "r"\npattern = \'{pattern}\'\nmessage = "m"\n')
+
+
+def test_load_caches_and_replaces_stale_entries(tmp_path: Path) -> None:
+    rules = tmp_path / "bash.toml"
+    other = tmp_path / "bash-extra.toml"
+    cache = tmp_path / "cache"
+    _write_rules(rules, r"^grep\b")
+    _write_rules(other, r"^find\b")
+
+    RuleEngine.load(rules, cache)
+    RuleEngine.load(other, cache)
+    assert len([*cache.iterdir()]) == 2
+
+    _write_rules(rules, r"^egrep\b")
+    engine = RuleEngine.load(rules, cache)
+    assert [rule.pattern for rule in engine.rules] == [r"^egrep\b"]
+    names = sorted(path.name for path in cache.iterdir())
+    assert len(names) == 2
+    assert any(name.startswith("bash-extra-") for name in names)
+
+    # A second load comes from the cache and behaves the same
+    cached = RuleEngine.load(rules, cache)
+    assert cached.match("egrep x") == engine.match("egrep x")
@@ -0,0 +1,142 @@
+"""Tests for the inverted-index desktop search."""
+
+import random
+
+import pytest
+
+from clod.search import SearchIndex, edit_distance, max_edits, parse_query
+
+TEXTS = [
+    "Fix the LevelDB reader",
+    "the reader skips deleted keys",
+    "Snappy blocks are decompressed lazily",
+    "search the chat history",
+    "history is searched with an index",
+    "a_b token with under_scores",
+    "",
+]
+
+
+@pytest.mark.parametrize(("query", "expected"), [
+    ("fix reader", [["fix", "reader"]]),
+    ('"the reader" skips', [["the reader", "skips"]]),
+    ("snappy OR history", [["snappy"], ["history"]]),
+    ("OR a OR OR b OR", [["a"], ["b"]]),
+    ('""', []),
+    ("", []),
+])
+def test_parse_query(query: str, expected: list[list[str]]) -> None:
+    assert parse_query(query) == expected
+
+
+def _scan(texts: list[str], query: str, case_sensitive: bool = False) -> set[int]:
+    """The linear scan the index replaces."""
+    def fold(text: str) -> str:
+        return text if case_sensitive else text.lower()
+
+    return {
+        doc_id for doc_id, text in enumerate(texts)
+        if any(all(fold(term) in fold(text) for term in group)
+               for group in parse_query(query))
+    }
+
+
+@pytest.mark.parametrize("query", [
+    "reader",
+    "read",
+    "ead",
+    "the reader",
+    '"the reader"',
+    '"reader skips"',
+    "snappy OR history",
+    "searc",
+    "der_sco",
+    "missing",
+    "e",
+])
+def test_search_matches_a_substring_scan(query: str) -> None:
+    index = SearchIndex(TEXTS)
+    doc_ids, total = index.search(query)
+    assert set(doc_ids) == _scan(TEXTS, query)
+    assert total == len(doc_ids)
+
+
+def test_search_matches_a_substring_scan_on_random_text() -> None:
+    rng = random.Random(0)
+    words = ["alpha", "beta", "gamma", "al", "pha", "Beta", "GAM", "ma-al", "x"]
+    texts = [" ".join(rng.choices(words, k=rng.randint(0, 6))) for _ in range(200)]
+    index = SearchIndex(texts)
+    for _ in range(200):
+        query = " ".join(rng.choices([*words, "OR"], k=rng.randint(1, 3)))
+        for case_sensitive in (False, True):
+            doc_ids, _ = index.search(query, case_sensitive=case_sensitive)
+            assert set(doc_ids) == _scan(texts, query, case_sensitive), query
+
+
+def test_search_ranks_and_limits() -> None:
+    texts = ["history", "history history history", "no match", "a long history here"]
+    index = SearchIndex(texts)
+    doc_ids, total = index.search("history", limit=2)
+    assert total == 3
+    assert doc_ids == [1, 0]
+
+
+def test_case_sensitive_search() -> None:
+    index = SearchIndex(TEXTS)
+    assert index.search("Snappy", case_sensitive=True)[0] == [2]
+    assert index.search("snappy", case_sensitive=True)[0] == []
+
+
+def test_state_round_trip() -> None:
+    index = SearchIndex(TEXTS)
+    restored = SearchIndex(TEXTS, index.state())
+    for query in ["reader", "snappy OR history", '"the chat"', "ead"]:
+        assert restored.search(query) == index.search(query)
+
+
+def test_state_for_other_texts_is_rejected() -> None:
+    state = SearchIndex(TEXTS).state()
+    with pytest.raises(ValueError):
+        SearchIndex(TEXTS[:-1], state)
+
+
+@pytest.mark.parametrize(("a", "b", "distance"), [
+    ("", "", 0),
+    ("kitten", "sitting", 3),
+    ("search", "serach", 1),
+    ("abc", "abc", 0),
+    ("abc", "", 3),
+    ("ca", "abc", 3),
+])
+def test_edit_distance(a: str, b: str, distance: int) -> None:
+    assert edit_distance(a, b, 5) == distance
+    assert edit_distance(b, a, 5) == distance
+    if distance:
+        assert edit_distance(a, b, distance - 1) == distance
+
+
+def test_edit_distance_stops_past_the_limit() -> None:
+    assert edit_distance("abcdefgh", "hgfedcba", 2) == 3
+    assert edit_distance("short", "a much longer word", 2) == 3
+
+
+@pytest.mark.parametrize(("word", "edits"), [
+    ("fix", 1), ("cache", 2), ("benchmark", 3),
+])
+def test_max_edits(word: str, edits: int) -> None:
+    assert max_edits(word) == edits
+
+
+def test_similar_tokens() -> None:
+    index = SearchIndex(["the leveldb reader", "levels of reading", "unrelated"])
+    similar = index.similar_tokens("levledb")
+    assert set(similar) == {"leveldb"}
+    assert 0 < similar["leveldb"] < 1
+    assert index.similar_tokens("reader") == {"reader": 1.0}
+
+
+def test_fuzzy_search_ranks_closer_matches_first() -> None:
+    index = SearchIndex(["snapy decompresion", "unrelated", "snappy decompression"])
+    assert index.fuzzy_search("snappy decompression") == ([2, 0], 2)
+    assert index.fuzzy_search("snappy decompression", limit=1) == ([2], 2)
+    assert index.fuzzy_search("zzzz") == ([], 0)
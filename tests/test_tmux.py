@@ -0,0 +1,399 @@
+"""Tests for tmux control-mode reply parsing and the control clients."""
+
+import asyncio
+import shutil
+import subprocess
+import time
+from collections.abc import Iterator
+from pathlib import Path
+
+import pytest
+from click.testing import CliRunner
+
+from clod.cli import main
+from clod.tmux import (
+    PASTE_THRESHOLD,
+    ControlClient,
+    ControlParser,
+    OutputMatcher,
+    PaneCursors,
+    TmuxController,
+    line_anchor,
+    lines_after_anchor,
+    quote_tmux_arg,
+    strip_ansi,
+)
+from clod.tmux_async import AsyncControlClient, AsyncTmuxController, SessionResult
+from clod.transcript import (
+    pane_directory,
+    search_transcripts,
+    tap_directory,
+)
+
+Reply = subprocess.CompletedProcess[str]
+
+
+def _feed(lines: list[str]) -> tuple[list[Reply], ControlParser]:
+    parser = ControlParser()
+    replies = [parser.feed(f"{line}\n".encode()) for line in lines]
+    return [reply for reply in replies if reply is not None], parser
+
+
+def test_parser_assembles_reply_blocks() -> None:
+    replies, parser = _feed([
+        "%begin 1700000000 5 1",
+        "first",
+        "",
+        "%end 1700000000 5 1",
+        "%session-changed $1 work",
+        "%begin 1700000000 6 1",
+        "can't find session",
+        "%error 1700000000 6 1",
+    ])
+    assert [(reply.returncode, reply.stdout, reply.stderr) for reply in replies] == [
+        (0, "first\n\n", ""),
+        (1, "", "can't find session\n"),
+    ]
+    assert not parser.exited
+
+
+def test_parser_only_closes_the_open_block() -> None:
+    # Output that looks like an %end for another command is part of the body
+    replies, _ = _feed(["%begin 1 7 1", "%end 1 3 1", "%end", "%end 1 7 1"])
+    assert [reply.stdout for reply in replies] == ["%end 1 3 1\n%end\n"]
+
+
+def test_parser_notices_exit() -> None:
+    replies, parser = _feed(["%output %1 hi", "%exit"])
+    assert replies == []
+    assert parser.exited
+
+
+def test_strip_ansi() -> None:
+    raw = "\x1b[1;31mred\x1b[0m\r\n\x1b]0;title\x07plain\x1b]2;t\x1b\\ end\x1bM"
+    assert strip_ansi(raw) == "red\nplain end"
+
+
+def test_matcher_finds_matches_split_across_reads() -> None:
+    matcher = OutputMatcher(r"caf\u00e9 \d+")
+    data = "\x1b[32mcafé\x1b[0m 42".encode()
+    # Split inside the escape and inside the two-byte é
+    assert matcher.feed(data[:3]) is None
+    assert matcher.feed(data[3:11]) is None
+    assert matcher.feed(data[11:]) == "café 42"
+    assert matcher.text == "café 42"
+
+
+def test_matcher_anchors_match_at_any_line() -> None:
+    matcher = OutputMatcher(r"^TWO$")
+    assert matcher.feed(b"$ echo ONE; echo TWO\r\nONE\r\n") is None
+    assert matcher.feed(b"TWO\r\n") == "TWO"
+
+
+def test_matcher_without_pattern_only_collects() -> None:
+    matcher = OutputMatcher()
+    assert matcher.feed(b"one\r\n") is None
+    assert matcher.feed(b"two") is None
+    assert matcher.text == "one\ntwo"
+
+
+def test_lines_after_anchor() -> None:
+    lines = ["a", "b", "c", "d", "b", "c", "e"]
+    anchor = line_anchor(["x", "b", "c"][-2:])
+    assert anchor is not None
+    # The last occurrence of the anchored lines wins
+    assert lines_after_anchor(lines, anchor, 2) == ["e"]
+    assert lines_after_anchor(lines[:3], anchor, 2) == []
+    assert lines_after_anchor(["b"], anchor, 2) is None
+    assert line_anchor([]) is None
+
+
+def test_pane_cursors_persist(tmp_path: Path) -> None:
+    path = tmp_path / "cursors.json"
+    PaneCursors(path).set("work:cc.1", {"line": 7})
+    assert PaneCursors(path).get("work:cc.1") == {"line": 7}
+    assert PaneCursors(path).get("other") is None
+    path.write_text("{broken")
+    assert PaneCursors(path).get("work:cc.1") is None
+
+
+@pytest.fixture
+def tmux_session(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Iterator[str]:
+    """Start a session on a private tmux server."""
+    if shutil.which("tmux") is None:
+        pytest.skip("tmux is not installed")
+    monkeypatch.delenv("TMUX", raising=False)
+    monkeypatch.setenv("TMUX_TMPDIR", str(tmp_path))
+    subprocess.run(["tmux", "new-session", "-d", "-s", "test", "sh"], check=True)
+    yield "test"
+    subprocess.run(["tmux", "kill-server"], capture_output=True)
+
+
+def test_control_client(tmux_session: str) -> None:
+    client = ControlClient(tmux_session)
+    assert client.connect()
+    try:
+        reply = client.run("display-message", "-p", "#{session_name}",
+                           ";", "list-sessions", "-F", "x")
+        assert reply is not None
+        assert (reply.returncode, reply.stdout) == (0, "test\nx\n")
+
+        missing = client.run("has-session", "-t", "missing")
+        assert missing is not None
+        assert missing.returncode == 1
+        assert "missing" in missing.stderr
+    finally:
+        client.close()
+    assert client.run("list-sessions") is None
+
+
+def test_async_control_client_answers_concurrent_commands(tmux_session: str) -> None:
+    async def scenario() -> list[Reply | None]:
+        client = AsyncControlClient()
+        assert await client.connect(tmux_session)
+        try:
+            return await asyncio.gather(*(
+                client.run("display-message", "-p", str(index)) for index in range(20)
+            ), client.run("has-session", "-t", "missing"))
+        finally:
+            await client.close()
+
+    *replies, missing = asyncio.run(scenario())
+    assert [reply.stdout if reply else None for reply in replies] == [
+        f"{index}\n" for index in range(20)
+    ]
+    assert missing is not None
+    assert missing.returncode == 1
+
+
+@pytest.mark.parametrize(("arg", "quoted"), [
+    ("send-keys", "send-keys"),
+    ("%1", "%1"),
+    ("two words", '"two words"'),
+    ('say "hi" $HOME', '"say \\"hi\\" \\$HOME"'),
+    ("a\nb\tc", '"a\\nb\\tc"'),
+    ("\x01", '"\\u0001"'),
+    ("~user", '"\\~user"'),
+    ("", '""'),
+])
+def test_quote_tmux_arg(arg: str, quoted: str) -> None:
+    assert quote_tmux_arg(arg) == quoted
+
+
+ROUND_TRIP = [
+    "plain", "two words", 'quote"s', "it's", "back\\slash", "$HOME", "{brace}",
+    "line1\nline2", "tab\there", "esc\x1b[0m", "semi;colon", "#{session_name}",
+    "~", "~user", "ünï", "\x01ctl", "",
+]
+
+
+def test_quoted_args_reach_tmux_unchanged(tmux_session: str) -> None:
+    client = ControlClient(tmux_session)
+    assert client.connect()
+    try:
+        for arg in ROUND_TRIP:
+            assert client.run("set-option", "-g", "@value", arg) is not None
+            shown = client.run("show-options", "-gqv", "@value")
+            assert shown is not None
+            assert shown.stdout == f"{arg}\n", arg
+    finally:
+        client.close()
+
+
+@pytest.mark.parametrize("control_mode", [True, False])
+def test_controller_batches_commands(tmux_session: str, control_mode: bool) -> None:
+    with TmuxController(tmux_session, control_mode=control_mode) as controller:
+        assert controller.has_session()
+        result = controller.run_batch(
+            ["set-option", "-g", "@first", "one two"],
+            ["show-options", "-gqv", "@first"],
+            ["has-session", "-t", "missing"],
+            ["show-options", "-gqv", "@first"],
+        )
+        assert result.returncode == 1
+        assert result.stdout == "one two\n"
+        assert (controller._control is not None) is control_mode
+
+
+def test_setup_builds_the_workspace(tmux_session: str, tmp_path: Path) -> None:
+    with TmuxController("work") as controller:
+        assert not controller.status()["exists"]
+        assert controller.setup(tmp_path)
+
+        status = controller.status()
+        assert status["exists"]
+        panes = controller.list_panes()
+        cc_panes = [pane for pane in panes if pane.window_name == "cc"]
+        assert [pane.pane_index for pane in cc_panes] == [0, 1]
+        assert all(pane.pane_pid > 0 and pane.window_active for pane in cc_panes)
+        assert status["panes"] >= 2
+        assert {pane["pane_id"] for pane in status["pane_details"]} >= {
+            pane.pane_id for pane in cc_panes
+        }
+        # A second setup fails on the existing session
+        assert not controller.setup(tmp_path)
+
+
+def test_wait_for_sees_output_of_the_sent_command(tmux_session: str) -> None:
+    with TmuxController(tmux_session) as controller:
+        found = controller.wait_for(r"^done-\d+$", timeout=5,
+                                    send="echo done-$((6*7))")
+        assert found is not None
+        assert (found.reason, found.match) == ("match", "done-42")
+
+        idle = controller.wait_for(idle_ms=100, timeout=5)
+        assert idle is not None
+        assert idle.reason == "idle"
+
+        late = controller.wait_for("never printed", timeout=0.2)
+        assert late is not None
+        assert late.reason == "timeout"
+        assert late.elapsed >= 0.2
+
+    assert TmuxController("missing").wait_for("x", timeout=1) is None
+
+
+def _print_lines(controller: TmuxController, first: int, last: int) -> None:
+    """Print a range of numbers in the session's current pane."""
+    # Quoting keeps the typed command line from matching the marker
+    command = f"seq {first} {last}; echo printed-'{last}'"
+    found = controller.wait_for(f"\nprinted-{last}", timeout=10, send=command)
+    assert found is not None
+    assert found.reason == "match"
+
+
+@pytest.mark.parametrize(("history_limit", "batch"), [(2000, 60), (40, 25)])
+def test_delta_reads_return_each_line_once(
+    tmux_session: str, history_limit: int, batch: int
+) -> None:
+    with TmuxController(tmux_session) as controller:
+        controller.run_batch(
+            ["set-option", "-g", "history-limit", str(history_limit)],
+            ["new-window", "-t", tmux_session, "sh"],
+        )
+        target = f"{tmux_session}:1"
+        seen: list[str] = []
+        # Past history-limit, delta reads rely on finding the previous lines
+        for first in range(1, 300, batch):
+            _print_lines(controller, first, first + batch - 1)
+            delta = controller.read_delta(target, lines=1000)
+            seen += [line for line in delta.splitlines() if line.isdigit()]
+        assert seen == [str(n) for n in range(1, len(seen) + 1)]
+        assert len(seen) >= 300
+        assert controller.read_delta(target) == ""
+
+
+@pytest.fixture
+def repl_sessions(tmux_session: str) -> list[str]:
+    names = ["claude-repl-a", "claude-repl-b"]
+    for name in names:
+        subprocess.run(["tmux", "new-session", "-d", "-s", name, "sh"], check=True)
+    return names
+
+
+@pytest.mark.parametrize("control_mode", [True, False])
+def test_broadcast_waits_on_every_session(repl_sessions: list[str],
+                                          control_mode: bool) -> None:
+    async def scenario() -> list[SessionResult]:
+        async with AsyncTmuxController(control_mode) as controller:
+            sessions = await controller.list_sessions("claude-repl")
+            assert sessions == repl_sessions
+            return await controller.broadcast(
+                [*sessions, "missing"], "echo hi-$((40+2))", pattern=r"hi-\d+",
+                timeout=5,
+            )
+
+    results = asyncio.run(scenario())
+    assert [(r.session, r.ok, r.reason, r.match) for r in results] == [
+        ("claude-repl-a", True, "match", "hi-42"),
+        ("claude-repl-b", True, "match", "hi-42"),
+        ("missing", False, "error", None),
+    ]
+
+
+def test_gather_cli_reports_each_session(repl_sessions: list[str]) -> None:
+    runner = CliRunner()
+    sent = runner.invoke(main, ["tmux", "broadcast", "echo gathered", "-p", "claude"])
+    assert sent.exit_code == 0, sent.output
+    assert sent.output.count(": sent") == 2
+
+    idle = runner.invoke(main, ["tmux", "gather", "-p", "claude", "-i", "200"])
+    assert idle.exit_code == 0, idle.output
+    for session in repl_sessions:
+        assert f"✓ {session}: idle" in idle.output
+
+    missing = runner.invoke(main, ["tmux", "gather", "-s", "missing"])
+    assert missing.exit_code == 1
+    assert "✗ missing: error" in missing.output
+
+
+def _wait_for_file(path: Path, expected: str) -> str:
+    deadline = time.monotonic() + 5
+    while time.monotonic() < deadline:
+        if path.exists() and path.read_text() == expected:
+            break
+        time.sleep(0.05)
+    return path.read_text()
+
+
+@pytest.mark.parametrize(("lines", "paste"), [(3, False), (3, True), (400, None)])
+def test_send_input_delivers_text_intact(tmux_session: str, tmp_path: Path,
+                                         lines: int, paste: bool | None) -> None:
+    out = tmp_path / "out.txt"
+    subprocess.run(["tmux", "new-session", "-d", "-s", "repl", f"cat > {out}"],
+                   check=True)
+    text = "".join(f"line {n}: $HOME ~ \"q\" 'a;b' ünï\n" for n in range(lines))
+    assert (len(text) > PASTE_THRESHOLD) is (lines == 400)
+    with TmuxController("repl") as controller:
+        assert controller.send_input(text, paste)
+    assert _wait_for_file(out, text) == text
+
+
+def test_send_input_cli_reads_stdin(tmux_session: str, tmp_path: Path) -> None:
+    out = tmp_path / "out.txt"
+    subprocess.run(["tmux", "new-session", "-d", "-s", "repl", f"cat > {out}"],
+                   check=True)
+    args = ["tmux", "send-input", "-s", "repl", "--paste", "-"]
+    result = CliRunner().invoke(main, args, input="from stdin\n\n")
+    assert result.exit_code == 0, result.output
+    assert _wait_for_file(out, "from stdin\n") == "from stdin\n"
+
+
+def test_waits_on_a_recorded_pane_keep_its_transcript_in_order(
+    tmux_session: str, tmp_path: Path
+) -> None:
+    # The recorder runs inside tmux, which must be able to import clod
+    root = str(Path(__file__).parents[1])
+    subprocess.run(["tmux", "set-environment", "-g", "PYTHONPATH", root], check=True)
+    transcripts = tmp_path / "transcripts"
+    words = ["ONE", "TWO", "THREE", "FOUR"]
+    with TmuxController(tmux_session) as controller:
+        [pane_id] = controller.start_recording(transcripts, 1 << 20)
+        for word in words:
+            found = controller.wait_for(f"\n{word}", timeout=10, send=f"echo {word}")
+            assert found is not None
+            assert found.reason == "match"
+
+        async def gather() -> list[SessionResult]:
+            async with AsyncTmuxController() as async_controller:
+                return await async_controller.broadcast(
+                    [tmux_session], "echo FIVE", pattern="\nFIVE", timeout=10
+                )
+
+        assert [result.reason for result in asyncio.run(gather())] == ["match"]
+        # The recorder kept its pipe throughout
+        state = controller._run_tmux("display-message", "-p", "-t", pane_id,
+                                     "#{pane_pipe}")
+        assert state.stdout == "1\n"
+        assert controller.stop_recording() == [pane_id]
+
+    directory = pane_directory(transcripts, tmux_session, pane_id)
+    deadline = time.monotonic() + 5
+    lines: list[str] = []
+    # The recorder writes the rest of its input after its pipe closes
+    while len(lines) < len(words) + 1 and time.monotonic() < deadline:
+        time.sleep(0.05)
+        found = search_transcripts(transcripts, r"^[A-Z]+$")
+        lines = [match.text for match in found]
+    assert lines == [*words, "FIVE"]
+    assert not tap_directory(directory).exists()
@@ -0,0 +1,151 @@
+"""Tests for rotating pane transcripts and searching them."""
+
+import gzip
+import os
+import select
+import threading
+from datetime import datetime
+from itertools import pairwise
+from pathlib import Path
+
+import pytest
+from click.testing import CliRunner
+
+from clod.cli import main
+from clod.tmux import create_output_fifo, remove_output_fifo
+from clod.transcript import (
+    TranscriptWriter,
+    load_index,
+    pane_directory,
+    read_lines,
+    record,
+    search_transcripts,
+    tap_directory,
+)
+
+
+def _segment_lines(directory: Path) -> list[list[bytes]]:
+    segments = load_index(directory)
+    return [[*read_lines(directory / segment.name)] for segment in segments]
+
+
+def test_writer_rotates_at_line_boundaries(tmp_path: Path) -> None:
+    lines = [f"line {n} {'x' * (n % 7)}".encode() for n in range(200)]
+    with TranscriptWriter(tmp_path, segment_bytes=256) as writer:
+        data = b"\n".join(lines) + b"\n"
+        # Uneven chunks, so lines arrive split across writes
+        for start in range(0, len(data), 37):
+            writer.write(data[start:start + 37])
+
+    segments = load_index(tmp_path)
+    assert len(segments) > 5
+    assert [line for chunk in _segment_lines(tmp_path) for line in chunk] == lines
+    for previous, segment in pairwise(segments):
+        assert segment.offset == previous.offset + previous.size
+        assert segment.line == previous.line + previous.lines
+        assert previous.ended is not None
+
+
+def test_writer_resumes_the_last_segment_and_keeps_the_newest(tmp_path: Path) -> None:
+    with TranscriptWriter(tmp_path, segment_bytes=1024) as writer:
+        writer.write(b"first run\n")
+    with TranscriptWriter(tmp_path, segment_bytes=1024) as writer:
+        writer.write(b"second run\n")
+    assert _segment_lines(tmp_path) == [[b"first run", b"second run"]]
+
+    with TranscriptWriter(tmp_path, segment_bytes=16, keep=2) as writer:
+        for n in range(10):
+            writer.write(f"kept {n}\n".encode())
+    segments = load_index(tmp_path)
+    assert len(segments) == 2
+    assert sorted(path.name for path in tmp_path.glob("*.log.gz")) == [
+        segment.name for segment in segments
+    ]
+    assert segments[-1].line == 12
+
+
+def test_writer_rejects_unknown_compression(tmp_path: Path) -> None:
+    with pytest.raises(ValueError):
+        TranscriptWriter(tmp_path, compress="bzip2")
+
+
+def test_read_lines_stops_at_a_truncated_end(tmp_path: Path) -> None:
+    path = tmp_path / "000001.log.gz"
+    complete = gzip.compress(b"one\ntwo\npartial")
+    path.write_bytes(complete[:-8])
+    assert [*read_lines(path)] == [b"one", b"two", b"partial"]
+
+
+def test_record_copies_a_pipe_until_eof(tmp_path: Path) -> None:
+    read_fd, write_fd = os.pipe()
+    with TranscriptWriter(tmp_path) as writer:
+        thread = threading.Thread(target=record, args=(read_fd, writer))
+        thread.start()
+        os.write(write_fd, b"\x1b[32mhello\x1b[0m\r\n")
+        os.write(write_fd, b"world\n")
+        os.close(write_fd)
+        thread.join(timeout=5)
+    os.close(read_fd)
+    assert _segment_lines(tmp_path) == [[b"\x1b[32mhello\x1b[0m\r", b"world"]]
+
+
+def test_record_copies_output_into_taps(tmp_path: Path) -> None:
+    taps = tap_directory(tmp_path)
+    fifo, tap_fd = create_output_fifo(taps)
+    read_fd, write_fd = os.pipe()
+    with TranscriptWriter(tmp_path) as writer:
+        thread = threading.Thread(target=record, args=(read_fd, writer, taps))
+        thread.start()
+        os.write(write_fd, b"seen by both\n")
+        assert select.select([tap_fd], [], [], 5)[0]
+        assert os.read(tap_fd, 1024) == b"seen by both\n"
+
+        remove_output_fifo(fifo, tap_fd)
+        os.write(write_fd, b"only recorded\n")
+        os.close(write_fd)
+        thread.join(timeout=5)
+    os.close(read_fd)
+    assert _segment_lines(tmp_path) == [[b"seen by both", b"only recorded"]]
+    assert not taps.exists()
+
+
+@pytest.fixture
+def transcripts(tmp_path: Path) -> Path:
+    root = tmp_path / "transcripts"
+    for session, pane_id, text in [
+        ("work", "%1", b"\x1b[1mbuild ok\x1b[0m\r\ntests FAILED\n"),
+        ("work", "%2", b"build started\n"),
+        ("other", "%3", b"Build done\n"),
+    ]:
+        with TranscriptWriter(pane_directory(root, session, pane_id)) as writer:
+            writer.write(text)
+    return root
+
+
+def test_search_strips_escapes_and_filters(transcripts: Path) -> None:
+    matches = [
+        (match.pane, match.line, match.text)
+        for match in search_transcripts(transcripts, r"^build")
+    ]
+    assert matches == [
+        ("work/pane-1", 1, "build ok"),
+        ("work/pane-2", 1, "build started"),
+    ]
+    assert [m.pane for m in search_transcripts(transcripts, "build", True)] == [
+        "other/pane-3", "work/pane-1", "work/pane-2",
+    ]
+    only = search_transcripts(transcripts, "build", session="work", pane="%2")
+    assert [m.text for m in only] == ["build started"]
+    later = datetime(9999, 1, 1)
+    assert [*search_transcripts(transcripts, "build", since=later)] == []
+
+
+def test_grep_cli(transcripts: Path) -> None:
+    runner = CliRunner()
+    result = runner.invoke(main, ["tmux", "grep", "-d", str(transcripts), "-i",
+                                  "-m", "1", "failed"])
+    assert result.exit_code == 0, result.output
+    assert result.output == "work/pane-1:2: tests FAILED\n"
+
+    missing = runner.invoke(main, ["tmux", "grep", "-d", str(transcripts), "nothing"])
+    assert missing.exit_code == 1